@@ -6,35 +6,45 @@
 # ============================================================================
 
 import os
+import re
 import time
 import signal
 import sys
 import ssl
 import imaplib
 import json
+import heapq
+import hashlib
+import queue
 from pathlib import Path
-from typing import Optional, Set, Dict, List
+from typing import Optional, Set, Dict, List, Tuple
 from datetime import datetime, timedelta
-import email.utils
 import threading
-import re
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
 from loguru import logger
 from dotenv import load_dotenv
 
 try:
-    from email_classifier import EmailClassifier
+    from email_classifier import CLASSIFY_BATCH_SIZE, EmailClassifier
     from email_parser import EmailParser
     from feedback_manager import FeedbackManager
     from important_message_detector import ImportantMessageDetector, ImportantMessage
     from summary_email_reporter import SummaryEmailReporter
+    from imap_utils import (IDLE_MAX_SECONDS, PipelinedIMAP, bulk_fetch, chunked, compress_ids,
+                            enlarge_read_buffer, expand_ids, folder_status, idle_wait, iter_list_response,
+                            refresh_capabilities)
 except ImportError:
-    sys.path.append(os.path.dirname(os.path.abspath(__file__)))
-    from email_classifier import EmailClassifier
-    from email_parser import EmailParser
-    from feedback_manager import FeedbackManager
-    from important_message_detector import ImportantMessageDetector, ImportantMessage
-    from summary_email_reporter import SummaryEmailReporter
+    # Lancé depuis la racine du dépôt: modules du paquet scripts
+    from scripts.email_classifier import CLASSIFY_BATCH_SIZE, EmailClassifier
+    from scripts.email_parser import EmailParser
+    from scripts.feedback_manager import FeedbackManager
+    from scripts.important_message_detector import ImportantMessageDetector, ImportantMessage
+    from scripts.summary_email_reporter import SummaryEmailReporter
+    from scripts.imap_utils import (IDLE_MAX_SECONDS, PipelinedIMAP, bulk_fetch, chunked, compress_ids,
+                                    enlarge_read_buffer, expand_ids, folder_status, idle_wait, iter_list_response,
+                                    refresh_capabilities)
 
 load_dotenv()
 
@@ -48,6 +58,16 @@ SKIP_FOLDERS = [
     'All Mail',    # Redundant "all mail" folder
     'Tous les messages',  # French version
 ]
+# Compilés une fois: mêmes règles (sous-chaîne) que les boucles précédentes
+_SKIP_FOLDERS_RE = re.compile('|'.join(map(re.escape, SKIP_FOLDERS)))
+_SPAM_TRASH_RE = re.compile(r'spam|trash|corbeille', re.IGNORECASE)
+_LEARNING_PREFIXES = ('Training', 'Feedback')
+# Toutes les exclusions du scan en une recherche: dossiers spéciaux, noms
+# mal formés (double backslash) et dossiers d'apprentissage
+_EXCLUDED_FOLDER_RE = re.compile(
+    '|'.join(map(re.escape, SKIP_FOLDERS))
+    + r'|\\\\|^(?:' + '|'.join(map(re.escape, _LEARNING_PREFIXES)) + ')'
+)
 
 # Configuration IMAP
 PROTON_BRIDGE_HOST = os.getenv('PROTON_BRIDGE_HOST', '127.0.0.1')
@@ -55,9 +75,20 @@ PROTON_BRIDGE_PORT = int(os.getenv('PROTON_BRIDGE_PORT', 1143))
 PROTON_USERNAME = os.getenv('PROTON_USERNAME')
 PROTON_PASSWORD = os.getenv('PROTON_PASSWORD')
 POLL_INTERVAL = int(os.getenv('PROTON_LUMO_POLL_INTERVAL', 60))
+# Durée de validité de la liste des dossiers (LIST complet), en secondes
+FOLDER_LIST_TTL = int(os.getenv('PROTON_LUMO_FOLDER_LIST_TTL', 600))
 UNSEEN_ONLY = os.getenv('PROTON_LUMO_UNSEEN_ONLY', 'true').lower() == 'true'
 DRY_RUN = os.getenv('PROTON_LUMO_DRY_RUN', 'false').lower() == 'true'
 MAX_EMAILS_PER_FOLDER = int(os.getenv('PROTON_LUMO_MAX_EMAILS_PER_FOLDER', 100))
+FETCH_BULK = int(os.getenv('PROTON_LUMO_FETCH_BULK', 100))
+# Octets du corps demandés au serveur (en-têtes + début du TEXT): le message
+# complet n'est relu que si ce début ne suffit pas à le classer
+PARTIAL_BODY_BYTES = int(os.getenv('PROTON_LUMO_PARTIAL_BODY_BYTES', 16384))
+# Dossiers traités en parallèle, une connexion IMAP par worker
+# (le Bridge limite le nombre de sessions simultanées)
+MAX_WORKERS = int(os.getenv('PROTON_LUMO_MAX_WORKERS', 4))
+# Appels simultanés au classifier (API), tous dossiers confondus
+CLASSIFY_WORKERS = int(os.getenv('PROTON_LUMO_CLASSIFY_WORKERS', 4))
 
 # Configuration Executive Summary
 SUMMARY_ENABLED = os.getenv('PROTON_LUMO_SUMMARY_ENABLED', 'true').lower() == 'true'
@@ -65,25 +96,51 @@ SUMMARY_HOURS = list(map(int, os.getenv('PROTON_LUMO_SUMMARY_HOURS', '09,13,17')
 SUMMARY_MIN_SCORE = int(os.getenv('PROTON_LUMO_SUMMARY_MIN_SCORE', 30))
 SUMMARY_FORMAT = os.getenv('PROTON_LUMO_SUMMARY_FORMAT', 'email').lower()
 
+# Domaines d'expéditeurs classés sans appel au classifier (séparés par des virgules):
+# SPAM_DOMAINS -> SPAM directement, KEEP_DOMAINS -> laissés en place
+SPAM_DOMAINS = frozenset(d.strip().lower() for d in os.getenv('PROTON_LUMO_SPAM_DOMAINS', '').split(',') if d.strip())
+KEEP_DOMAINS = frozenset(d.strip().lower() for d in os.getenv('PROTON_LUMO_KEEP_DOMAINS', '').split(',') if d.strip())
+_SENDER_DOMAIN_RE = re.compile(r'@([\w.-]+)')
+
+# Écriture des messages importants: par lots de N ou toutes les N secondes
+IMPORTANT_WRITE_BATCH = 100
+IMPORTANT_WRITE_INTERVAL = 1.0
+# Au plus une écriture du checkpoint par intervalle (réveils IDLE rapprochés)
+CHECKPOINT_MIN_INTERVAL = 1.0
+
 # Limites spéciales
 SPAM_TRASH_LIMIT = 10
+# Dossier de plus de limit * N messages: SEARCH restreint aux derniers UID
+# attribués au lieu de lister tout le dossier pour n'en garder que limit
+HUGE_FOLDER_FACTOR = 10
+# Fenêtre d'UID examinée: limit * N (marge pour les UID des messages supprimés)
+RECENT_UID_WINDOW_FACTOR = 2
 
 DATA_DIR = Path(os.getenv('PROTON_LUMO_DATA', '~/ProtonLumoAI/data')).expanduser()
 DATA_DIR.mkdir(parents=True, exist_ok=True)
 CHECKPOINT_FILE = DATA_DIR / 'checkpoint.json'
+# Identifiants mémorisés par dossier au-delà desquels les plus anciens sont oubliés
+MAX_PROCESSED_PER_FOLDER = int(os.getenv('PROTON_LUMO_MAX_PROCESSED_PER_FOLDER', 50000))
+# Résultats de classification mémorisés par empreinte de message (les plus anciens oubliés)
+MAX_CLASSIFIED_CACHE = int(os.getenv('PROTON_LUMO_MAX_CLASSIFIED_CACHE', 10000))
+_MESSAGE_ID_RE = re.compile(rb'^Message-ID:[ \t]*(\S.*?)\s*$', re.IGNORECASE | re.MULTILINE)
+_DATE_HEADER_RE = re.compile(rb'^Date:[ \t]*(\S.*?)\s*$', re.IGNORECASE | re.MULTILINE)
 
 
-class ProtonMailBox:
+class ProtonMailBox(PipelinedIMAP):
     """Wrapper IMAP pour ProtonMail Bridge avec STARTTLS."""
 
-    def __init__(self, host, port, username, password, timeout=None):
+    def __init__(self, host, port, username, password, timeout=None, known_folders=None):
+        """known_folders: dossiers déjà listés par ailleurs; évite le LIST
+        complet à la connexion (cache complété ensuite par check_folder)."""
         self.host = host
         self.port = port
         self.username = username
         self.password = password
         self.timeout = timeout or 10
         self.client: Optional[imaplib.IMAP4] = None
-        self.existing_folders: Set[str] = set()
+        self.existing_folders: Set[str] = set(known_folders or ())
+        self._list_on_connect = known_folders is None
         self.connect()
 
     def connect(self):
@@ -97,10 +154,14 @@ class ProtonMailBox:
             self.client = imaplib.IMAP4(self.host, self.port, timeout=self.timeout)
             logger.debug('Envoi de la commande STARTTLS...')
             self.client.starttls(ssl_context)
+            enlarge_read_buffer(self.client)
             logger.debug(f'Authentification pour {self.username}...')
             self.client.login(self.username, self.password)
+            # SORT, MOVE et IDLE peuvent n'être annoncés qu'après LOGIN
+            refresh_capabilities(self.client)
             logger.success(f'✓ Connexion établie avec succès {self.host}:{self.port}')
-            self.refresh_folder_cache()
+            if self._list_on_connect:
+                self.refresh_folder_cache()
         except Exception as e:
             logger.error(f'Échec de la connexion IMAP/STARTTLS: {e}')
             if self.client:
@@ -115,15 +176,7 @@ class ProtonMailBox:
         try:
             status, folders = self.client.list()
             if status == 'OK':
-                for folder_bytes in folders:
-                    try:
-                        folder_raw = folder_bytes.decode('utf-8')
-                    except UnicodeDecodeError:
-                        folder_raw = folder_bytes.decode('latin-1')
-                    parts = folder_raw.split('"')
-                    if len(parts) >= 3:
-                        folder_name = parts[-2]
-                        self.existing_folders.add(folder_name)
+                self.existing_folders.update(iter_list_response(folders))
         except Exception as e:
             logger.warning(f'Erreur lors de la mise à jour du cache des dossiers: {e}')
 
@@ -131,6 +184,18 @@ class ProtonMailBox:
         """Vérifie si un dossier existe."""
         return folder_path in self.existing_folders
 
+    def check_folder(self, folder_path: str) -> bool:
+        """Vérifie un seul dossier sur le serveur (LIST ciblé, pas toute l'arborescence)."""
+        try:
+            status, folders = self.client.list('""', f'"{folder_path}"')
+        except Exception as e:
+            logger.warning(f'Erreur LIST {folder_path}: {e}')
+            return False
+        if status == 'OK' and folder_path in iter_list_response(folders):
+            self.existing_folders.add(folder_path)
+            return True
+        return False
+
     def __enter__(self):
         return self
 
@@ -155,7 +220,7 @@ class EmailProcessor:
     
     Le système de checkpoint assure la persistance:
     - initial_scan_done: True après le premier scan complet
-    - processed_emails: Set[str] des emails déjà traités (format "folder:uid")
+    - processed_emails: Dict[str, Set[int]] des UID déjà traités par dossier
     - last_check: Dict[str, str] du dernier timestamp de vérification par dossier
     
     Après le scan initial, seuls les emails UNSEEN sont traités pour économiser les tokens.
@@ -163,6 +228,10 @@ class EmailProcessor:
 
     def __init__(self):
         self.classifier = EmailClassifier()
+        # Catégorie -> dossier cible, calculé une fois (UNKNOWN n'a jamais de dossier)
+        self._target_folders: Dict[str, Optional[str]] = {
+            name: cat.folder for name, cat in self.classifier.categories.items() if name != 'UNKNOWN'
+        }
         self.parser = EmailParser()
         self.feedback_manager: Optional[FeedbackManager] = None
         self.running = True
@@ -171,6 +240,12 @@ class EmailProcessor:
             self.detector = ImportantMessageDetector()
             self.reporter = None
             self.last_summary_hour = -1
+            # Les messages importants sont écrits sur disque par un thread dédié
+            self._important_queue: queue.Queue = queue.Queue()
+            self._important_writer = threading.Thread(
+                target=self._write_important_messages, name='important-writer', daemon=True
+            )
+            self._important_writer.start()
             logger.info(f'Executive Summary ACTIVÉ - Rapports {SUMMARY_HOURS} CET')
         else:
             self.detector = None
@@ -181,70 +256,206 @@ class EmailProcessor:
         self.checkpoint = self.load_checkpoint()
         self.initial_scan_done = self.checkpoint.get('initial_scan_done', False)
         self.last_check: Dict[str, str] = self.checkpoint.get('last_check', {})
-        self.processed_emails: Set[str] = set(self.checkpoint.get('processed_emails', []))
+        # UID traités par dossier. L'ancienne clé processed_emails (numéros
+        # de séquence, renumérotés par chaque EXPUNGE) n'est pas reprise
+        self.processed_emails: Dict[str, Set[int]] = self.load_processed_emails(
+            self.checkpoint.get('processed_uids', {})
+        )
+        # UIDVALIDITY de chaque dossier pour ces UID: s'il change, les UID
+        # mémorisés ne désignent plus les mêmes messages
+        self._uid_validity: Dict[str, int] = dict(self.checkpoint.get('uid_validity', {}))
+        # Empreinte du message -> (catégorie, confiance): un message renuméroté
+        # (EXPUNGE) ou déplacé n'est ni reclassé ni recompté dans le résumé
+        self._classified: Dict[str, Tuple[str, float]] = {
+            digest: tuple(result) for digest, result in self.checkpoint.get('classified', {}).items()
+        }
+        # Protège l'état partagé par les workers de dossiers (processed_emails,
+        # last_check, caches de dossiers et de classifications)
+        self._state_lock = threading.RLock()
+        # Passe à True dès que l'état persistant change (emails traités,
+        # nouveau dossier, fin du scan initial)
+        self._checkpoint_dirty = False
+        # Intervalles déjà sérialisés par dossier: seuls les dossiers modifiés
+        # depuis la dernière sauvegarde sont retriés et recompressés
+        self._dumped_ids: Dict[str, List[List[int]]] = {}
+        self._dirty_folders: Set[str] = set(self.processed_emails)
+        # Connexions des workers de dossiers, conservées entre les cycles
+        # (au plus MAX_WORKERS): pas de STARTTLS + LOGIN par dossier
+        self._worker_mailboxes: 'queue.LifoQueue[ProtonMailBox]' = queue.LifoQueue()
+        # Dossiers dont la création a échoué pendant le cycle en cours:
+        # pas de nouvelle tentative (CREATE + LIST) pour chaque email
+        self._failed_folders: Set[str] = set()
+        # INTERNALDATE déjà lues par dossier (UID -> date), avec l'état
+        # (UIDVALIDITY, UIDNEXT, EXISTS) du SELECT correspondant
+        self._date_cache: Dict[str, Tuple[Tuple[bytes, int, int], Dict[bytes, datetime]]] = {}
+        # (UIDVALIDITY, UIDNEXT, MESSAGES) des dossiers entièrement traités au
+        # dernier passage: s'ils n'ont pas bougé, ni SELECT ni SEARCH
+        self._folder_status: Dict[str, Tuple[int, int, int]] = {}
+        # (UIDVALIDITY, UIDNEXT) au SELECT du dernier passage complet: les UID
+        # inférieurs ont déjà été examinés, le SEARCH suivant part de UIDNEXT
+        self._uid_floor: Dict[str, Tuple[int, int]] = {
+            folder: tuple(floor) for folder, floor in self.checkpoint.get('uid_floor', {}).items()
+        }
+        # Dossiers à traiter (LIST filtré) et date du LIST: réutilisés pendant
+        # FOLDER_LIST_TTL, invalidés par une création ou un SELECT refusé
+        self._folder_list: Optional[List[str]] = None
+        self._folder_list_time = 0.0
+        # Tous les dossiers du dernier LIST (exclusions comprises): cache de
+        # départ des nouvelles connexions
+        self._known_folders: Set[str] = set()
+        # Fin du dernier cycle complet (tous les dossiers): entre deux, un
+        # réveil IDLE ne retraite que INBOX
+        self._last_full_scan = 0.0
+        # État du SELECT de INBOX au dernier traitement: un message arrivé
+        # depuis (avant l'entrée en IDLE) réveille sans attendre le cycle suivant
+        self._inbox_state: Optional[Tuple[bytes, int, int]] = None
+        # Écriture du checkpoint en arrière-plan: la boucle repasse en IDLE
+        # sans attendre le disque. Un seul worker garde l'ordre des écritures.
+        self._checkpoint_writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix='checkpoint')
+        # Classifications API d'un dossier en parallèle (attente réseau), bornées
+        # pour tous les workers de dossiers par CLASSIFY_WORKERS
+        self._classify_pool = ThreadPoolExecutor(max_workers=max(CLASSIFY_WORKERS, 1), thread_name_prefix='classify')
+        self._last_checkpoint_save = 0.0
 
         signal.signal(signal.SIGINT, self.signal_handler)
         signal.signal(signal.SIGTERM, self.signal_handler)
 
         logger.info(f'EmailProcessor démarré (Dry Run: {DRY_RUN}, Unseen Only: {UNSEEN_ONLY}, Max/Folder: {MAX_EMAILS_PER_FOLDER})')
         if self.initial_scan_done:
-            logger.info(f'✓ Reprise depuis checkpoint ({len(self.processed_emails)} emails déjà traités)')
+            logger.info(f'✓ Reprise depuis checkpoint ({self.processed_count()} emails déjà traités)')
             logger.info('ℹ️  Mode incrémental: seuls les nouveaux emails (UNSEEN) seront traités')
         else:
             logger.info('⚠️  Premier scan: TOUS les emails seront analysés (peut prendre du temps)')
 
     def load_checkpoint(self) -> dict:
-        """Charge le checkpoint depuis le disque."""
-        if CHECKPOINT_FILE.exists():
-            try:
-                with open(CHECKPOINT_FILE, 'r') as f:
-                    data = json.load(f)
-                    logger.info(f'Checkpoint chargé: {CHECKPOINT_FILE}')
-                    return data
-            except Exception as e:
-                logger.warning(f'Impossible de charger le checkpoint: {e}')
-        return {}
+        """Charge le checkpoint depuis le disque.
+
+        Le fichier est lu d'un bloc en binaire et passé tel quel à json.loads
+        (qui détecte l'UTF-8): pas de couche texte ni de décodage par morceaux.
+        """
+        try:
+            data = json.loads(CHECKPOINT_FILE.read_bytes())
+        except FileNotFoundError:
+            return {}
+        except Exception as e:
+            logger.warning(f'Impossible de charger le checkpoint: {e}')
+            return {}
+        logger.info(f'Checkpoint chargé: {CHECKPOINT_FILE}')
+        return data
 
-    def save_checkpoint(self):
+    def save_checkpoint(self, wait: bool = False, force: bool = False):
         """Sauvegarde le checkpoint sur disque.
         
         Appelé après chaque cycle de traitement et lors de l'arrêt.
         Permet de reprendre exactement où le système s'est arrêté.
+
+        Rien n'est écrit si l'état n'a pas changé depuis la dernière
+        sauvegarde. L'état est copié sous verrou puis écrit par le thread
+        checkpoint; wait=True attend la fin de l'écriture. Moins de
+        CHECKPOINT_MIN_INTERVAL après la précédente, la sauvegarde est reportée
+        à l'appel suivant, sauf avec force=True (arrêt) ou wait=True.
         """
-        try:
+        with self._state_lock:
+            if not self._checkpoint_dirty:
+                logger.debug('Checkpoint inchangé, pas de sauvegarde')
+                return
+            now = time.monotonic()
+            if not (force or wait) and now - self._last_checkpoint_save < CHECKPOINT_MIN_INTERVAL:
+                logger.debug('Checkpoint sauvegardé il y a moins de 1s, reporté')
+                return
+            self._last_checkpoint_save = now
             checkpoint_data = {
                 'initial_scan_done': self.initial_scan_done,
-                'last_check': self.last_check,
-                'processed_emails': list(self.processed_emails),
+                'last_check': dict(self.last_check),
+                'processed_uids': self.dump_processed_emails(),
+                'uid_validity': dict(self._uid_validity),
+                'classified': dict(self._classified),
+                'uid_floor': dict(self._uid_floor),
                 'last_update': datetime.now().isoformat()
             }
-            with open(CHECKPOINT_FILE, 'w') as f:
-                json.dump(checkpoint_data, f, indent=2)
-            logger.debug(f'Checkpoint sauvegardé ({len(self.processed_emails)} emails traités)')
+            self._checkpoint_dirty = False
+            count = self.processed_count()
+
+        future = self._checkpoint_writer.submit(self._write_checkpoint, checkpoint_data, count)
+        if wait:
+            future.result()
+
+    def _write_checkpoint(self, checkpoint_data: dict, count: int):
+        """Écrit un instantané du checkpoint (thread checkpoint).
+
+        L'écriture passe par un fichier temporaire puis os.replace: un arrêt
+        brutal ne laisse jamais un checkpoint tronqué.
+        """
+        tmp_file = CHECKPOINT_FILE.with_suffix('.tmp')
+        try:
+            with open(tmp_file, 'w') as f:
+                json.dump(checkpoint_data, f, separators=(',', ':'))
+            os.replace(tmp_file, CHECKPOINT_FILE)
+            logger.debug(f'Checkpoint sauvegardé ({count} emails traités)')
         except Exception as e:
+            with self._state_lock:
+                self._checkpoint_dirty = True
             logger.error(f'Erreur sauvegarde checkpoint: {e}')
 
+    @staticmethod
+    def load_processed_emails(data) -> Dict[str, Set[int]]:
+        """Reconstruit processed_emails depuis le checkpoint.
+
+        Accepte les intervalles [début, fin], les listes d'entiers et l'ancien
+        format (liste de "folder:uid").
+        """
+        if isinstance(data, dict):
+            return {folder: set(expand_ids(uids)) for folder, uids in data.items()}
+
+        processed: Dict[str, Set[int]] = {}
+        for key in data:
+            folder, _, uid = key.rpartition(':')
+            if uid.isdigit():
+                processed.setdefault(folder, set()).add(int(uid))
+        return processed
+
+    def dump_processed_emails(self) -> Dict[str, List[List[int]]]:
+        """Sérialise processed_emails en ne gardant que les plus récents par dossier.
+
+        Les identifiants, en grande partie consécutifs, sont stockés en
+        intervalles [début, fin]: le checkpoint reste petit même avec des
+        dizaines de milliers d'emails traités. Seuls les dossiers modifiés
+        depuis la sauvegarde précédente sont recalculés.
+        """
+        for folder in self._dirty_folders:
+            ordered = sorted(self.processed_emails.get(folder, ()))
+            if len(ordered) > MAX_PROCESSED_PER_FOLDER:
+                ordered = ordered[-MAX_PROCESSED_PER_FOLDER:]
+                self.processed_emails[folder] = set(ordered)
+            self._dumped_ids[folder] = compress_ids(ordered)
+        self._dirty_folders.clear()
+        return dict(self._dumped_ids)
+
+    def processed_count(self) -> int:
+        """Nombre total d'emails marqués comme traités."""
+        return sum(len(uids) for uids in self.processed_emails.values())
+
     def signal_handler(self, sig, frame):
         logger.info('Signal d\'arrêt reçu. Sauvegarde du checkpoint...')
-        self.save_checkpoint()
+        self.save_checkpoint(force=True)
         logger.info('Fermeture...')
         self.running = False
 
     def connect_mailbox(self) -> ProtonMailBox:
-        """Crée et retourne une instance connectée de ProtonMailBox."""
-        if not PROTON_USERNAME or not PROTON_PASSWORD:
-            logger.error('Identifiants manquants. Vérifiez votre fichier .env')
-            sys.exit(1)
-        return ProtonMailBox(PROTON_BRIDGE_HOST, PROTON_BRIDGE_PORT, PROTON_USERNAME, PROTON_PASSWORD)
+        """Crée et retourne une instance connectée de ProtonMailBox.
+
+        Les identifiants sont vérifiés une fois, au lancement de run().
+        """
+        # Dossiers du dernier LIST (list_folders): ni la connexion principale
+        # ni celles des workers ne relistent toute l'arborescence
+        with self._state_lock:
+            known_folders = set(self._known_folders)
+        return ProtonMailBox(PROTON_BRIDGE_HOST, PROTON_BRIDGE_PORT, PROTON_USERNAME, PROTON_PASSWORD,
+                             known_folders=known_folders)
 
     def get_target_folder(self, category: str) -> Optional[str]:
         """Récupère le dossier cible pour une catégorie donnée."""
-        if category == 'UNKNOWN':
-            return None
-        cat_obj = self.classifier.categories.get(category)
-        if cat_obj:
-            return cat_obj.folder
-        return None
+        return self._target_folders.get(category)
 
     def ensure_folder_exists(self, mailbox: ProtonMailBox, folder_path: str) -> bool:
         """S'assure qu'un dossier existe, le crée récursivement si nécessaire.
@@ -254,6 +465,9 @@ class EmailProcessor:
         if mailbox.folder_exists(folder_path):
             logger.debug(f'Dossier {folder_path} déjà dans le cache')
             return True
+        with self._state_lock:
+            if folder_path in self._failed_folders:
+                return False
 
         path_parts = folder_path.split('/')
         current_path = ''
@@ -266,51 +480,109 @@ class EmailProcessor:
             if not mailbox.folder_exists(current_path):
                 try:
                     logger.debug(f'Création du dossier {current_path}')
-                    mailbox.client.create(f'"{current_path}"')
-                    time.sleep(0.5)
-                    mailbox.refresh_folder_cache()
-                    if mailbox.folder_exists(current_path):
-                        logger.success(f'Dossier créé: {current_path}')
-                    else:
-                        logger.warning(f'Dossier {current_path} créé mais absent du cache')
+                    # CREATE est synchrone: un OK tagué signifie que le dossier existe
+                    typ, data = mailbox.client.create(f'"{current_path}"')
+                    if typ == 'OK':
                         mailbox.existing_folders.add(current_path)
+                        with self._state_lock:
+                            self._folder_list = None
+                        logger.success(f'Dossier créé: {current_path}')
+                        continue
+                    # Refus: le dossier a peut-être été créé par une autre connexion
+                    if not mailbox.check_folder(current_path):
+                        raise imaplib.IMAP4.error(f'{typ} {data}')
                 except Exception as e:
                     logger.error(f'Impossible de créer le dossier {current_path}: {e}')
+                    with self._state_lock:
+                        self._failed_folders.add(folder_path)
                     return False
         return True
 
-    def get_email_date(self, mailbox: ProtonMailBox, email_id: bytes) -> datetime:
-        """Récupère la date d'un email pour le tri.
-        
-        Retourne la date ou datetime.min si erreur.
+    def search_emails(self, mailbox: ProtonMailBox, criteria: str) -> Tuple[List[bytes], bool]:
+        """Recherche les emails du dossier sélectionné.
+
+        Si le serveur annonce SORT (RFC 5256), un seul SORT (REVERSE ARRIVAL)
+        remplace le SEARCH: mêmes emails, déjà triés du plus récent au plus
+        ancien (ARRIVAL = INTERNALDATE). Sinon SEARCH classique.
+
+        Retourne (UID, triés_par_date): les UID restent valables après un
+        EXPUNGE, contrairement aux numéros de séquence.
         """
+        if 'SORT' in mailbox.client.capabilities:
+            try:
+                status, data = mailbox.client.uid('SORT', '(REVERSE ARRIVAL)', 'UTF-8', criteria)
+                if status == 'OK':
+                    return (data[0].split() if data[0] else []), True
+                logger.warning(f'SORT refusé ({status}), repli sur SEARCH')
+            except Exception as e:
+                logger.warning(f'SORT impossible ({e}), repli sur SEARCH')
+
+        status, messages = mailbox.client.uid('SEARCH', criteria)
+        if status != 'OK' or not messages[0]:
+            return [], False
+        return messages[0].split(), False
+
+    @staticmethod
+    def _mailbox_state(mailbox: ProtonMailBox) -> Optional[Tuple[bytes, int, int]]:
+        """(UIDVALIDITY, UIDNEXT, EXISTS) annoncés par le dernier SELECT, ou None."""
+        responses = mailbox.client.untagged_responses
         try:
-            res_flags, flags_data = mailbox.client.fetch(email_id, 'INTERNALDATE')
-            if res_flags == 'OK' and flags_data and flags_data[0]:
-                date_str = flags_data[0].decode('utf-8', errors='ignore')
-                match = re.search(r'INTERNALDATE "([^"]+)"', date_str)
-                if match:
-                    date_tuple = email.utils.parsedate_tz(match.group(1))
-                    if date_tuple:
-                        return datetime.fromtimestamp(email.utils.mktime_tz(date_tuple))
-        except Exception as e:
-            logger.debug(f'Erreur récupération date email: {e}')
-        return datetime.min
+            return (responses['UIDVALIDITY'][-1], int(responses['UIDNEXT'][-1]), int(responses['EXISTS'][-1]))
+        except (KeyError, IndexError, TypeError, ValueError):
+            return None
+
+    @staticmethod
+    def _status_state(counters: Dict[str, int]) -> Optional[Tuple[bytes, int, int]]:
+        """(UIDVALIDITY, UIDNEXT, MESSAGES) d'un STATUS, au format de _mailbox_state."""
+        try:
+            return str(counters['UIDVALIDITY']).encode(), counters['UIDNEXT'], counters['MESSAGES']
+        except KeyError:
+            return None
+
+    def _cached_dates(self, folder_name: str, state: Optional[Tuple[bytes, int, int]]) -> Dict[bytes, datetime]:
+        """INTERNALDATE encore valables pour ce dossier.
 
-    def sort_emails_by_date(self, mailbox: ProtonMailBox, email_ids: List[bytes], limit: int) -> List[bytes]:
-        """Trie les emails par date décroissante et retourne les limit plus récents."""
+        Un UID désigne le même message tant que UIDVALIDITY ne change pas:
+        les dates connues restent valables et seules les nouvelles arrivées
+        sont à lire.
+        """
+        with self._state_lock:
+            cached = self._date_cache.get(folder_name)
+        if state is None or cached is None:
+            return {}
+        (validity, _, _), dates = cached
+        if state[0] != validity:
+            return {}
+        return dates
+
+    def sort_emails_by_date(self, mailbox: ProtonMailBox, email_ids: List[bytes], limit: int,
+                            folder_name: Optional[str] = None,
+                            state: Optional[Tuple[bytes, int, int]] = None) -> List[bytes]:
+        """Trie les emails par date décroissante et retourne les limit plus récents.
+
+        Les INTERNALDATE sont récupérées par FETCH groupé et seuls les limit
+        plus récents sont extraits avec heapq (serveurs sans SORT). Avec
+        folder_name et l'état du SELECT, les dates lues aux cycles précédents
+        sont réutilisées: seuls les emails arrivés depuis sont FETCHés.
+        """
         if not email_ids or len(email_ids) <= limit:
             return email_ids
 
         logger.debug(f'Tri de {len(email_ids)} emails par date pour garder les {limit} plus récents...')
-        emails_with_dates = []
-        for email_id in email_ids:
-            date = self.get_email_date(mailbox, email_id)
-            emails_with_dates.append((email_id, date))
-
-        emails_with_dates.sort(key=lambda x: x[1], reverse=True)
-        recent_emails = [email_id for email_id, _ in emails_with_dates[:limit]]
-        logger.debug(f'{len(recent_emails)} emails les plus récents sélectionnés')
+        cached = self._cached_dates(folder_name, state) if folder_name else {}
+        # Seuls les emails encore présents sont gardés en cache
+        dates = {email_id: cached[email_id] for email_id in email_ids if email_id in cached}
+        missing = [email_id for email_id in email_ids if email_id not in dates]
+        for msg in bulk_fetch(mailbox.client, missing, '(INTERNALDATE)', FETCH_BULK, by_uid=True):
+            if msg.uid is not None:
+                dates[msg.uid] = msg.internaldate or datetime.min
+        if folder_name and state is not None:
+            with self._state_lock:
+                self._date_cache[folder_name] = (state, dates)
+
+        recent_emails = heapq.nlargest(limit, email_ids, key=lambda email_id: dates.get(email_id, datetime.min))
+        logger.debug(f'{len(recent_emails)} emails les plus récents sélectionnés '
+                     f'({len(missing)} dates lues sur le serveur)')
         return recent_emails
 
     # ============================================================================
@@ -321,15 +593,159 @@ class EmailProcessor:
     # Solution: Always SELECT the folder BEFORE executing any SEARCH command
     # ============================================================================
 
-    def process_folder(self, mailbox: ProtonMailBox, folder_name: str = 'INBOX') -> int:
+    @staticmethod
+    def _fast_prefilter(from_email: str) -> Optional[Tuple[str, float]]:
+        """Catégorie fixe si le domaine de l'expéditeur (ou un parent) est listé.
+
+        Évite l'appel au classifier (API) pour les expéditeurs connus.
+        """
+        if not (SPAM_DOMAINS or KEEP_DOMAINS):
+            return None
+        match = _SENDER_DOMAIN_RE.search(from_email)
+        if not match:
+            return None
+        labels = match.group(1).lower().rstrip('.').split('.')
+        for i in range(len(labels) - 1):
+            domain = '.'.join(labels[i:])
+            if domain in KEEP_DOMAINS:
+                return 'UNKNOWN', 1.0
+            if domain in SPAM_DOMAINS:
+                return 'SPAM', 1.0
+        return None
+
+    @staticmethod
+    def _message_digest(header: bytes, from_email: str, subject: str) -> Optional[str]:
+        """Empreinte d'un message indépendante du dossier et du numéro IMAP.
+
+        Message-ID si présent, sinon expéditeur + sujet + date; None si
+        aucun des deux n'est disponible.
+        """
+        match = _MESSAGE_ID_RE.search(header)
+        if match:
+            key = match.group(1)
+        else:
+            date = _DATE_HEADER_RE.search(header)
+            if not date:
+                return None
+            key = b'\0'.join((from_email.encode(), subject.encode(), date.group(1)))
+        return hashlib.sha1(key).hexdigest()[:16]
+
+    def _remember_classification(self, digest: str, category: str, confidence: float):
+        """Mémorise le résultat d'un message (au plus MAX_CLASSIFIED_CACHE, FIFO)."""
+        with self._state_lock:
+            self._classified[digest] = (category, confidence)
+            if len(self._classified) > MAX_CLASSIFIED_CACHE:
+                del self._classified[next(iter(self._classified))]
+            self._checkpoint_dirty = True
+
+    def _folder_unchanged(self, folder_name: str, counters: Dict[str, int]) -> bool:
+        """Vrai si un STATUS montre qu'il n'y a rien à chercher dans le dossier."""
+        if counters.get('MESSAGES') == 0:
+            return True
+        if UNSEEN_ONLY and counters.get('UNSEEN') == 0:
+            return True
+        # Compteurs incomplets: pas de signature, jamais considéré inchangé
+        signature = self._status_signature(counters)
+        if signature is None:
+            return False
+        with self._state_lock:
+            return self._folder_status.get(folder_name) == signature
+
+    def _remember_status(self, folder_name: str, counters: Optional[Dict[str, int]]) -> None:
+        """Mémorise la signature STATUS d'un dossier sans reste à traiter."""
+        signature = self._status_signature(counters) if counters is not None else None
+        if signature is not None:
+            with self._state_lock:
+                self._folder_status[folder_name] = signature
+
+    @staticmethod
+    def _status_signature(counters: Dict[str, int]) -> Optional[Tuple[int, int, int]]:
+        try:
+            return counters['UIDVALIDITY'], counters['UIDNEXT'], counters['MESSAGES']
+        except KeyError:
+            return None
+
+    def _uid_floor_start(self, folder_name: str, state: Optional[Tuple[bytes, int, int]]) -> Optional[int]:
+        """Premier UID non examiné si le dossier l'a déjà été entièrement (même UIDVALIDITY)."""
+        if not self.initial_scan_done or state is None:
+            return None
+        with self._state_lock:
+            floor = self._uid_floor.get(folder_name)
+        if floor is None or floor[0] != int(state[0]):
+            return None
+        return floor[1]
+
+    @staticmethod
+    def _drop_below_floor(email_ids: List[bytes], floor_uid: int) -> List[bytes]:
+        """Retire la réponse parasite d'un SEARCH 'UID n:*'.
+
+        '*' désigne le plus grand UID du dossier: s'il est inférieur à n, le
+        serveur renvoie quand même ce dernier message, déjà examiné.
+        """
+        return [email_id for email_id in email_ids if int(email_id) >= floor_uid]
+
+    @staticmethod
+    def _recent_uid_criteria(state: Optional[Tuple[bytes, int, int]], limit: int) -> Optional[str]:
+        """Critère 'UID n:*' sur les derniers UID d'un très grand dossier.
+
+        EXISTS et UIDNEXT viennent du SELECT: aucun aller-retour de plus.
+        Les UID croissent avec l'arrivée, les plus récents sont donc dans la
+        fenêtre; le tri par date et la limite s'appliquent ensuite.
+        """
+        if state is None or state[2] <= limit * HUGE_FOLDER_FACTOR:
+            return None
+        return f'UID {max(1, state[1] - limit * RECENT_UID_WINDOW_FACTOR)}:*'
+
+    def _check_uid_validity(self, folder_name: str, state: Optional[Tuple[bytes, int, int]]) -> None:
+        """Oublie les UID traités d'un dossier dont UIDVALIDITY a changé."""
+        if state is None:
+            return
+        validity = int(state[0])
+        with self._state_lock:
+            previous = self._uid_validity.get(folder_name)
+            if previous == validity:
+                return
+            if previous is not None:
+                logger.info(f'UIDVALIDITY de {folder_name} modifié, UID déjà traités oubliés')
+                self.processed_emails.pop(folder_name, None)
+                self._dirty_folders.add(folder_name)
+            self._uid_validity[folder_name] = validity
+            self._checkpoint_dirty = True
+
+    def _record_uid_floor(self, folder_name: str, state: Optional[Tuple[bytes, int, int]]) -> None:
+        """Mémorise UIDNEXT du SELECT: tout UID inférieur a été examiné."""
+        if state is None:
+            return
+        floor = (int(state[0]), state[1])
+        with self._state_lock:
+            if self._uid_floor.get(folder_name) != floor:
+                self._uid_floor[folder_name] = floor
+                self._checkpoint_dirty = True
+
+    def process_folder(self, mailbox: ProtonMailBox, folder_name: str = 'INBOX',
+                       counters: Optional[Dict[str, int]] = None) -> int:
         """Traite les emails d'un dossier spécifique.
         
         Récupère, parse, classifie et déplace les emails.
         Scoring pour Executive Summary.
         Respecte le checkpoint pour éviter les retraitements.
+        counters: réponse STATUS déjà obtenue pour ce dossier, le cas échéant.
         """
         processed_count = 0
+        # Faux dès qu'un email reste à retraiter au prochain cycle
+        complete = True
         try:
+            # ========== STATUS: dossier vide ou inchangé, pas de SELECT ==========
+            if counters is None and self.initial_scan_done:
+                counters = folder_status(mailbox.client, folder_name)
+            if counters is not None and self._folder_unchanged(folder_name, counters):
+                logger.debug(f'{folder_name} inchangé depuis le dernier passage, skip')
+                if folder_name == 'INBOX':
+                    # Pas de SELECT: l'état comparé avant IDLE vient du STATUS
+                    with self._state_lock:
+                        self._inbox_state = self._status_state(counters)
+                return 0
+
             # ========== FIX v1.2.2 ==========
             # CRITICAL: SELECT folder BEFORE executing any SEARCH/FETCH commands
             # This prevents "command SEARCH illegal in state AUTH" error
@@ -339,7 +755,15 @@ class EmailProcessor:
                 status, _ = mailbox.client.select(f'"{folder_name}"', readonly=False)
                 if status != 'OK':
                     logger.error(f'Impossible de sélectionner le dossier {folder_name}: status={status}')
+                    # Dossier supprimé ou renommé: LIST complet au prochain cycle
+                    with self._state_lock:
+                        self._folder_list = None
                     return 0
+                mailbox_state = self._mailbox_state(mailbox)
+                self._check_uid_validity(folder_name, mailbox_state)
+                if folder_name == 'INBOX':
+                    with self._state_lock:
+                        self._inbox_state = mailbox_state
             except Exception as e:
                 logger.error(f'Impossible de sélectionner le dossier {folder_name}: {e}')
                 return 0
@@ -358,115 +782,490 @@ class EmailProcessor:
                 criteria = 'UNSEEN' if UNSEEN_ONLY else 'ALL'
                 logger.info(f'Premier scan de {folder_name}, recherche {criteria}')
 
-            # ========== SEARCH with proper STATE ==========
-            status, messages = mailbox.client.search(None, criteria)
-            if status != 'OK' or not messages[0]:
-                logger.debug(f'Aucun email à traiter dans {folder_name}.')
-                if self.initial_scan_done:
-                    pass
-                return 0
-
-            email_ids = messages[0].split()
-            total_emails = len(email_ids)
-
             # Limiter selon le type de dossier
-            folder_lower = folder_name.lower()
-            if any(x in folder_lower for x in ['spam', 'trash', 'corbeille']):
+            if _SPAM_TRASH_RE.search(folder_name):
                 limit = SPAM_TRASH_LIMIT
                 logger.info(f'Dossier Spam/Trash détecté, limitation {limit} emails les plus récents')
             else:
                 limit = MAX_EMAILS_PER_FOLDER
 
+            # Seuls les UID attribués depuis le dernier passage complet: le
+            # serveur répond depuis son index, sans parcourir tout le dossier
+            floor_uid = self._uid_floor_start(folder_name, mailbox_state)
+            floor = f'UID {floor_uid}:*' if floor_uid is not None else None
+            if floor is None:
+                # Très grand dossier pas encore examiné: seuls les derniers UID
+                floor = self._recent_uid_criteria(mailbox_state, limit)
+                if floor is not None:
+                    logger.info(f'{mailbox_state[2]} emails dans {folder_name}, recherche limitée à {floor}, '
+                                f'les plus anciens ne sont pas examinés')
+            # Fenêtre des derniers UID: les UID antérieurs n'ont pas été vus,
+            # pas de plancher qui les exclurait définitivement
+            windowed = floor_uid is None and floor is not None
+            if floor is not None:
+                criteria = f'{criteria} {floor}'
+
+            # ========== SEARCH with proper STATE ==========
+            if floor_uid is not None and mailbox_state[1] <= floor_uid:
+                # Aucun UID attribué depuis: pas de SEARCH
+                email_ids, sorted_by_date = [], False
+            else:
+                email_ids, sorted_by_date = self.search_emails(mailbox, criteria)
+                if floor_uid is not None:
+                    email_ids = self._drop_below_floor(email_ids, floor_uid)
+            if not email_ids:
+                logger.debug(f'Aucun email à traiter dans {folder_name}.')
+                self._remember_status(folder_name, counters)
+                if not windowed:
+                    self._record_uid_floor(folder_name, mailbox_state)
+                return 0
+
+            total_emails = len(email_ids)
+
             if total_emails > limit:
                 logger.warning(f'{total_emails} emails trouvés dans {folder_name}, tri par date pour garder les {limit} plus récents')
-                email_ids = self.sort_emails_by_date(mailbox, email_ids, limit)
+                # Les plus anciens restent à examiner: pas de plancher UID
+                complete = False
+                if sorted_by_date:
+                    email_ids = email_ids[:limit]
+                else:
+                    email_ids = self.sort_emails_by_date(mailbox, email_ids, limit, folder_name, mailbox_state)
 
             logger.info(f'{len(email_ids)} emails trouvés dans {folder_name} sur {total_emails} total')
 
-            for email_id in email_ids:
+            # ========== CHECKPOINT: Skip déjà traités (avant tout FETCH) ==========
+            with self._state_lock:
+                seen = self.processed_emails.setdefault(folder_name, set())
+            pending_ids = [email_id for email_id in email_ids if int(email_id) not in seen]
+            if len(pending_ids) < len(email_ids):
+                logger.debug(f'{len(email_ids) - len(pending_ids)} emails déjà traités, skip')
+
+            moves: List[Tuple[bytes, str]] = []
+            use_move = 'MOVE' in mailbox.client.capabilities
+            # Un seul horodatage par dossier pour les messages importants
+            folder_now_iso = datetime.now().isoformat()
+            category_counts: Counter = Counter()
+            dry_run_moves = 0
+
+            # ========== FETCH groupé: en-têtes + début du corps, un aller-retour par lot ==========
+            # BODY.PEEK ne positionne pas \Seen. UID FETCH: chaque réponse porte
+            # son UID. FLAGS jamais: rien ne les utilise (préservés par PEEK)
+            parts = f'(BODY.PEEK[HEADER] BODY.PEEK[TEXT]<0.{PARTIAL_BODY_BYTES}>)'
+            # Appels au classifier (API) lancés dès le parsing, par lots de
+            # CLASSIFY_BATCH_SIZE emails (une requête par lot) en parallèle dans
+            # le pool partagé; la suite (relecture, déplacements) reste séquentielle
+            pool = self._classify_pool if self.classifier.use_lumo else None
+            parsed = []
+            batch: List[Tuple[str, str, str]] = []
+            batch_futures = []
+            fetched_ids: Set[bytes] = set()
+            for fetched in bulk_fetch(mailbox.client, pending_ids, parts, FETCH_BULK, by_uid=True):
                 if not self.running:
+                    complete = False
                     break
 
-                email_uid = email_id.decode()
-                email_key = f'{folder_name}:{email_uid}'
-
-                # ========== CHECKPOINT: Skip déjà traités ==========
-                if email_key in self.processed_emails:
-                    logger.debug(f'Email {email_uid} déjà traité, skip')
+                email_id = fetched.uid
+                if email_id is None:
+                    logger.error(f'Réponse FETCH sans UID pour le message {fetched.msg_id.decode()}')
+                    complete = False
                     continue
+                fetched_ids.add(email_id)
+                email_uid = email_id.decode()
 
                 try:
-                    # ========== FETCH with proper STATE ==========
-                    res_flags, flags_data = mailbox.client.fetch(email_id, 'FLAGS')
-                    was_seen = b'\\Seen' in flags_data[0] if res_flags == 'OK' and flags_data[0] else False
-
-                    res, msg_data = mailbox.client.fetch(email_id, 'RFC822')
-                    if res != 'OK':
+                    header = fetched.sections.get(b'BODY[HEADER]')
+                    if header is None:
                         logger.error(f'Erreur fetch email ID {email_uid}')
+                        complete = False
                         continue
+                    text = fetched.sections.get(b'BODY[TEXT]<0>', b'')
+                    truncated = len(text) >= PARTIAL_BODY_BYTES
+
+                    subject, from_email, body = self.parser.parse(header + text, max_chars=PARTIAL_BODY_BYTES)
+                    subject = subject or '[Sans objet]'
+
+                    # Classification: pré-filtre par domaine, puis résultat déjà
+                    # connu pour ce message, sinon classifier
+                    known = self._fast_prefilter(from_email)
+                    digest = None
+                    if known is None:
+                        digest = self._message_digest(header, from_email, subject)
+                        if digest:
+                            with self._state_lock:
+                                known = self._classified.get(digest)
+                    # (numéro du lot, position dans le lot) pour retrouver le résultat
+                    job = None
+                    if known is None and pool is not None:
+                        job = (len(batch_futures), len(batch))
+                        batch.append((email_uid, subject, body))
+                        if len(batch) >= CLASSIFY_BATCH_SIZE:
+                            batch_futures.append(pool.submit(self.classifier.classify_batch, batch))
+                            batch = []
+                    parsed.append((email_id, email_uid, subject, from_email, body, truncated, digest, known, job))
+                except Exception as e:
+                    logger.error(f'Erreur traitement email {email_uid}: {e}')
+                    complete = False
+
+            if batch:
+                batch_futures.append(pool.submit(self.classifier.classify_batch, batch))
+
+            # Lot FETCH refusé (bulk_fetch le saute): ces emails restent à
+            # chercher, ni plancher UID ni signature STATUS pour ce passage
+            unfetched = len(set(pending_ids) - fetched_ids)
+            if unfetched and complete:
+                logger.warning(f'{unfetched} emails non lus par FETCH dans {folder_name}, repris au prochain cycle')
+                complete = False
+
+            # Résultats du classifier (avec le corps utilisé) par email
+            results: Dict[bytes, Tuple[object, str]] = {}
+            refetch: Dict[bytes, Tuple[str, str]] = {}
+            for email_id, email_uid, subject, from_email, body, truncated, digest, known, job in parsed:
+                if known is not None:
+                    continue
+                try:
+                    if job is not None:
+                        result = batch_futures[job[0]].result()[job[1]]
+                    else:
+                        result = self.classifier.classify(email_uid, subject, body)
+                except Exception as e:
+                    logger.error(f'Erreur traitement email {email_uid}: {e}')
+                    complete = False
+                    continue
+                results[email_id] = (result, body)
+                if result.category == 'UNKNOWN' and truncated:
+                    refetch[email_id] = (email_uid, subject)
+
+            # Début du corps insuffisant: relecture des messages complets en
+            # un FETCH groupé plutôt qu'un aller-retour par email
+            if refetch and self.running:
+                retries = []
+                for full in bulk_fetch(mailbox.client, list(refetch), '(BODY.PEEK[])', FETCH_BULK, by_uid=True):
+                    if full.raw is None or full.uid not in refetch:
+                        continue
+                    email_uid, subject = refetch[full.uid]
+                    _, _, body = self.parser.parse(full.raw, max_chars=PARTIAL_BODY_BYTES)
+                    retries.append((full.uid, email_uid, subject, body))
+                try:
+                    reclassified = self.classifier.classify_batch([(uid, subject, body) for _, uid, subject, body in retries])
+                except Exception as e:
+                    logger.error(f'Erreur reclassification {folder_name}: {e}')
+                    reclassified = []
+                for (email_id, _, _, body), result in zip(retries, reclassified):
+                    results[email_id] = (result, body)
 
-                    raw_email = msg_data[0][1]
-                    email_obj = self.parser.parse(raw_email)
-                    from_email = email_obj.get('from', 'unknown')
-                    subject = email_obj.get('subject', '[Sans objet]')
-                    body = email_obj.get('body', '')
-
-                    # Classification
-                    result = self.classifier.classify(email_uid, subject, body)
-                    category = result.category
-                    confidence = result.confidence
-                    logger.info(f'Email {subject[:30]}... - {category} ({confidence:.2f}%)')
+            for email_id, email_uid, subject, from_email, body, truncated, digest, known, _ in parsed:
+                if not self.running:
+                    complete = False
+                    break
 
-                    # Scoring pour Executive Summary
-                    if category != 'UNKNOWN':
-                        self.score_and_track_message(email_uid, from_email, subject, body, category, confidence)
+                try:
+                    if known is not None:
+                        category, confidence = known
+                    else:
+                        if email_id not in results:
+                            continue
+                        result, body = results[email_id]
+                        category = result.category
+                        confidence = result.confidence
+                        if digest:
+                            self._remember_classification(digest, category, confidence)
+                    category_counts[category] += 1
+                    # Arguments formatés par loguru uniquement si TRACE est actif
+                    logger.trace('Email {}... - {} ({:.2f}%)', subject[:30], category, confidence)
+
+                    # Scoring pour Executive Summary (un message retrouvé par son empreinte l'a déjà été)
+                    if category != 'UNKNOWN' and not (digest and known):
+                        self.score_and_track_message(email_uid, from_email, subject, body, category, confidence,
+                                                     detected_at=folder_now_iso)
 
                     # Déplacement
                     target_folder = self.get_target_folder(category)
                     if not target_folder or category == 'UNKNOWN':
-                        logger.debug('Pas de déplacement - Catégorie UNKNOWN ou pas de dossier cible')
-                        self.processed_emails.add(email_key)
+                        logger.trace('Pas de déplacement - Catégorie UNKNOWN ou pas de dossier cible')
+                        with self._state_lock:
+                            seen.add(int(email_id))
+                            self._dirty_folders.add(folder_name)
+                            self._checkpoint_dirty = True
                         continue
 
                     if not self.ensure_folder_exists(mailbox, target_folder):
                         logger.error(f'Impossible de créer le dossier {target_folder}, email non déplacé')
+                        complete = False
                         continue
 
                     if not DRY_RUN:
-                        try:
-                            res, data = mailbox.client.copy(email_id, f'"{target_folder}"')
-                            if res == 'OK':
-                                logger.debug(f'Tentative COPY email {email_uid} vers {target_folder}')
-                                mailbox.client.store(email_id, '+FLAGS', '\\Deleted')
-                                logger.success(f'Déplacé vers {target_folder}')
-                                processed_count += 1
-                            else:
-                                logger.error(f'Echec COPY vers {target_folder}: {res} - {data}')
-                        except Exception as copy_error:
-                            logger.error(f'Exception lors de COPY vers {target_folder}: {copy_error}')
+                        moves.append((email_id, target_folder))
                     else:
-                        logger.info(f'DRY-RUN: Serait déplacé vers {target_folder}')
+                        dry_run_moves += 1
+                        logger.trace('DRY-RUN: Serait déplacé vers {}', target_folder)
 
                     # ========== CHECKPOINT: Marquer comme traité ==========
-                    self.processed_emails.add(email_key)
+                    with self._state_lock:
+                        seen.add(int(email_id))
+                        self._dirty_folders.add(folder_name)
+                        self._checkpoint_dirty = True
 
                 except Exception as e:
                     logger.error(f'Erreur traitement email {email_uid}: {e}')
+                    complete = False
                     continue
 
+            if category_counts:
+                logger.info(f'{folder_name}: {sum(category_counts.values())} emails classés {dict(category_counts)}')
+                if DRY_RUN:
+                    logger.info(f'DRY-RUN: {dry_run_moves} emails seraient déplacés depuis {folder_name}')
+
+            # ========== MOVE (ou COPY/STORE) en pipeline pour tout le dossier ==========
+            needs_expunge = False
+            if moves:
+                processed_count, needs_expunge = self.move_emails(mailbox, moves, use_move)
+
             # ========== EXPUNGE after FOLDER SELECTION ==========
-            if not DRY_RUN and processed_count > 0:
+            # Inutile si tout est parti par MOVE (déjà retiré du dossier)
+            if not DRY_RUN and needs_expunge:
                 logger.info(f'Purge de {processed_count} emails déplacés de {folder_name}...')
                 mailbox.client.expunge()
                 logger.success(f'Purge terminée pour {folder_name}.')
 
-            self.last_check[folder_name] = datetime.now().isoformat()
+            with self._state_lock:
+                if folder_name not in self.last_check:
+                    self._checkpoint_dirty = True
+                self.last_check[folder_name] = folder_now_iso
+
+            # Après un EXPUNGE les compteurs ont changé: mémorisés au passage suivant
+            if complete and processed_count == 0:
+                self._remember_status(folder_name, counters)
+            if complete and not windowed:
+                self._record_uid_floor(folder_name, mailbox_state)
 
+        except (imaplib.IMAP4.abort, OSError):
+            # Connexion coupée: inutile d'enchaîner les dossiers suivants sur
+            # une socket morte, l'appelant reconnecte tout de suite
+            raise
         except Exception as e:
             logger.error(f'Erreur critique traitement dossier {folder_name}: {e}')
 
         return processed_count
 
+    def _process_folder_isolated(self, folder_name: str, counters: Optional[Dict[str, int]] = None) -> int:
+        """Traite un dossier sur sa propre connexion IMAP.
+
+        Une session imaplib n'est pas thread-safe: chaque worker emprunte
+        une connexion au pool et la rend une fois le dossier traité.
+        """
+        mailbox = self._acquire_worker_mailbox()
+        try:
+            processed = self.process_folder(mailbox, folder_name, counters)
+        except BaseException:
+            self._drop_mailbox(mailbox)
+            raise
+        self._worker_mailboxes.put(mailbox)
+        return processed
+
+    def _acquire_worker_mailbox(self) -> ProtonMailBox:
+        """Emprunte une connexion du pool encore vivante (NOOP), sinon en ouvre une."""
+        while True:
+            try:
+                mailbox = self._worker_mailboxes.get_nowait()
+            except queue.Empty:
+                return self.connect_mailbox()
+            try:
+                typ, _ = mailbox.client.noop()
+                if typ == 'OK':
+                    return mailbox
+            except Exception as e:
+                logger.debug(f'Connexion worker inutilisable ({e}), reconnexion')
+            self._drop_mailbox(mailbox)
+
+    def close_worker_mailboxes(self) -> None:
+        """Ferme toutes les connexions inactives du pool."""
+        while True:
+            try:
+                self._drop_mailbox(self._worker_mailboxes.get_nowait())
+            except queue.Empty:
+                return
+
+    def process_folders(self, mailbox: ProtonMailBox, folder_names: List[str]) -> int:
+        """Traite les dossiers en parallèle (au plus MAX_WORKERS connexions).
+
+        Avec un seul worker, la connexion principale est réutilisée.
+        """
+        statuses: Dict[str, Optional[Dict[str, int]]] = {}
+        if self.initial_scan_done and len(folder_names) > 1:
+            # STATUS de tous les dossiers en pipeline (un aller-retour par lot):
+            # les dossiers inchangés n'occupent ni worker ni connexion
+            statuses = mailbox.folder_statuses(folder_names)
+            changed = [name for name in folder_names
+                       if statuses[name] is None or not self._folder_unchanged(name, statuses[name])]
+            if len(changed) < len(folder_names):
+                logger.debug(f'{len(folder_names) - len(changed)} dossiers inchangés depuis le dernier passage, skip')
+            folder_names = changed
+
+        workers = min(MAX_WORKERS, len(folder_names))
+        if workers <= 1:
+            return sum(self.process_folder(mailbox, name, statuses.get(name)) for name in folder_names)
+
+        total = 0
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='folder') as executor:
+            futures = {executor.submit(self._process_folder_isolated, name, statuses.get(name)): name
+                       for name in folder_names}
+            for future in as_completed(futures):
+                try:
+                    total += future.result()
+                except Exception as e:
+                    logger.error(f'Erreur worker dossier {futures[future]}: {e}')
+        return total
+
+    def move_emails(self, mailbox: ProtonMailBox, moves: List[Tuple[bytes, str]],
+                    use_move: bool = False) -> Tuple[int, bool]:
+        """Déplace des emails par UID (UID COPY puis UID STORE \\Deleted) avec deux pipelines.
+
+        Les emails sont regroupés par dossier cible: un COPY par dossier (par
+        lots de FETCH_BULK identifiants) au lieu d'un par email. Tous les COPY
+        partent d'un coup, puis les STORE uniquement pour les lots copiés:
+        2 allers-retours au total, sans jamais marquer supprimé un email dont
+        la copie a échoué. Un lot refusé est retenté email par email.
+
+        Avec use_move (serveur MOVE, RFC 6851), un UID MOVE par lot remplace
+        COPY + STORE + EXPUNGE; les lots refusés passent par COPY/STORE. Les
+        UID ne bougent pas quand un MOVE ou un EXPUNGE renumérote le dossier.
+
+        Retourne (emails déplacés, EXPUNGE nécessaire).
+        """
+        by_target: Dict[str, List[bytes]] = {}
+        for email_id, target_folder in moves:
+            by_target.setdefault(target_folder, []).append(email_id)
+        batches = [
+            (target_folder, b','.join(chunk))
+            for target_folder, email_ids in by_target.items()
+            for chunk in chunked(email_ids, FETCH_BULK)
+        ]
+
+        def command(name: str, *args) -> Tuple:
+            return ('UID', name) + args
+
+        moved_count = 0
+        if use_move:
+            try:
+                move_results = mailbox.pipeline([
+                    command('MOVE', message_set, f'"{target_folder}"') for target_folder, message_set in batches
+                ])
+            except imaplib.IMAP4.abort:
+                raise
+            except imaplib.IMAP4.error as move_error:
+                logger.error(f'Exception lors des MOVE groupés: {move_error}')
+                return 0, False
+            remaining = []
+            for (target_folder, message_set), (res, data) in zip(batches, move_results):
+                count = message_set.count(b',') + 1
+                if res == 'OK':
+                    logger.success(f'{count} email(s) déplacé(s) vers {target_folder}')
+                    moved_count += count
+                else:
+                    logger.warning(f'Echec MOVE de {count} email(s) vers {target_folder}: {res} - {data}, '
+                                   f'repli sur COPY/STORE')
+                    remaining.append((target_folder, message_set))
+            batches = remaining
+            if not batches:
+                return moved_count, False
+
+        try:
+            copy_results = mailbox.pipeline([
+                command('COPY', message_set, f'"{target_folder}"') for target_folder, message_set in batches
+            ])
+        except imaplib.IMAP4.abort:
+            raise
+        except imaplib.IMAP4.error as copy_error:
+            logger.error(f'Exception lors des COPY groupés: {copy_error}')
+            return moved_count, False
+
+        copied = []
+        retries = []
+        for (target_folder, message_set), (res, data) in zip(batches, copy_results):
+            count = message_set.count(b',') + 1
+            if res == 'OK':
+                logger.success(f'{count} email(s) déplacé(s) vers {target_folder}')
+                copied.append(message_set)
+                moved_count += count
+            elif count > 1:
+                # Un seul email refusé fait échouer tout le lot: on retente
+                # email par email, toujours en un seul pipeline
+                logger.warning(f'Echec COPY de {count} email(s) vers {target_folder}: {res} - {data}, '
+                               f'nouvel essai email par email')
+                retries.extend((target_folder, email_id) for email_id in message_set.split(b','))
+            else:
+                logger.error(f'Echec COPY de {count} email(s) vers {target_folder}: {res} - {data}')
+
+        if retries:
+            try:
+                retry_results = mailbox.pipeline([
+                    command('COPY', email_id, f'"{target_folder}"') for target_folder, email_id in retries
+                ])
+            except imaplib.IMAP4.abort:
+                raise
+            except imaplib.IMAP4.error as copy_error:
+                logger.error(f'Exception lors des COPY individuels: {copy_error}')
+                retry_results = []
+            recovered = []
+            for (target_folder, email_id), (res, data) in zip(retries, retry_results):
+                if res == 'OK':
+                    recovered.append(email_id)
+                else:
+                    logger.error(f'Echec COPY email {email_id.decode()} vers {target_folder}: {res} - {data}')
+            copied.extend(b','.join(chunk) for chunk in chunked(recovered, FETCH_BULK))
+            moved_count += len(recovered)
+
+        if copied:
+            store_results = mailbox.pipeline([
+                command('STORE', message_set, '+FLAGS.SILENT', '(\\Deleted)') for message_set in copied
+            ])
+            for message_set, (res, data) in zip(copied, store_results):
+                if res != 'OK':
+                    logger.error(f'Echec STORE \\Deleted emails {message_set.decode()}: {res} - {data}')
+        return moved_count, bool(copied)
+
+    def list_folders(self, mailbox: ProtonMailBox) -> List[str]:
+        """Liste les dossiers à traiter (hors dossiers système et d'apprentissage).
+
+        Le résultat est réutilisé pendant FOLDER_LIST_TTL secondes: pas de LIST
+        de toute l'arborescence à chaque cycle.
+        """
+        now = time.monotonic()
+        with self._state_lock:
+            if self._folder_list is not None and now - self._folder_list_time < FOLDER_LIST_TTL:
+                return self._folder_list
+
+        status, folders = mailbox.client.list()
+        folder_names: List[str] = []
+
+        if status == 'OK':
+            listed = list(iter_list_response(folders))
+            mailbox.existing_folders.update(listed)
+            with self._state_lock:
+                self._known_folders = set(listed)
+            for folder_name in listed:
+                # Cas courant: une seule recherche pour un dossier à scanner
+                if not _EXCLUDED_FOLDER_RE.search(folder_name):
+                    folder_names.append(folder_name)
+                    continue
+
+                # ============================================================================
+                # FIX v1.2.3: IMAP FOLDER EXCLUSIONS
+                # Skip special system folders that cause SEARCH errors
+                # ============================================================================
+                if _SKIP_FOLDERS_RE.search(folder_name):
+                    logger.debug(f'⊘ Skip special IMAP folder: {folder_name}')
+                # Skip Training/Feedback folders (used for learning)
+                elif folder_name.startswith(_LEARNING_PREFIXES):
+                    logger.debug(f'Skip dossier Training/Feedback: {folder_name}')
+                # Skip folders with backslashes (malformed IMAP)
+                else:
+                    logger.warning(f'⊘ Skip malformed IMAP folder (backslashes): {folder_name}')
+            with self._state_lock:
+                self._folder_list = folder_names
+                self._folder_list_time = now
+        return folder_names
+
     def run(self):
         """Boucle principale du service avec Executive Summary scheduling.
         
@@ -474,100 +1273,152 @@ class EmailProcessor:
         - Mode incrémental après le scan initial (économise les tokens)
         - Filtre les dossiers IMAP spéciaux
         """
+        # Vérifiés une seule fois, dans le thread principal: connect_mailbox()
+        # sert aussi aux workers, où sys.exit() n'arrêterait que le thread
+        if not PROTON_USERNAME or not PROTON_PASSWORD:
+            logger.error('Identifiants manquants. Vérifiez votre fichier .env')
+            sys.exit(1)
         logger.info('Démarrage de la boucle de traitement...')
 
+        mailbox: Optional[ProtonMailBox] = None
+        inbox_only = False
         while self.running:
             try:
-                with self.connect_mailbox() as mailbox:
-                    if SUMMARY_ENABLED and self.reporter is None:
-                        self.reporter = SummaryEmailReporter(imap_connection=mailbox)
-                        logger.info('Reporter Executive Summary initialisé')
-
-                    # Récupérer tous les dossiers
-                    status, folders = mailbox.client.list()
-                    total_processed = 0
-                    folders_scanned = 0
-
-                    if status == 'OK':
-                        for folder_bytes in folders:
-                            try:
-                                folder_raw = folder_bytes.decode('utf-8')
-                            except UnicodeDecodeError:
-                                folder_raw = folder_bytes.decode('latin-1')
-
-                            # Parser le nom du dossier
-                            parts = folder_raw.split('"')
-                            if len(parts) < 3:
-                                logger.warning(f'Format de dossier inattendu: {folder_raw}')
-                                continue
-                            folder_name = parts[-2]
-
-                            # ============================================================================
-                            # FIX v1.2.3: IMAP FOLDER EXCLUSIONS
-                            # Skip special system folders that cause SEARCH errors
-                            # ============================================================================
-                            should_skip = False
-                            
-                            # Check against skip patterns
-                            for skip_pattern in SKIP_FOLDERS:
-                                if skip_pattern in folder_name:
-                                    logger.debug(f'⊘ Skip special IMAP folder: {folder_name}')
-                                    should_skip = True
-                                    break
-                            
-                            # Skip folders with backslashes (malformed IMAP)
-                            if '\\\\' in folder_name:
-                                logger.warning(f'⊘ Skip malformed IMAP folder (backslashes): {folder_name}')
-                                should_skip = True
-                            
-                            if should_skip:
-                                continue
-
-                            # Skip Training/Feedback folders (used for learning)
-                            if folder_name.startswith('Training') or folder_name.startswith('Feedback'):
-                                logger.debug(f'Skip dossier Training/Feedback: {folder_name}')
-                                continue
-
-                            logger.debug(f'Scan du dossier {folder_name}')
-                            count = self.process_folder(mailbox, folder_name)
-                            total_processed += count
-                            folders_scanned += 1
-
-                    # Executive Summary
-                    if SUMMARY_ENABLED and self.detector and self.reporter:
-                        self.check_and_send_summary(mailbox)
-
-                    # ========== SAVE CHECKPOINT AFTER EACH CYCLE ==========
-                    self.save_checkpoint()
-
-                    if total_processed > 0:
-                        logger.info(f'Cycle terminé. {total_processed} emails traités sur {folders_scanned} dossiers scannés.')
-                    else:
-                        logger.debug(f'Cycle terminé. Aucun email traité sur {folders_scanned} dossiers scannés.')
+                # Connexion conservée entre les cycles: STARTTLS + LOGIN
+                # seulement au démarrage et après une coupure
+                if mailbox is None:
+                    mailbox = self.connect_mailbox()
+                    if SUMMARY_ENABLED:
+                        if self.reporter is None:
+                            self.reporter = SummaryEmailReporter(imap_connection=mailbox)
+                            logger.info('Reporter Executive Summary initialisé')
+                        else:
+                            self.reporter.imap = mailbox
+                else:
+                    typ, _ = mailbox.client.noop()
+                    if typ != 'OK':
+                        raise imaplib.IMAP4.abort(f'NOOP {typ}')
+
+                # Réveil IDLE sur INBOX: les autres dossiers attendent le
+                # prochain cycle complet (POLL_INTERVAL)
+                if inbox_only:
+                    folder_names = ['INBOX']
+                else:
+                    folder_names = self.list_folders(mailbox)
+
+                with self._state_lock:
+                    self._failed_folders.clear()
+                total_processed = self.process_folders(mailbox, folder_names)
+                if not inbox_only:
+                    self._last_full_scan = time.monotonic()
+                folders_scanned = len(folder_names)
+
+                # Executive Summary
+                if SUMMARY_ENABLED and self.detector and self.reporter:
+                    self.check_and_send_summary(mailbox)
+
+                # ========== MARK INITIAL SCAN COMPLETE ==========
+                first_scan = not self.initial_scan_done
+                if first_scan:
+                    self.initial_scan_done = True
+                    self._checkpoint_dirty = True
+
+                # ========== SAVE CHECKPOINT AFTER EACH CYCLE ==========
+                self.save_checkpoint()
+
+                if total_processed > 0:
+                    logger.info(f'Cycle terminé. {total_processed} emails traités sur {folders_scanned} dossiers scannés.')
+                else:
+                    logger.debug(f'Cycle terminé. Aucun email traité sur {folders_scanned} dossiers scannés.')
 
-                    # ========== MARK INITIAL SCAN COMPLETE ==========
-                    if not self.initial_scan_done:
-                        self.initial_scan_done = True
-                        self.save_checkpoint()
-                        logger.success('✓ Scan initial terminé. Le système se concentrera désormais sur les nouveaux emails.')
-                        logger.info('ℹ️  Mode économie de tokens activé: seuls les emails UNSEEN seront traités')
+                if first_scan:
+                    logger.success('✓ Scan initial terminé. Le système se concentrera désormais sur les nouveaux emails.')
+                    logger.info('ℹ️  Mode économie de tokens activé: seuls les emails UNSEEN seront traités')
 
+            except (imaplib.IMAP4.abort, OSError) as e:
+                logger.warning(f'Connexion IMAP perdue ({e}), reconnexion au prochain cycle')
+                mailbox = self._drop_mailbox(mailbox)
+                self.close_worker_mailboxes()
+                self.save_checkpoint()
+                inbox_only = False
+                time.sleep(10)
+                continue
             except Exception as e:
                 logger.error(f'Erreur dans la boucle principale: {e}')
                 self.save_checkpoint()
                 time.sleep(10)
 
-            time.sleep(POLL_INTERVAL)
-
+            try:
+                inbox_only = self.initial_scan_done and self.wait_for_new_mail(mailbox)
+            except Exception as e:
+                logger.warning(f'Attente interrompue ({e}), reconnexion au prochain cycle')
+                mailbox = self._drop_mailbox(mailbox)
+                inbox_only = False
+
+        self._drop_mailbox(mailbox)
+        self.close_worker_mailboxes()
+        self._classify_pool.shutdown(wait=False, cancel_futures=True)
+        # Sauvegarde reportée éventuelle, puis fin des écritures en cours
+        self.save_checkpoint(wait=True)
+        self._checkpoint_writer.shutdown(wait=True)
+        if self.detector:
+            # Vide la file des messages importants avant de quitter
+            self._important_queue.put(None)
+            self._important_writer.join()
         logger.info('Arrêt du processeur.')
 
-    def score_and_track_message(self, email_uid: str, from_email: str, subject: str, body: str, category: str, confidence: float) -> None:
-        """Score le message pour l'Executive Summary et le sauvegarde."""
+    def wait_for_new_mail(self, mailbox: Optional[ProtonMailBox]) -> bool:
+        """Attend le prochain cycle complet (POLL_INTERVAL secondes après la fin du précédent).
+
+        Si le serveur supporte IDLE (RFC 2177), l'attente se fait en IDLE sur
+        INBOX et se termine dès qu'un nouveau message y arrive. Sinon la
+        connexion reste ouverte et un NOOP la vérifie au cycle suivant.
+
+        Retourne True si l'attente a été interrompue par un nouveau message
+        dans INBOX (seul INBOX est alors à retraiter).
+        """
+        timeout = self._last_full_scan + POLL_INTERVAL - time.monotonic()
+        if timeout <= 0:
+            return False
+        if mailbox is None or 'IDLE' not in mailbox.client.capabilities:
+            time.sleep(timeout)
+            return False
+
+        status, _ = mailbox.client.select('"INBOX"', readonly=True)
+        if status != 'OK':
+            time.sleep(timeout)
+            return False
+        # Arrivés pendant le traitement: IDLE ne signale que les suivants
+        with self._state_lock:
+            last = self._inbox_state
+        state = self._mailbox_state(mailbox)
+        if state and last and state[0] == last[0] and state[1] > last[1]:
+            logger.debug('Nouveaux emails dans INBOX depuis son dernier traitement')
+            return True
+        if idle_wait(mailbox.client, min(timeout, IDLE_MAX_SECONDS)):
+            logger.debug('IDLE: nouveaux emails signalés par le serveur')
+            return True
+        return False
+
+    @staticmethod
+    def _drop_mailbox(mailbox: Optional[ProtonMailBox]) -> None:
+        """Ferme une connexion (éventuellement déjà morte) et retourne None."""
+        if mailbox is not None:
+            mailbox.close()
+        return None
+
+    def score_and_track_message(self, email_uid: str, from_email: str, subject: str, body: str, category: str, confidence: float,
+                                detected_at: Optional[str] = None) -> None:
+        """Score le message pour l'Executive Summary et le sauvegarde.
+
+        detected_at: horodatage ISO partagé par tout un dossier (calculé
+        une seule fois par process_folder); à défaut, l'heure courante.
+        """
         if not self.detector:
             return
         try:
             score, breakdown, action_type = self.detector.score_message(
-                email_uid, from_email, subject, body, category, confidence
+                email_uid, from_email, subject, body, category, confidence, min_score=SUMMARY_MIN_SCORE
             )
             if score >= SUMMARY_MIN_SCORE:
                 msg = ImportantMessage(
@@ -576,17 +1427,52 @@ class EmailProcessor:
                     subject=subject[:100],
                     score=score,
                     category=category,
-                    criteria=breakdown,
+                    criteria_breakdown=breakdown,
                     action_type=action_type,
                     status='new',
-                    detected_at=datetime.now().isoformat(),
+                    detected_at=detected_at or datetime.now().isoformat(),
                     category_confidence=confidence
                 )
-                self.detector.save_important_message(msg)
+                self._important_queue.put(msg)
                 logger.debug(f'Message important détecté - {subject[:30]}... score {score}')
         except Exception as e:
             logger.error(f'Erreur scoring message: {e}')
 
+    def _write_important_messages(self) -> None:
+        """Thread d'écriture: regroupe les messages importants en file.
+
+        Attend un premier message puis accumule jusqu'à IMPORTANT_WRITE_BATCH
+        messages ou IMPORTANT_WRITE_INTERVAL secondes, et les écrit en une
+        seule fois. None dans la file termine le thread après écriture.
+        """
+        stop = False
+        while not stop:
+            item = self._important_queue.get()
+            batch = []
+            deadline = time.monotonic() + IMPORTANT_WRITE_INTERVAL
+            while True:
+                if item is None:
+                    stop = True
+                else:
+                    batch.append(item)
+                if stop or len(batch) >= IMPORTANT_WRITE_BATCH:
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._important_queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+
+            try:
+                self.detector.save_important_messages(batch)
+            except Exception as e:
+                logger.error(f'Erreur sauvegarde messages importants: {e}')
+            finally:
+                for _ in range(len(batch) + stop):
+                    self._important_queue.task_done()
+
     def check_and_send_summary(self, mailbox: ProtonMailBox) -> None:
         """Vérifie si c'est l'heure d'envoyer un résumé et l'envoie si nécessaire."""
         if not self.detector or not self.reporter:
@@ -595,6 +1481,8 @@ class EmailProcessor:
             current_hour = datetime.now().hour
             if current_hour in SUMMARY_HOURS and current_hour != self.last_summary_hour:
                 logger.info(f'Heure du rapport Executive Summary: {current_hour}:00 CET')
+                # Attendre que les messages en file soient écrits
+                self._important_queue.join()
                 messages = self.detector.load_important_messages()
                 if messages:
                     summary = self.detector.generate_executive_summary(messages)
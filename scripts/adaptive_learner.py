@@ -6,6 +6,7 @@
 
 import os
 import json
+import hashlib
 from pathlib import Path
 from typing import Dict, List, Tuple, Optional
 from datetime import datetime, timedelta
@@ -76,12 +77,11 @@ class AdaptiveLearner:
                 logger.error(f"Erreur chargement signatures: {e}")
         return {}
 
-    def _save_corrections(self):
-        """Sauvegarde les corrections"""
+    def _append_correction(self, correction: Dict):
+        """Ajoute une correction en fin de fichier (JSONL: pas de réécriture de l'historique)"""
         try:
-            with open(self.corrections_file, 'w') as f:
-                for correction in self.corrections:
-                    f.write(json.dumps(correction, ensure_ascii=False) + '\n')
+            with open(self.corrections_file, 'a') as f:
+                f.write(json.dumps(correction, ensure_ascii=False) + '\n')
         except Exception as e:
             logger.error(f"Erreur sauvegarde corrections: {e}")
 
@@ -103,7 +103,6 @@ class AdaptiveLearner:
 
     def _create_email_signature(self, subject: str, sender: str, body_preview: str) -> str:
         """Crée une signature unique pour un email"""
-        import hashlib
         content = f"{subject}|{sender}|{body_preview[:200]}"
         return hashlib.md5(content.encode()).hexdigest()
 
@@ -196,7 +195,7 @@ class AdaptiveLearner:
         }
         
         self.corrections.append(correction)
-        self._save_corrections()
+        self._append_correction(correction)
         
         # Extraire et apprendre les patterns
         self._extract_patterns(correction)
@@ -317,11 +316,13 @@ class AdaptiveLearner:
         """
         Prédit la catégorie basée sur les règles apprises (avant Perplexity).
         Retourne (category, confidence) ou None.
+        Appelée pour chaque email: journal au niveau TRACE, formaté par loguru
+        seulement si ce niveau est actif.
         """
         # 1. Règle par expéditeur exact (confiance haute)
         if sender in self.learned_patterns['sender_rules']:
             category = self.learned_patterns['sender_rules'][sender]
-            logger.info(f"🎯 Règle apprise (expéditeur): {sender} → {category}")
+            logger.trace("🎯 Règle apprise (expéditeur): {} → {}", sender, category)
             return (category, 0.95)
         
         # 2. Règle par domaine (confiance moyenne-haute)
@@ -329,14 +330,14 @@ class AdaptiveLearner:
             domain = '@' + sender.split('@')[1]
             if domain in self.learned_patterns['domain_rules']:
                 category = self.learned_patterns['domain_rules'][domain]
-                logger.info(f"🎯 Règle apprise (domaine): {domain} → {category}")
+                logger.trace("🎯 Règle apprise (domaine): {} → {}", domain, category)
                 return (category, 0.85)
         
         # 3. Mots-clés dans le sujet (confiance moyenne)
         subject_lower = subject.lower()
         for keyword, category in self.learned_patterns['subject_keywords'].items():
             if keyword in subject_lower:
-                logger.info(f"🎯 Règle apprise (mot-clé): '{keyword}' → {category}")
+                logger.trace("🎯 Règle apprise (mot-clé): '{}' → {}", keyword, category)
                 return (category, 0.75)
         
         return None
@@ -6,14 +6,17 @@
 
 import os
 import json
+import hashlib
 import subprocess
 import requests
+from collections import OrderedDict, deque
 from typing import Dict, List, Tuple, Optional
 from dataclasses import dataclass, asdict
 from datetime import datetime
 from pathlib import Path
 import pickle
 import re
+import threading
 
 from loguru import logger
 from pydantic import BaseModel, Field
@@ -124,6 +127,48 @@ DEFAULT_CATEGORIES = {
     ),
 }
 
+# Parties invariantes du prompt Perplexity, construites une seule fois
+# (UNIQUEMENT les catégories de DEFAULT_CATEGORIES, pas celles auto-ajoutées)
+_VALID_CATEGORIES = frozenset(DEFAULT_CATEGORIES)
+_CATEGORY_NAMES = ', '.join(DEFAULT_CATEGORIES)
+_CATEGORIES_DESC = "\n".join(
+    f"- {name}: {cat.description} (Keywords: {', '.join(cat.keywords[:5])})"
+    for name, cat in DEFAULT_CATEGORIES.items()
+)
+_SYSTEM_PROMPT = (
+    f"You are an email classification assistant. You MUST choose from these categories ONLY: {_CATEGORY_NAMES}. "
+    f"Never create new categories. Output only valid JSON."
+)
+_PROMPT_RULES = (
+    f"IMPORTANT RULES:\n"
+    f"1. You MUST return ONLY one of these category names: {_CATEGORY_NAMES}\n"
+    f"2. Do NOT create new categories\n"
+    f"3. If the email doesn't clearly fit any category, return 'SPAM' with low confidence\n\n"
+    f"Return ONLY a JSON object with this exact format:\n"
+    f'{{"category": "CATEGORY_NAME", "confidence": 0.9, "explanation": "brief reason"}}'
+)
+_BATCH_PROMPT_RULES = (
+    f"IMPORTANT RULES:\n"
+    f"1. You MUST return ONLY one of these category names: {_CATEGORY_NAMES}\n"
+    f"2. Do NOT create new categories\n"
+    f"3. If an email doesn't clearly fit any category, return 'SPAM' with low confidence\n\n"
+    f"Return ONLY a JSON array with one object per email, in order:\n"
+    f'[{{"email_index": 0, "category": "CATEGORY_NAME", "confidence": 0.9, "explanation": "brief reason"}}]'
+)
+PERPLEXITY_URL = "https://api.perplexity.ai/chat/completions"
+# Emails classés par une même requête Perplexity (classify_batch)
+if os.getenv("PROTON_LUMO_ENABLE_BATCH", "true").lower() == "true":
+    CLASSIFY_BATCH_SIZE = max(int(os.getenv("PROTON_LUMO_BATCH_SIZE", 10)), 1)
+else:
+    CLASSIFY_BATCH_SIZE = 1
+# Résultats Lumo gardés en mémoire par contenu (sujet + début du corps):
+# une newsletter reçue en plusieurs exemplaires n'est envoyée qu'une fois
+MAX_RESULT_CACHE = int(os.getenv("PROTON_LUMO_MAX_RESULT_CACHE", 10000))
+_RESULT_CACHE_BODY_CHARS = 2048
+# Derniers résultats gardés par le classifier (processus démon, alimenté
+# par les workers de dossiers): la liste ne grossit plus sans fin
+CLASSIFICATION_HISTORY_MAX = 1000
+
 
 class EmailClassifier:
     """Système de classification intelligent avec Lumo"""
@@ -149,10 +194,24 @@ class EmailClassifier:
         self.use_lumo = use_lumo or bool(os.getenv("PERPLEXITY_API_KEY"))
         self.categories = self._load_categories()
         self.training_examples = self._load_training_examples()
-        self.classification_history = []
+        # deque.append est atomique: pas de verrou entre les threads workers
+        self.classification_history: "deque[ClassificationResult]" = deque(maxlen=CLASSIFICATION_HISTORY_MAX)
+        # Une session HTTP par thread (workers de dossiers): connexion TLS
+        # à l'API conservée entre les emails au lieu d'une par requête
+        self._http = threading.local()
+        # Empreinte du contenu -> (catégorie, confiance, explication), ordre LRU
+        self._result_cache: "OrderedDict[bytes, Tuple[str, float, str]]" = OrderedDict()
+        self._result_cache_lock = threading.Lock()
         
         logger.info(f"Classifier initialisé (Lumo: {self.use_lumo})")
 
+    def _http_session(self) -> requests.Session:
+        """Session HTTP (keep-alive) du thread courant"""
+        session = getattr(self._http, "session", None)
+        if session is None:
+            session = self._http.session = requests.Session()
+        return session
+
     def _check_lumo_available(self) -> bool:
         """Vérifie si Lumo CLI est disponible"""
         try:
@@ -173,7 +232,7 @@ class EmailClassifier:
             try:
                 with open(categories_file) as f:
                     data = json.load(f)
-                    return {k: EmailCategory(**v) for k, v in data.items()}
+                    return {k: EmailCategory.model_validate(v) for k, v in data.items()}
             except Exception as e:
                 logger.error(f"Erreur chargement catégories : {e}")
         
@@ -185,7 +244,7 @@ class EmailClassifier:
         """Sauvegarde les catégories"""
         categories_file = self.config_dir / "categories.json"
         with open(categories_file, "w") as f:
-            json.dump({k: v.dict() for k, v in categories.items()}, f, indent=2, ensure_ascii=False)
+            json.dump({k: v.model_dump() for k, v in categories.items()}, f, indent=2, ensure_ascii=False)
 
     def _load_training_examples(self) -> List[TrainingExample]:
         """Charge les exemples d'entraînement"""
@@ -198,7 +257,7 @@ class EmailClassifier:
                     for line in f:
                         if line.strip():
                             data = json.loads(line)
-                            examples.append(TrainingExample(**data))
+                            examples.append(TrainingExample.model_validate(data))
             except Exception as e:
                 logger.error(f"Erreur chargement exemples : {e}")
         
@@ -221,55 +280,17 @@ class EmailClassifier:
             return None, 0.0, ""
 
         try:
-            # Récupérer UNIQUEMENT les catégories de DEFAULT_CATEGORIES (pas celles auto-ajoutées)
-            valid_categories = list(DEFAULT_CATEGORIES.keys())
-            categories_desc = "\n".join([
-                f"- {cat}: {DEFAULT_CATEGORIES[cat].description} (Keywords: {', '.join(DEFAULT_CATEGORIES[cat].keywords[:5])})"
-                for cat in valid_categories
-            ])
-            
             # Prompt amélioré avec descriptions détaillées
             prompt = (
                 f"You MUST classify this email into EXACTLY ONE of these predefined categories:\n"
-                f"{categories_desc}\n\n"
+                f"{_CATEGORIES_DESC}\n\n"
                 f"Email Subject: {subject}\n"
                 f"Email Body: {body[:1000]}\n\n"
-                f"IMPORTANT RULES:\n"
-                f"1. You MUST return ONLY one of these category names: {', '.join(valid_categories)}\n"
-                f"2. Do NOT create new categories\n"
-                f"3. If the email doesn't clearly fit any category, return 'SPAM' with low confidence\n\n"
-                f"Return ONLY a JSON object with this exact format:\n"
-                f'{{"category": "CATEGORY_NAME", "confidence": 0.9, "explanation": "brief reason"}}'
+                f"{_PROMPT_RULES}"
             )
 
-            # Appel API Perplexity
-            headers = {
-                "Authorization": f"Bearer {api_key}",
-                "Content-Type": "application/json"
-            }
-            data = {
-                "model": "sonar-pro",
-                "messages": [
-                    {
-                        "role": "system", 
-                        "content": f"You are an email classification assistant. You MUST choose from these categories ONLY: {', '.join(valid_categories)}. Never create new categories. Output only valid JSON."
-                    },
-                    {"role": "user", "content": prompt}
-                ]
-            }
-            
-            response = requests.post("https://api.perplexity.ai/chat/completions", headers=headers, json=data, timeout=10)
-            
-            if response.status_code == 200:
-                result_json = response.json()
-                content = result_json["choices"][0]["message"]["content"]
-                
-                # Nettoyage du Markdown json ```json ... ``` si présent
-                if "```json" in content:
-                    content = content.split("```json")[1].split("```")[0].strip()
-                elif "```" in content:
-                    content = content.split("```")[1].split("```")[0].strip()
-
+            content = self._ask_perplexity(api_key, prompt, timeout=10)
+            if content is not None:
                 output = json.loads(content)
                 
                 category = output.get("category", "SPAM").upper()
@@ -277,20 +298,88 @@ class EmailClassifier:
                 explanation = output.get("explanation", "")
                 
                 # ✅ VALIDATION STRICTE : Vérifier que la catégorie retournée est valide
-                if category not in valid_categories:
+                if category not in _VALID_CATEGORIES:
                     logger.warning(f"⚠️  Catégorie invalide '{category}' renvoyée par Perplexity, fallback sur mots-clés")
                     return None, 0.0, f"Invalid category: {category}"
                 
-                logger.info(f"✓ Perplexity: {category} ({confidence:.2f})")
+                logger.trace("✓ Perplexity: {} ({:.2f})", category, confidence)
                 return category, confidence, explanation
-            else:
-                logger.error(f"Erreur API Perplexity: {response.status_code} - {response.text}")
                 
         except Exception as e:
             logger.error(f"Erreur appel Perplexity: {e}")
         
         return None, 0.0, ""
 
+    def classify_with_lumo_batch(self, emails: List[Tuple[str, str]]) -> List[Tuple[Optional[str], float, str]]:
+        """
+        Classification de plusieurs emails (sujet, corps) en une requête Perplexity
+
+        Returns:
+            Un (category, confidence, explanation) par email, dans l'ordre;
+            (None, 0.0, "") pour un email absent ou invalide dans la réponse
+        """
+        outputs: List[Tuple[Optional[str], float, str]] = [(None, 0.0, "")] * len(emails)
+        api_key = os.getenv("PERPLEXITY_API_KEY")
+        if not api_key:
+            logger.warning("Clé API Perplexity manquante. Configurez PERPLEXITY_API_KEY dans .env")
+            return outputs
+
+        try:
+            emails_text = "\n\n".join(
+                f"Email {idx}:\nSubject: {subject}\nBody: {body[:1000]}"
+                for idx, (subject, body) in enumerate(emails)
+            )
+            prompt = (
+                f"You MUST classify each of these {len(emails)} emails into EXACTLY ONE of these predefined categories:\n"
+                f"{_CATEGORIES_DESC}\n\n"
+                f"{emails_text}\n\n"
+                f"{_BATCH_PROMPT_RULES}"
+            )
+            content = self._ask_perplexity(api_key, prompt, timeout=30)
+            if content is None:
+                return outputs
+
+            for item in json.loads(content):
+                idx = item.get("email_index")
+                if not isinstance(idx, int) or not 0 <= idx < len(emails):
+                    continue
+                category = item.get("category", "SPAM").upper()
+                if category not in _VALID_CATEGORIES:
+                    logger.warning(f"⚠️  Catégorie invalide '{category}' renvoyée par Perplexity, fallback sur mots-clés")
+                    continue
+                outputs[idx] = (category, float(item.get("confidence", 0.0)), item.get("explanation", ""))
+        except Exception as e:
+            logger.error(f"Erreur appel Perplexity (lot): {e}")
+
+        return outputs
+
+    def _ask_perplexity(self, api_key: str, prompt: str, timeout: float) -> Optional[str]:
+        """Envoie le prompt à Perplexity et retourne le contenu JSON de la réponse (None si erreur HTTP)"""
+        headers = {
+            "Authorization": f"Bearer {api_key}",
+            "Content-Type": "application/json"
+        }
+        data = {
+            "model": "sonar-pro",
+            "messages": [
+                {"role": "system", "content": _SYSTEM_PROMPT},
+                {"role": "user", "content": prompt}
+            ]
+        }
+
+        response = self._http_session().post(PERPLEXITY_URL, headers=headers, json=data, timeout=timeout)
+        if response.status_code != 200:
+            logger.error(f"Erreur API Perplexity: {response.status_code} - {response.text}")
+            return None
+
+        content = response.json()["choices"][0]["message"]["content"]
+        # Nettoyage du Markdown json ```json ... ``` si présent
+        if "```json" in content:
+            content = content.split("```json")[1].split("```")[0].strip()
+        elif "```" in content:
+            content = content.split("```")[1].split("```")[0].strip()
+        return content
+
     def classify_with_keywords(self, subject: str, body: str) -> Tuple[str, float, str]:
         """
         Classification par mots-clés (fallback)
@@ -326,19 +415,90 @@ class EmailClassifier:
         2. Fallback sur mots-clés
         3. Fallback sur UNKNOWN
         """
-        logger.info(f"Classification de l'email: {email_id} - {subject[:50]}")
+        logger.trace("Classification de l'email: {} - {}", email_id, subject[:50])
+        cached = self._cached_result(email_id, subject, body)
+        if cached is not None:
+            return cached
         
         category = None
         confidence = 0.0
         explanation = ""
-        method = "fallback"
         
         # Étape 1 : Lumo
         if self.use_lumo:
             category, confidence, explanation = self.classify_with_lumo(subject, body)
-            if category and confidence >= 0.5:
-                method = "lumo"
-                logger.info(f"✓ Lumo: {category} ({confidence:.2f})")
+
+        return self._finish_classification(email_id, subject, body, category, confidence, explanation)
+
+    def classify_batch(self, emails: List[Tuple[str, str, str]]) -> List[ClassificationResult]:
+        """
+        Classifie plusieurs emails (email_id, sujet, corps), dans l'ordre
+
+        Même stratégie que classify, mais une seule requête Lumo par lot de
+        CLASSIFY_BATCH_SIZE emails au lieu d'une par email.
+        """
+        results: List[Optional[ClassificationResult]] = [None] * len(emails)
+        misses = []
+        for idx, (email_id, subject, body) in enumerate(emails):
+            logger.trace("Classification de l'email: {} - {}", email_id, subject[:50])
+            results[idx] = self._cached_result(email_id, subject, body)
+            if results[idx] is None:
+                misses.append(idx)
+
+        for start in range(0, len(misses), CLASSIFY_BATCH_SIZE):
+            chunk = misses[start:start + CLASSIFY_BATCH_SIZE]
+            if not self.use_lumo:
+                lumo = [(None, 0.0, "")] * len(chunk)
+            elif len(chunk) == 1:
+                lumo = [self.classify_with_lumo(emails[chunk[0]][1], emails[chunk[0]][2])]
+            else:
+                lumo = self.classify_with_lumo_batch([emails[idx][1:] for idx in chunk])
+            for idx, (category, confidence, explanation) in zip(chunk, lumo):
+                email_id, subject, body = emails[idx]
+                results[idx] = self._finish_classification(email_id, subject, body, category, confidence, explanation)
+        return results
+
+    @staticmethod
+    def _content_key(subject: str, body: str) -> bytes:
+        content = f"{subject}\0{body[:_RESULT_CACHE_BODY_CHARS]}"
+        return hashlib.blake2b(content.encode("utf-8", "surrogatepass"), digest_size=16).digest()
+
+    def _cached_result(self, email_id: str, subject: str, body: str) -> Optional[ClassificationResult]:
+        """Résultat Lumo déjà obtenu pour le même contenu, sans appel API"""
+        if not self.use_lumo:
+            return None
+        key = self._content_key(subject, body)
+        with self._result_cache_lock:
+            cached = self._result_cache.get(key)
+            if cached is None:
+                return None
+            self._result_cache.move_to_end(key)
+        category, confidence, explanation = cached
+        result = ClassificationResult(
+            email_id=email_id,
+            subject=subject,
+            category=category,
+            confidence=confidence,
+            method="cache",
+            timestamp=datetime.now().isoformat(),
+            explanation=explanation
+        )
+        self.classification_history.append(result)
+        return result
+
+    def _finish_classification(self, email_id: str, subject: str, body: str, category: Optional[str],
+                               confidence: float, explanation: str) -> ClassificationResult:
+        """Étapes 2 et 3 de classify à partir du résultat Lumo (category None si absent)"""
+        method = "fallback"
+        if category and confidence >= 0.5:
+            method = "lumo"
+            logger.trace("✓ Lumo: {} ({:.2f})", category, confidence)
+            # Seuls les résultats Lumo sont mémorisés: les mots-clés ne coûtent
+            # rien et un échec API doit pouvoir être retenté
+            with self._result_cache_lock:
+                self._result_cache[self._content_key(subject, body)] = (category, confidence, explanation)
+                if len(self._result_cache) > MAX_RESULT_CACHE:
+                    self._result_cache.popitem(last=False)
         
         # Étape 2 : Mots-clés (si Lumo échoue ou est incertain)
         if not category or confidence < 0.5:
@@ -11,19 +11,26 @@
 # - Métriques de coûts et performances
 # ============================================================================
 
+import atexit
 import os
+import io
 import json
 import hashlib
+import re
+import string
+import sys
+import threading
 import time
 import requests
-from typing import Dict, List, Tuple, Optional
-from dataclasses import dataclass
+from typing import Dict, List, NamedTuple, Tuple, Optional
 from datetime import datetime
 from pathlib import Path
 from collections import deque, defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
 
 from loguru import logger
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field
 
 # --- CONFIGURATION LOGGING ---
 LOG_DIR = Path(os.getenv("PROTON_LUMO_LOGS", "~/ProtonLumoAI/logs")).expanduser()
@@ -43,6 +50,8 @@ class EmailCategory(BaseModel):
 
 class ClassificationResult(BaseModel):
     """Résultat de classification d'un email"""
+    model_config = ConfigDict(frozen=True)
+
     email_id: str
     subject: str
     category: str
@@ -53,13 +62,43 @@ class ClassificationResult(BaseModel):
     from_address: str = ""
 
 
+class FastResult(NamedTuple):
+    """
+    Résultat léger renvoyé par classify_batch (pas de validation Pydantic)
+
+    Immuable et sans __dict__, avec les mêmes champs que ClassificationResult;
+    to_pydantic() convertit pour les appelants qui ont besoin du modèle validé.
+    """
+    email_id: str
+    subject: str
+    category: str
+    confidence: float
+    method: str
+    timestamp: str
+    explanation: str = ""
+    from_address: str = ""
+
+    def to_pydantic(self) -> ClassificationResult:
+        """Convertit en ClassificationResult validé"""
+        return ClassificationResult(
+            email_id=self.email_id,
+            subject=self.subject,
+            category=self.category,
+            confidence=self.confidence,
+            method=self.method,
+            timestamp=self.timestamp,
+            explanation=self.explanation,
+            from_address=self.from_address
+        )
+
+
 class CachedPattern(BaseModel):
     """Pattern en cache pour classification rapide"""
     email_hash: str
     category: str
     confidence: float
     hit_count: int = 1
-    last_used: str
+    last_used: float  # epoch (time.time()), converti en ISO uniquement sur disque
     from_domain: str = ""
 
 
@@ -142,6 +181,107 @@ DEFAULT_CATEGORIES = {
 }
 
 
+# --- CLASSIFICATION PAR MOTS-CLÉS (PARALLÉLISABLE) ---
+# Au-delà de ce nombre d'emails, la phase mots-clés est répartie sur tous les cœurs
+PARALLEL_KEYWORD_THRESHOLD = 500
+
+_WORD_RE = re.compile(r"\w+")
+
+# Par catégorie: (mots simples, expressions, nombre total de mots-clés)
+# Les mots simples sont comparés aux tokens de l'email (intersection de frozensets),
+# les expressions ("click here", "%") restent en recherche de sous-chaîne.
+KeywordTable = Dict[str, Tuple[frozenset, Tuple[str, ...], int]]
+
+
+def _build_keyword_table(categories: Dict[str, EmailCategory]) -> KeywordTable:
+    """Sépare les mots-clés de chaque catégorie en tokens simples et expressions"""
+    table = {}
+    for name, category in categories.items():
+        keywords = [kw.lower() for kw in category.keywords]
+        single = frozenset(kw for kw in keywords if _WORD_RE.fullmatch(kw))
+        phrases = tuple(kw for kw in keywords if kw not in single)
+        table[name] = (single, phrases, len(keywords))
+    return table
+
+
+_KEYWORD_TABLE: KeywordTable = _build_keyword_table(DEFAULT_CATEGORIES)
+
+# Table de mots-clés des processus workers (transmise une seule fois via initializer)
+_worker_keyword_table: KeywordTable = {}
+
+
+def _init_keyword_worker(keyword_table: KeywordTable):
+    """Initialise un processus worker avec la table de mots-clés"""
+    global _worker_keyword_table
+    _worker_keyword_table = keyword_table
+
+
+def _score_keywords(keyword_table: KeywordTable, subject: str, body: str) -> Tuple[str, float, str]:
+    """Score un email contre la table de mots-clés (fonction pure, picklable)"""
+    content = f"{subject} {body}".lower()
+    tokens = frozenset(_WORD_RE.findall(content))
+    scores = {}
+
+    for cat_name, (single, phrases, n_keywords) in keyword_table.items():
+        matches = len(single & tokens) + sum(1 for phrase in phrases if phrase in content)
+
+        if matches > 0:
+            confidence = min(0.95, (matches / max(n_keywords, 1)) * 0.85)
+            scores[cat_name] = (confidence, f"{matches} mot(s)-clé trouvé(s)")
+
+    if scores:
+        best_category = max(scores.items(), key=lambda x: x[1][0])
+        return best_category[0], best_category[1][0], best_category[1][1]
+
+    return "SPAM", 0.0, "Aucune correspondance"
+
+
+def _classify_chunk_kw(chunk: List[Tuple[str, str]]) -> List[Tuple[str, float, str]]:
+    """Classifie un lot de (sujet, corps) dans un processus worker"""
+    return [_score_keywords(_worker_keyword_table, subject, body) for subject, body in chunk]
+
+
+# --- PROMPT BATCH API ---
+# $count, $emails_text et $last_index sont les seules parties variables par batch
+BATCH_PROMPT_TEMPLATE = string.Template("""Classify these $count emails into categories:
+$categories_desc
+
+$emails_text
+
+Return ONLY a JSON array with this format:
+[
+  {"email_index": 0, "category": "CATEGORY_NAME", "confidence": 0.9, "explanation": "reason"},
+  ...
+]
+
+RULES:
+1. ONLY use these categories: $categories_list
+2. Return ALL emails in order (0 to $last_index)
+3. Output MUST be valid JSON array""")
+
+
+# Bloc de code Markdown (```json ... ```) parfois renvoyé autour du JSON
+_FENCE_RE = re.compile(r"```(?:json)?\s*(.*?)\s*```", re.DOTALL)
+
+
+# --- EXPORT SIEVE ---
+SIEVE_HEADER = "# ProtonLumoAI - Règles automatiques générées\n# Date: {date}\n"
+SIEVE_RULE_TEMPLATE = (
+    "\n# Règle pour {domain} -> {category} ({count} emails)\n"
+    'if header :contains "From" "{domain}" {{\n'
+    '    fileinto "{folder}";\n'
+    "    stop;\n"
+    "}}\n"
+)
+
+
+@lru_cache(maxsize=65536)
+def _email_hash(from_address: str, subject: str) -> str:
+    """Hash expéditeur (domaine) + sujet normalisé, mémoïsé pour les expéditeurs récurrents"""
+    domain = from_address.rpartition("@")[2]
+    return hashlib.md5(f"{domain}:{subject.lower()[:50]}".encode()).hexdigest()
+
+
 class RateLimiter:
     """Limite le taux d'appels API pour respecter les quotas"""
     
@@ -154,28 +294,32 @@ class RateLimiter:
         self.calls = deque()
         self.max_calls = max_calls
         self.period = period
+        # Partagé par les workers de dossiers: un seul thread à la fois
+        # consulte/attend le quota
+        self._lock = threading.Lock()
         logger.info(f"Rate limiter initialisé: {max_calls} appels/{period}s")
     
     def wait_if_needed(self):
         """Attend si la limite est atteinte"""
-        now = time.time()
-        
-        # Supprimer les appels anciens
-        while self.calls and self.calls[0] < now - self.period:
-            self.calls.popleft()
-        
-        # Vérifier la limite
-        if len(self.calls) >= self.max_calls:
-            sleep_time = self.period - (now - self.calls[0])
-            logger.warning(f"⏱️  Rate limit atteint, attente de {sleep_time:.1f}s")
-            time.sleep(sleep_time + 0.1)
-            
-            # Nettoyer après l'attente
+        with self._lock:
             now = time.time()
+
+            # Supprimer les appels anciens
             while self.calls and self.calls[0] < now - self.period:
                 self.calls.popleft()
-        
-        self.calls.append(now)
+
+            # Vérifier la limite
+            if len(self.calls) >= self.max_calls:
+                sleep_time = self.period - (now - self.calls[0])
+                logger.warning(f"⏱️  Rate limit atteint, attente de {sleep_time:.1f}s")
+                time.sleep(sleep_time + 0.1)
+
+                # Nettoyer après l'attente
+                now = time.time()
+                while self.calls and self.calls[0] < now - self.period:
+                    self.calls.popleft()
+
+            self.calls.append(now)
 
 
 class EmailClassifierOptimized:
@@ -205,6 +349,24 @@ class EmailClassifierOptimized:
         
         # Rate limiter: 50 appels/minute (conservateur)
         self.rate_limiter = RateLimiter(max_calls=50, period=60)
+
+        # Parties invariantes du prompt batch (calculées une seule fois)
+        self._valid_categories = list(DEFAULT_CATEGORIES.keys())
+        self._valid_cat_set = frozenset(self._valid_categories)
+        categories_list = ', '.join(self._valid_categories)
+        self._batch_prompt = string.Template(BATCH_PROMPT_TEMPLATE.safe_substitute(
+            categories_desc="\n".join(
+                f"- {cat}: {DEFAULT_CATEGORIES[cat].description}"
+                for cat in self._valid_categories
+            ),
+            categories_list=categories_list
+        ))
+        self._system_msg = f"Email classifier. Valid categories: {categories_list}. Output JSON only."
+        
+        # Pool de processus pour les très gros batches (créé à la demande)
+        self._pool: Optional[ProcessPoolExecutor] = None
+        # Cache, métriques et création du pool partagés entre les workers de dossiers
+        self._lock = threading.Lock()
         
         logger.info(f"✅ Classifier optimisé initialisé (API: {self.use_api}, Cache: {len(self.cache)} entrées)")
 
@@ -216,7 +378,7 @@ class EmailClassifierOptimized:
             try:
                 with open(categories_file) as f:
                     data = json.load(f)
-                    return {k: EmailCategory(**v) for k, v in data.items()}
+                    return {k: EmailCategory.model_validate(v) for k, v in data.items()}
             except Exception as e:
                 logger.error(f"Erreur chargement catégories : {e}")
         
@@ -227,7 +389,7 @@ class EmailClassifierOptimized:
         """Sauvegarde les catégories"""
         categories_file = self.config_dir / "categories.json"
         with open(categories_file, "w") as f:
-            json.dump({k: v.dict() for k, v in categories.items()}, f, indent=2, ensure_ascii=False)
+            json.dump({k: v.model_dump() for k, v in categories.items()}, f, indent=2, ensure_ascii=False)
 
     def _load_cache(self) -> Dict[str, CachedPattern]:
         """Charge le cache de patterns"""
@@ -237,7 +399,13 @@ class EmailClassifierOptimized:
             try:
                 with open(cache_file) as f:
                     data = json.load(f)
-                    return {k: CachedPattern(**v) for k, v in data.items()}
+                for v in data.values():
+                    if isinstance(v.get("last_used"), str):
+                        v["last_used"] = datetime.fromisoformat(v["last_used"]).timestamp()
+                    # Une seule copie de chaque catégorie/domaine pour tout le cache
+                    v["category"] = sys.intern(v["category"])
+                    v["from_domain"] = sys.intern(v.get("from_domain") or "")
+                return {k: CachedPattern.model_validate(v) for k, v in data.items()}
             except Exception as e:
                 logger.error(f"Erreur chargement cache : {e}")
         
@@ -246,8 +414,13 @@ class EmailClassifierOptimized:
     def _save_cache(self):
         """Sauvegarde le cache"""
         cache_file = self.cache_dir / "patterns_cache.json"
+        with self._lock:
+            data = {
+                k: {**v.model_dump(), "last_used": datetime.fromtimestamp(v.last_used).isoformat()}
+                for k, v in self.cache.items()
+            }
         with open(cache_file, "w") as f:
-            json.dump({k: v.dict() for k, v in self.cache.items()}, f, indent=2, ensure_ascii=False)
+            json.dump(data, f, indent=2, ensure_ascii=False)
 
     def _load_learned_patterns(self) -> Dict[str, Dict]:
         """Charge les patterns appris (expéditeurs fréquents, etc.)"""
@@ -264,15 +437,7 @@ class EmailClassifierOptimized:
 
     def _compute_email_hash(self, from_address: str, subject: str) -> str:
         """Calcule un hash unique pour un email (basé sur expéditeur + sujet normalisé)"""
-        # Extraire le domaine de l'expéditeur
-        domain = from_address.split("@")[-1] if "@" in from_address else from_address
-        
-        # Normaliser le sujet (retirer numéros, dates, etc.)
-        subject_normalized = subject.lower()
-        subject_normalized = subject_normalized[:50]  # Limiter la longueur
-        
-        hash_input = f"{domain}:{subject_normalized}"
-        return hashlib.md5(hash_input.encode()).hexdigest()
+        return _email_hash(from_address, subject)
 
     def should_use_api(self, email_hash: str, subject: str, body: str) -> bool:
         """
@@ -282,9 +447,12 @@ class EmailClassifierOptimized:
             True si l'API doit être appelée, False sinon
         """
         # Vérifier le cache
-        if email_hash in self.cache:
-            self.cache[email_hash].hit_count += 1
-            self.cache[email_hash].last_used = datetime.now().isoformat()
+        with self._lock:
+            pattern = self.cache.get(email_hash)
+            if pattern is not None:
+                pattern.hit_count += 1
+                pattern.last_used = time.time()
+        if pattern is not None:
             return False  # Utiliser le cache
         
         # Vérifier si les keywords donnent une confidence élevée
@@ -296,23 +464,39 @@ class EmailClassifierOptimized:
 
     def classify_with_keywords(self, subject: str, body: str) -> Tuple[str, float, str]:
         """Classification par mots-clés (fallback rapide et gratuit)"""
-        content = f"{subject} {body}".lower()
-        scores = {}
-        
-        for cat_name, category in DEFAULT_CATEGORIES.items():
-            matches = sum(1 for keyword in category.keywords if keyword.lower() in content)
-            
-            if matches > 0:
-                confidence = min(0.95, (matches / max(len(category.keywords), 1)) * 0.85)
-                scores[cat_name] = (confidence, f"{matches} mot(s)-clé trouvé(s)")
-        
-        if scores:
-            best_category = max(scores.items(), key=lambda x: x[1][0])
-            return best_category[0], best_category[1][0], best_category[1][1]
-        
-        return "SPAM", 0.0, "Aucune correspondance"
+        return _score_keywords(_KEYWORD_TABLE, subject, body)
+
+    def _classify_keywords_many(self, items: List[Tuple[str, str]]) -> List[Tuple[str, float, str]]:
+        """
+        Classification par mots-clés d'une liste de (sujet, corps)
+
+        Au-delà de PARALLEL_KEYWORD_THRESHOLD emails, le travail est découpé
+        en os.cpu_count() lots traités dans un pool de processus.
+        """
+        if len(items) <= PARALLEL_KEYWORD_THRESHOLD:
+            return [self.classify_with_keywords(subject, body) for subject, body in items]
+
+        workers = os.cpu_count() or 1
+        with self._lock:
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(
+                    max_workers=workers,
+                    initializer=_init_keyword_worker,
+                    initargs=(_KEYWORD_TABLE,)
+                )
+                # Processus arrêtés à la sortie si close() n'a pas été appelé
+                atexit.register(self.close)
+
+        chunk_size = -(-len(items) // workers)
+        chunks = [items[i:i + chunk_size] for i in range(0, len(items), chunk_size)]
+        logger.debug(f"Mots-clés en parallèle: {len(items)} emails sur {len(chunks)} processus")
+
+        results = []
+        for chunk_results in self._pool.map(_classify_chunk_kw, chunks):
+            results.extend(chunk_results)
+        return results
 
-    def classify_batch(self, emails: List[Dict]) -> List[ClassificationResult]:
+    def classify_batch(self, emails: List[Dict]) -> List[FastResult]:
         """
         Classifie plusieurs emails en un seul appel API (optimisation majeure)
         
@@ -320,63 +504,72 @@ class EmailClassifierOptimized:
             emails: Liste de dicts avec 'email_id', 'subject', 'body', 'from'
             
         Returns:
-            Liste de ClassificationResult
+            Liste de FastResult (attributs identiques à ClassificationResult,
+            voir FastResult.to_pydantic)
         """
         if not emails:
             return []
         
         results = []
         api_needed = []
+        timestamp = datetime.now().isoformat()
         
+        # Étape 0: Mots-clés pour tous les emails absents du cache (parallélisé si gros batch)
+        hashes = [self._compute_email_hash(email.get('from', ''), email['subject']) for email in emails]
+        with self._lock:
+            misses = [idx for idx, email_hash in enumerate(hashes) if email_hash not in self.cache]
+        keyword_results = dict(zip(misses, self._classify_keywords_many(
+            [(emails[idx]['subject'], emails[idx].get('body', '')) for idx in misses]
+        )))
+
         # Étape 1: Trier les emails (cache vs API)
-        for email in emails:
-            email_hash = self._compute_email_hash(email.get('from', ''), email['subject'])
-            
-            # Vérifier le cache
-            if email_hash in self.cache:
-                pattern = self.cache[email_hash]
-                pattern.hit_count += 1
-                pattern.last_used = datetime.now().isoformat()
-                
-                results.append(ClassificationResult(
-                    email_id=email['email_id'],
-                    subject=email['subject'],
-                    category=pattern.category,
-                    confidence=pattern.confidence,
-                    method="cached",
-                    timestamp=datetime.now().isoformat(),
-                    explanation=f"Cache hit #{pattern.hit_count}",
-                    from_address=email.get('from', '')
-                ))
-                self.metrics.cache_hits += 1
-                continue
-            
-            # Essayer keywords
-            category, confidence, explanation = self.classify_with_keywords(email['subject'], email.get('body', ''))
-            
-            if confidence >= 0.75:
-                results.append(ClassificationResult(
-                    email_id=email['email_id'],
-                    subject=email['subject'],
-                    category=category,
-                    confidence=confidence,
-                    method="keyword",
-                    timestamp=datetime.now().isoformat(),
-                    explanation=explanation,
-                    from_address=email.get('from', '')
-                ))
-                self.metrics.keyword_fallbacks += 1
-                
-                # Ajouter au cache pour accélérer les prochains
-                self.cache[email_hash] = CachedPattern(
-                    email_hash=email_hash,
-                    category=category,
-                    confidence=confidence,
-                    last_used=datetime.now().isoformat(),
-                    from_domain=email.get('from', '').split('@')[-1]
-                )
-            else:
-                api_needed.append((email, email_hash))
+        with self._lock:
+            for idx, (email, email_hash) in enumerate(zip(emails, hashes)):
+                # Vérifier le cache
+                if email_hash in self.cache:
+                    pattern = self.cache[email_hash]
+                    pattern.hit_count += 1
+                    pattern.last_used = time.time()
+
+                    results.append(FastResult(
+                        email_id=email['email_id'],
+                        subject=email['subject'],
+                        category=pattern.category,
+                        confidence=pattern.confidence,
+                        method="cached",
+                        timestamp=timestamp,
+                        explanation=f"Cache hit #{pattern.hit_count}",
+                        from_address=email.get('from', '')
+                    ))
+                    self.metrics.cache_hits += 1
+                    continue
+
+                # Essayer keywords
+                category, confidence, explanation = keyword_results[idx]
+
+                if confidence >= 0.75:
+                    results.append(FastResult(
+                        email_id=email['email_id'],
+                        subject=email['subject'],
+                        category=category,
+                        confidence=confidence,
+                        method="keyword",
+                        timestamp=timestamp,
+                        explanation=explanation,
+                        from_address=email.get('from', '')
+                    ))
+                    self.metrics.keyword_fallbacks += 1
+
+                    # Ajouter au cache pour accélérer les prochains
+                    self.cache[email_hash] = CachedPattern(
+                        email_hash=email_hash,
+                        category=category,
+                        confidence=confidence,
+                        last_used=time.time(),
+                        from_domain=sys.intern(email.get('from', '').split('@')[-1])
+                    )
+                else:
+                    api_needed.append((email, email_hash))
         
         # Étape 2: Batch API pour les emails restants (10-15 par batch)
         if api_needed and self.use_api:
@@ -385,12 +578,14 @@ class EmailClassifierOptimized:
                 batch = api_needed[i:i + batch_size]
                 batch_results = self._classify_batch_api(batch)
                 results.extend(batch_results)
-                self.metrics.batch_calls += 1
+                with self._lock:
+                    self.metrics.batch_calls += 1
         
-        self.metrics.total_classifications += len(emails)
+        with self._lock:
+            self.metrics.total_classifications += len(emails)
         return results
 
-    def _classify_batch_api(self, emails_with_hash: List[Tuple[Dict, str]]) -> List[ClassificationResult]:
+    def _classify_batch_api(self, emails_with_hash: List[Tuple[Dict, str]]) -> List[FastResult]:
         """Appelle l'API Perplexity pour un batch d'emails"""
         if not emails_with_hash:
             return []
@@ -404,33 +599,17 @@ class EmailClassifierOptimized:
         self.rate_limiter.wait_if_needed()
         
         try:
-            valid_categories = list(DEFAULT_CATEGORIES.keys())
-            categories_desc = "\n".join([
-                f"- {cat}: {DEFAULT_CATEGORIES[cat].description}"
-                for cat in valid_categories
-            ])
-            
-            # Construire le prompt batch
+            # Construire le prompt batch (seuls les emails changent d'un appel à l'autre)
             emails_text = "\n\n".join([
                 f"Email {idx}:\nSubject: {email['subject']}\nFrom: {email.get('from', 'unknown')}\nBody: {email.get('body', '')[:500]}"
                 for idx, (email, _) in enumerate(emails_with_hash)
             ])
             
-            prompt = f"""Classify these {len(emails_with_hash)} emails into categories:
-{categories_desc}
-
-{emails_text}
-
-Return ONLY a JSON array with this format:
-[
-  {{"email_index": 0, "category": "CATEGORY_NAME", "confidence": 0.9, "explanation": "reason"}},
-  ...
-]
-
-RULES:
-1. ONLY use these categories: {', '.join(valid_categories)}
-2. Return ALL emails in order (0 to {len(emails_with_hash)-1})
-3. Output MUST be valid JSON array"""
+            prompt = self._batch_prompt.substitute(
+                count=len(emails_with_hash),
+                emails_text=emails_text,
+                last_index=len(emails_with_hash) - 1
+            )
 
             headers = {
                 "Authorization": f"Bearer {api_key}",
@@ -440,7 +619,7 @@ RULES:
             data = {
                 "model": "sonar-pro",
                 "messages": [
-                    {"role": "system", "content": f"Email classifier. Valid categories: {', '.join(valid_categories)}. Output JSON only."},
+                    {"role": "system", "content": self._system_msg},
                     {"role": "user", "content": prompt}
                 ]
             }
@@ -449,40 +628,40 @@ RULES:
                                    headers=headers, json=data, timeout=30)
             
             if response.status_code == 200:
-                result_json = response.json()
-                content = result_json["choices"][0]["message"]["content"]
+                # Décodage direct des octets (pas de passage par response.text)
+                content = json.loads(response.content)["choices"][0]["message"]["content"]
                 
                 # Nettoyage Markdown
-                if "```json" in content:
-                    content = content.split("```json")[1].split("```")[0].strip()
-                elif "```" in content:
-                    content = content.split("```")[1].split("```")[0].strip()
+                fence = _FENCE_RE.search(content)
+                if fence:
+                    content = fence.group(1)
                 
                 classifications = json.loads(content)
                 
                 results = []
+                timestamp = datetime.now().isoformat()
                 for item in classifications:
                     idx = item.get("email_index", 0)
                     if idx >= len(emails_with_hash):
                         continue
                     
                     email, email_hash = emails_with_hash[idx]
-                    category = item.get("category", "SPAM").upper()
+                    category = sys.intern(item.get("category", "SPAM").upper())
                     confidence = float(item.get("confidence", 0.0))
                     explanation = item.get("explanation", "")
                     
                     # Validation catégorie
-                    if category not in valid_categories:
+                    if category not in self._valid_cat_set:
                         category = "SPAM"
                         confidence = 0.3
                     
-                    result = ClassificationResult(
+                    result = FastResult(
                         email_id=email['email_id'],
                         subject=email['subject'],
                         category=category,
                         confidence=confidence,
                         method="batch_api",
-                        timestamp=datetime.now().isoformat(),
+                        timestamp=timestamp,
                         explanation=explanation,
                         from_address=email.get('from', '')
                     )
@@ -490,17 +669,20 @@ RULES:
                     results.append(result)
                     
                     # Mettre en cache
-                    self.cache[email_hash] = CachedPattern(
+                    pattern = CachedPattern(
                         email_hash=email_hash,
                         category=category,
                         confidence=confidence,
-                        last_used=datetime.now().isoformat(),
-                        from_domain=email.get('from', '').split('@')[-1]
+                        last_used=time.time(),
+                        from_domain=sys.intern(email.get('from', '').split('@')[-1])
                     )
+                    with self._lock:
+                        self.cache[email_hash] = pattern
                 
-                self.metrics.api_calls += 1
-                # Coût estimé: $0.005 par appel batch (approximatif)
-                self.metrics.estimated_cost_usd += 0.005
+                with self._lock:
+                    self.metrics.api_calls += 1
+                    # Coût estimé: $0.005 par appel batch (approximatif)
+                    self.metrics.estimated_cost_usd += 0.005
                 
                 logger.info(f"✓ Batch API: {len(results)} emails classifiés")
                 return results
@@ -521,7 +703,7 @@ RULES:
             'from': from_address
         }])
         
-        return results[0] if results else ClassificationResult(
+        return results[0].to_pydantic() if results else ClassificationResult(
             email_id=email_id,
             subject=subject,
             category="SPAM",
@@ -552,31 +734,26 @@ RULES:
             if pattern.hit_count >= min_occurrences:
                 sender_categories[pattern.from_domain][pattern.category] += pattern.hit_count
         
-        # Générer les règles SIEVE
-        rules = []
-        rules.append("# ProtonLumoAI - Règles automatiques générées")
-        rules.append(f"# Date: {datetime.now().isoformat()}")
-        rules.append("")
+        # Générer les règles SIEVE dans un seul buffer
+        buf = io.StringIO()
+        buf.write(SIEVE_HEADER.format(date=datetime.now().isoformat()))
         
         for domain, categories in sender_categories.items():
             if not domain:
                 continue
             
             # Catégorie la plus fréquente pour ce domaine
-            best_category = max(categories.items(), key=lambda x: x[1])
-            category_name, count = best_category
+            category_name, count = max(categories.items(), key=lambda x: x[1])
             
             if count >= min_occurrences and category_name in self.categories:
-                folder = self.categories[category_name].folder
-                
-                rules.append(f"# Règle pour {domain} -> {category_name} ({count} emails)")
-                rules.append(f'if header :contains "From" "{domain}" {{')
-                rules.append(f'    fileinto "{folder}";')
-                rules.append(f'    stop;')
-                rules.append(f'}}')
-                rules.append("")
+                buf.write(SIEVE_RULE_TEMPLATE.format(
+                    domain=domain,
+                    category=category_name,
+                    count=count,
+                    folder=self.categories[category_name].folder
+                ))
         
-        sieve_rules = "\n".join(rules)
+        sieve_rules = buf.getvalue()
         
         # Sauvegarder
         filters_file = self.config_dir / "protonmail_filters.sieve"
@@ -588,7 +765,8 @@ RULES:
 
     def get_metrics(self) -> Dict:
         """Retourne les métriques d'utilisation"""
-        cache_size_mb = sum(len(str(p.dict())) for p in self.cache.values()) / 1024 / 1024
+        with self._lock:
+            cache_size_mb = sum(len(str(p.model_dump())) for p in self.cache.values()) / 1024 / 1024
         
         savings_pct = 0
         if self.metrics.total_classifications > 0:
@@ -607,6 +785,14 @@ RULES:
             "cost_savings_percent": round(savings_pct, 1)
         }
 
+    def close(self):
+        """Arrête le pool de processus des mots-clés, s'il a été créé."""
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            atexit.unregister(self.close)
+            pool.shutdown(wait=True, cancel_futures=True)
+
     def save_state(self):
         """Sauvegarde l'état (cache, métriques)"""
         self._save_cache()
@@ -4,30 +4,134 @@
 # Parser robuste pour les emails bruts
 # ============================================================================
 
+import re
+import base64
+import binascii
+import codecs
 import email
 from email.message import Message
 from email.header import decode_header
+from email.parser import BytesHeaderParser
 from typing import Optional, Tuple
 
 from loguru import logger
 
+# Fin du bloc d'en-têtes (première ligne vide)
+_HEADER_END_RE = re.compile(rb"\r?\n\r?\n")
+_HEADER_PARSER = BytesHeaderParser()
+# Au-delà, la structure est laissée au parser complet
+_MAX_MULTIPART_DEPTH = 5
+
 class EmailParser:
     """Classe dédiée au parsing robuste des emails bruts."""
 
-    def parse(self, raw_email: bytes) -> Tuple[str, str, str]:
-        """Parse un email brut et retourne le sujet, le corps et l'expéditeur."""
+    def parse(self, raw_email: bytes, max_chars: Optional[int] = None) -> Tuple[str, str, str]:
+        """Parse un email brut et retourne le sujet, le corps et l'expéditeur.
+
+        Si max_chars est fourni, seul le début du corps est décodé en texte
+        (au plus max_chars caractères) au lieu du corps complet.
+        """
         try:
-            msg = email.message_from_bytes(raw_email)
+            parsed = self._parse_fast(raw_email)
+            if parsed is not None:
+                msg, text_part = parsed
+                body = self._get_body(text_part, max_chars) if text_part is not None else ""
+            else:
+                msg = email.message_from_bytes(raw_email)
+                body = self._get_body(msg, max_chars)
             
             subject = self._decode_header(msg.get("Subject", ""))
             sender = self._decode_header(msg.get("From", ""))
-            body = self._get_body(msg)
             
             return subject, sender, body
         except Exception as e:
             logger.error(f"Erreur de parsing de l'email: {e}")
             return "", "", ""
 
+    def _parse_fast(self, raw_email: bytes) -> Optional[Tuple[Message, Optional[Message]]]:
+        """Parse rapide: (en-têtes du message, partie texte à décoder ou None).
+
+        Seuls les en-têtes passent par le parser email; les corps sont
+        découpés directement sur les délimiteurs MIME, sans le découpage ligne
+        à ligne du feedparser, et seule la partie texte retenue est attachée.
+        Retourne None (parser complet) pour les messages message/*, sans
+        séparateur d'en-têtes ou de structure multipart inhabituelle.
+        """
+        split = self._split_headers(raw_email)
+        if split is None:
+            return None
+        msg, body = split
+        maintype = msg.get_content_maintype()
+        if maintype == "message":
+            return None
+        if maintype != "multipart":
+            # Même représentation que le feedparser (octets non ASCII en surrogates)
+            msg.set_payload(body.decode("ascii", "surrogateescape"))
+            return msg, msg
+        handled, text_part = self._find_text_part(msg, body, 0)
+        if not handled:
+            return None
+        return msg, text_part
+
+    def _split_headers(self, raw: bytes) -> Optional[Tuple[Message, bytes]]:
+        """Sépare les en-têtes (parsés) du corps brut; None sans ligne vide."""
+        if raw[:1] == b"\n" or raw[:2] == b"\r\n":
+            # Partie sans en-têtes: text/plain par défaut
+            return _HEADER_PARSER.parsebytes(b""), raw[1 if raw[:1] == b"\n" else 2:]
+        match = _HEADER_END_RE.search(raw)
+        if not match:
+            return None
+        return _HEADER_PARSER.parsebytes(raw[:match.start()]), raw[match.end():]
+
+    def _find_text_part(self, container: Message, body: bytes, depth: int) -> Tuple[bool, Optional[Message]]:
+        """Cherche la première partie text/plain (hors pièce jointe) d'un multipart.
+
+        Même ordre que Message.walk(). Retourne (traité, partie): traité vaut
+        False si la structure doit passer par le parser complet.
+        """
+        boundary = container.get_boundary()
+        if not boundary or depth >= _MAX_MULTIPART_DEPTH or container.get_content_subtype() == "digest":
+            return False, None
+        # Préfixe littéral: la recherche saute directement aux "--boundary"
+        delimiter = re.compile(
+            rb"--" + re.escape(boundary.encode("ascii", "surrogateescape")) + rb"(--)?[ \t]*(?:\r?\n|$)"
+        )
+        part_start = None
+        for match in delimiter.finditer(body):
+            start = match.start()
+            if start and body[start - 1] != 0x0A:
+                continue  # pas en début de ligne
+            if part_start is not None:
+                # Le saut de ligne qui précède le délimiteur lui appartient
+                end = max(part_start, start - (2 if body[start - 2:start] == b"\r\n" else 1))
+                handled, part = self._check_part(body[part_start:end], depth)
+                if not handled or part is not None:
+                    return handled, part
+            if match.group(1):
+                # Délimiteur final: l'épilogue est ignoré
+                return True, None
+            part_start = match.end()
+        if part_start is None:
+            return False, None
+        # Pas de délimiteur final (corps tronqué): la dernière partie court jusqu'au bout
+        return self._check_part(body[part_start:], depth)
+
+    def _check_part(self, raw_part: bytes, depth: int) -> Tuple[bool, Optional[Message]]:
+        """Examine une sous-partie; même convention de retour que _find_text_part."""
+        split = self._split_headers(raw_part)
+        if split is None:
+            return False, None
+        part, body = split
+        maintype = part.get_content_maintype()
+        if maintype == "message":
+            return False, None
+        if maintype == "multipart":
+            return self._find_text_part(part, body, depth + 1)
+        if part.get_content_type() == "text/plain" and "attachment" not in str(part.get("Content-Disposition")):
+            part.set_payload(body.decode("ascii", "surrogateescape"))
+            return True, part
+        return True, None
+
     def _decode_header(self, header: str) -> str:
         """Décode un en-tête d'email de manière robuste."""
         if not header:
@@ -46,36 +150,73 @@ class EmailParser:
             logger.warning(f"Impossible de décoder l'en-tête: {e}")
             return str(header) # Fallback
 
-    def _get_body(self, msg: Message) -> str:
+    def _get_body(self, msg: Message, max_chars: Optional[int] = None) -> str:
         """Extrait le corps de l'email de manière robuste."""
         body = ""
         if msg.is_multipart():
             for part in msg.walk():
-                content_type = part.get_content_type()
-                content_disposition = str(part.get("Content-Disposition"))
-
-                if content_type == "text/plain" and "attachment" not in content_disposition:
-                    try:
-                        payload = part.get_payload(decode=True)
-                        return self._decode_payload(payload)
-                    except Exception as e:
-                        logger.warning(f"Erreur lors de l'extraction du corps (multipart): {e}")
+                # Seule la première partie text/plain est décodée: les parties
+                # HTML et pièces jointes ne sont jamais lues
+                if part.get_content_type() != "text/plain":
+                    continue
+                if "attachment" in str(part.get("Content-Disposition")):
+                    continue
+                try:
+                    payload = self._get_payload(part, max_chars)
+                    return self._decode_payload(payload, max_chars, part.get_content_charset())
+                except Exception as e:
+                    logger.warning(f"Erreur lors de l'extraction du corps (multipart): {e}")
         else:
             try:
-                payload = msg.get_payload(decode=True)
-                return self._decode_payload(payload)
+                payload = self._get_payload(msg, max_chars)
+                return self._decode_payload(payload, max_chars, msg.get_content_charset())
             except Exception as e:
                 logger.warning(f"Erreur lors de l'extraction du corps (non-multipart): {e}")
         
         return body
 
-    def _decode_payload(self, payload: bytes) -> str:
-        """Tente de décoder le payload avec plusieurs encodages."""
-        for encoding in ["utf-8", "latin-1", "iso-8859-1"]:
+    def _get_payload(self, part: Message, max_chars: Optional[int] = None) -> bytes:
+        """Payload décodé; en base64 avec max_chars, seul le début est décodé.
+
+        La tranche base64 est ramenée à un multiple de 4 caractères: un corps
+        coupé par un FETCH partiel se décode comme un corps complet.
+        """
+        if max_chars is None or part.get("Content-Transfer-Encoding", "").strip().lower() != "base64":
+            return part.get_payload(decode=True)
+        # 4 octets max par caractère, 4 caractères base64 pour 3 octets
+        needed = -(-max_chars * 4 // 3) * 4
+        encoded = "".join(part.get_payload()[:needed * 2].split())[:needed]
+        try:
+            return base64.b64decode(encoded[:len(encoded) - len(encoded) % 4])
+        except (binascii.Error, ValueError):
+            return part.get_payload(decode=True)
+
+    def _decode_payload(self, payload: bytes, max_chars: Optional[int] = None,
+                        charset: Optional[str] = None) -> str:
+        """Tente de décoder le payload avec plusieurs encodages.
+
+        Le charset déclaré par la partie est essayé en premier: un corps
+        latin-1 n'a plus à échouer en UTF-8 avant d'être décodé.
+        """
+        encodings = ["utf-8", "latin-1", "iso-8859-1"]
+        if charset and charset.lower() not in ("utf-8", "utf8"):
+            encodings.insert(0, charset)
+
+        if max_chars is not None:
+            # 4 octets max par caractère UTF-8: inutile de décoder au-delà.
+            # Le décodeur incrémental ignore le caractère coupé en fin de tranche
+            # (tranche ci-dessous ou corps déjà tronqué par un FETCH partiel).
+            payload = payload[:max_chars * 4]
+            try:
+                return codecs.getincrementaldecoder(encodings[0])().decode(payload)[:max_chars]
+            except (UnicodeDecodeError, LookupError):
+                pass
+
+        for encoding in encodings:
             try:
-                return payload.decode(encoding)
-            except UnicodeDecodeError:
+                return payload.decode(encoding)[:max_chars]
+            except (UnicodeDecodeError, LookupError):
                 continue
         
         logger.warning("Impossible de décoder le payload avec les encodages courants. Utilisation de utf-8 avec ignore.")
-        return payload.decode("utf-8", errors="ignore")
+        return payload.decode("utf-8", errors="ignore")[:max_chars]
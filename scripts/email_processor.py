@@ -5,12 +5,15 @@
 # ============================================================================
 
 import os
+import re
 import time
 import signal
 import sys
 import ssl
 import imaplib
-from typing import List, Dict
+import queue
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import List, Dict, Optional, Tuple
 
 from loguru import logger
 from dotenv import load_dotenv
@@ -18,17 +21,19 @@ from dotenv import load_dotenv
 # Imports locaux dynamiques
 try:
     from email_classifier_optimized import EmailClassifierOptimized as EmailClassifier
-    from email_classifier_batch import BatchEmail
     from email_parser import EmailParser
     from feedback_manager import FeedbackManager
     from adaptive_learner import AdaptiveLearner
+    from imap_utils import (IDLE_MAX_SECONDS, PipelinedIMAP, bulk_fetch, chunked, enlarge_read_buffer, idle_wait,
+                            iter_list_response, parse_two_headers, refresh_capabilities)
 except ImportError:
     sys.path.append(os.path.dirname(os.path.abspath(__file__)))
     from email_classifier_optimized import EmailClassifierOptimized as EmailClassifier
-    from email_classifier_batch import BatchEmail
     from email_parser import EmailParser
     from feedback_manager import FeedbackManager
     from adaptive_learner import AdaptiveLearner
+    from imap_utils import (IDLE_MAX_SECONDS, PipelinedIMAP, bulk_fetch, chunked, enlarge_read_buffer, idle_wait,
+                            iter_list_response, parse_two_headers, refresh_capabilities)
 
 load_dotenv()
 
@@ -38,9 +43,26 @@ PROTON_BRIDGE_PORT = int(os.getenv("PROTON_BRIDGE_PORT", 1143))
 PROTON_USERNAME = os.getenv("PROTON_USERNAME")
 PROTON_PASSWORD = os.getenv("PROTON_PASSWORD")
 POLL_INTERVAL = int(os.getenv("PROTON_LUMO_POLL_INTERVAL", 60))
+# Timeout socket: une connexion conservée mais morte échoue au NOOP suivant
+# au lieu de bloquer la boucle indéfiniment
+IMAP_TIMEOUT = 10
 UNSEEN_ONLY = os.getenv("PROTON_LUMO_UNSEEN_ONLY", "true").lower() == "true"
 DRY_RUN = os.getenv("PROTON_LUMO_DRY_RUN", "false").lower() == "true"
 BATCH_SIZE = 10
+# Identifiants max par commande COPY/STORE groupée
+MOVE_CHUNK_SIZE = 100
+# Dossiers traités en parallèle, une connexion IMAP par worker
+# (le Bridge limite le nombre de sessions simultanées)
+MAX_WORKERS = int(os.getenv("PROTON_LUMO_MAX_WORKERS", 4))
+# Emails max par commande FETCH groupée
+FETCH_BULK = int(os.getenv("PROTON_LUMO_FETCH_BULK", 100))
+# Le classifieur n'envoie que le début du corps: inutile de décoder le reste
+BODY_MAX_CHARS = int(os.getenv("PROTON_LUMO_BODY_MAX_CHARS", 500))
+# Octets du corps demandés au serveur: en-têtes + début du TEXT suffisent,
+# les pièces jointes ne transitent plus
+PARTIAL_BODY_BYTES = int(os.getenv("PROTON_LUMO_PARTIAL_BODY_BYTES", 16384))
+# Durée de validité (s) de la liste des dossiers entre deux LIST
+FOLDER_LIST_TTL = int(os.getenv("PROTON_LUMO_FOLDER_LIST_TTL", 600))
 
 # Dossiers techniques à exclure
 SKIP_FOLDERS = [
@@ -48,8 +70,11 @@ SKIP_FOLDERS = [
     "All Mail", "Tous les messages", "Spam", "Trash", "Corbeille", "Bin",
     "Sent", "Envoyés", "Brouillons", "Drafts", "Archive"
 ]
+# Une seule recherche regex par dossier au lieu d'un test par entrée
+_SKIP_FOLDERS_RE = re.compile('|'.join(map(re.escape, SKIP_FOLDERS)))
+_LEARNING_PREFIXES = ("Training", "Feedback")
 
-class ProtonMailBox:
+class ProtonMailBox(PipelinedIMAP):
     """Wrapper IMAP optimisé pour Proton Bridge."""
     def __init__(self):
         self.client = None
@@ -61,9 +86,12 @@ class ProtonMailBox:
             ctx.verify_mode = ssl.CERT_NONE
 
             logger.debug(f"Connexion {PROTON_BRIDGE_HOST}:{PROTON_BRIDGE_PORT}...")
-            self.client = imaplib.IMAP4(PROTON_BRIDGE_HOST, PROTON_BRIDGE_PORT)
+            self.client = imaplib.IMAP4(PROTON_BRIDGE_HOST, PROTON_BRIDGE_PORT, timeout=IMAP_TIMEOUT)
             self.client.starttls(ssl_context=ctx)
+            enlarge_read_buffer(self.client)
             self.client.login(PROTON_USERNAME, PROTON_PASSWORD)
+            # IDLE peut n'être annoncé qu'après LOGIN
+            refresh_capabilities(self.client)
             logger.success("✓ Connexion IMAP établie")
             return self
         except Exception as e:
@@ -86,10 +114,26 @@ class ProtonMailBox:
 class EmailProcessor:
     def __init__(self):
         self.classifier = EmailClassifier()
+        # Catégorie -> dossier cible, calculé une fois (catégories fixes au runtime)
+        self._target_folder_map = {name: cat.folder for name, cat in self.classifier.categories.items()}
         self.parser = EmailParser()
         self.learner = AdaptiveLearner()
         self.feedback_manager = None
         self.running = True
+        # Connexions des workers de dossiers, conservées entre les cycles
+        self._worker_mailboxes: "queue.LifoQueue[ProtonMailBox]" = queue.LifoQueue()
+        # Fin du dernier cycle complet: entre deux, un réveil IDLE ne traite que INBOX
+        self._last_full_scan = 0.0
+        # Dossiers à scanner, réutilisés pendant FOLDER_LIST_TTL secondes
+        self._folder_list = None
+        self._folder_list_time = 0.0
+        # Dossiers Training/* et Feedback/* du même LIST, pour le FeedbackManager
+        self._learning_folders: List[str] = []
+        # Dossier -> (UIDVALIDITY, UIDNEXT, MESSAGES) après un passage sans
+        # reste à traiter: inchangé au STATUS suivant, pas de SELECT
+        self._folder_status: Dict[str, Tuple[int, int, int]] = {}
+        # (UIDVALIDITY, UIDNEXT) du SELECT de INBOX au dernier traitement
+        self._inbox_state: Optional[Tuple[bytes, int]] = None
 
         signal.signal(signal.SIGINT, self._stop)
         logger.info(f"🚀 ProtonLumoAI v2.2 Démarré [PEEK Mode: ON]")
@@ -99,12 +143,16 @@ class EmailProcessor:
         self.running = False
 
     def _get_target_folder(self, category: str) -> str:
-        cat_obj = self.classifier.categories.get(category)
-        return cat_obj.folder if cat_obj else None
+        return self._target_folder_map.get(category)
 
-    def process_batch(self, mailbox, batch_data: List[Dict], folder_name: str):
+    def process_batch(self, batch_data: List[Dict], folder_name: str, to_move: Dict[str, List[bytes]]) -> bool:
+        """Classe un lot et ajoute ses déplacements à to_move (dossier -> ids).
+
+        Retourne False si des emails sont restés sans classification.
+        """
         unknown_emails = []
         actions = []
+        complete = True
 
         for item in batch_data:
             sender = item['sender']
@@ -116,149 +164,372 @@ class EmailProcessor:
 
             if prediction:
                 category, conf = prediction
-                logger.info(f"🧠 Mémoire: {subject[:30]}... -> {category}")
+                logger.trace("🧠 Mémoire: {}... -> {}", subject[:30], category)
                 actions.append({'uid': uid, 'category': category})
             else:
-                unknown_emails.append(BatchEmail(
-                    email_id=uid,
-                    subject=subject,
-                    body=item['body']
-                ))
+                # Format direct du classifier optimisé. Le corps n'est parsé
+                # (arbre MIME complet) que pour les emails inconnus de la mémoire
+                unknown_emails.append({
+                    'email_id': uid,
+                    'subject': subject,
+                    'body': self.parser.parse(item['raw'], max_chars=BODY_MAX_CHARS)[2],
+                    'from': sender
+                })
+
+        if actions:
+            logger.info(f"🧠 Mémoire: {len(actions)} emails classés par règles")
 
            # IA Batch
         if unknown_emails:
-            valid_cats = list(self.classifier.categories.keys())
             logger.info(f"🤖 IA Batch: Classification de {len(unknown_emails)} emails...")
 
-            # Convertir BatchEmail vers le format du classifier optimisé
-            emails_for_batch = [
-                {'email_id': e.email_id, 'subject': e.subject, 'body': e.body, 'from': getattr(e, 'from_address', '')}
-                for e in unknown_emails
-            ]
-            results = self.classifier.classify_batch(emails_for_batch)
+            results = self.classifier.classify_batch(unknown_emails)
+            complete = len(results) == len(unknown_emails)
 
             for res in results:
                 category = res.category
                 uid = res.email_id
 
-                logger.info(f"✨ IA: Email {uid} -> {category} ({res.confidence:.2f}) [{res.method}]")
+                logger.trace("✨ IA: Email {} -> {} ({:.2f}) [{}]", uid, category, res.confidence, res.method)
                 actions.append({'uid': uid, 'category': category})
 
-        # Déplacements
-        moved_count = 0
         for action in actions:
-            uid = action['uid']
-            category = action['category']
-            target_folder = self._get_target_folder(category)
-
+            target_folder = self._get_target_folder(action['category'])
             if target_folder and target_folder != folder_name:
-                if not DRY_RUN:
-                    try:
-                        if not self._folder_exists(mailbox, target_folder):
-                            mailbox.client.create(f'"{target_folder}"')
-
-                        res, _ = mailbox.client.copy(uid.encode(), f'"{target_folder}"')
-                        if res == 'OK':
-                            mailbox.client.store(uid.encode(), '+FLAGS', '\\Deleted')
-                            logger.success(f"✓ Déplacé vers {target_folder}")
-                            moved_count += 1
-                    except Exception as e:
-                        logger.error(f"Erreur déplacement {uid}: {e}")
-                else:
-                    logger.info(f"[DRY-RUN] Vers {target_folder}")
+                to_move.setdefault(target_folder, []).append(action['uid'].encode())
+        return complete
+
+    def move_emails(self, mailbox, to_move: Dict[str, List[bytes]]) -> int:
+        """Déplace les emails d'un dossier: un COPY + un STORE par dossier cible."""
+        if DRY_RUN:
+            for target_folder, uids in to_move.items():
+                logger.info(f"[DRY-RUN] {len(uids)} email(s) vers {target_folder}")
+            return 0
+
+        # Tous les COPY partent d'un coup, puis les STORE des lots copiés:
+        # 2 allers-retours quel que soit le nombre de dossiers cibles
+        chunks = [
+            (target_folder, b','.join(chunk))
+            for target_folder, uids in to_move.items()
+            for chunk in chunked(uids, MOVE_CHUNK_SIZE)
+        ]
+        try:
+            copy_results = mailbox.pipeline([
+                ('COPY', message_set, f'"{target_folder}"') for target_folder, message_set in chunks
+            ])
+        except imaplib.IMAP4.abort:
+            raise
+        except imaplib.IMAP4.error as e:
+            logger.error(f"Erreur déplacement groupé: {e}")
+            return 0
+
+        # Dossier cible absent (supprimé depuis le dernier LIST): le serveur
+        # répond NO [TRYCREATE], on le crée puis on relance ces COPY seulement
+        missing = {target_folder for (target_folder, _), (res, data) in zip(chunks, copy_results)
+                   if res == 'NO' and b'[TRYCREATE]' in b' '.join(d for d in data if isinstance(d, bytes))}
+        if missing:
+            self._create_folders(mailbox, missing)
+            retry = [i for i, (target_folder, _) in enumerate(chunks) if target_folder in missing]
+            retry_results = mailbox.pipeline([
+                ('COPY', chunks[i][1], f'"{chunks[i][0]}"') for i in retry
+            ])
+            for i, result in zip(retry, retry_results):
+                copy_results[i] = result
+
+        copied = []
+        moved_count = 0
+        for (target_folder, message_set), (res, _) in zip(chunks, copy_results):
+            count = message_set.count(b',') + 1
+            if res == 'OK':
+                logger.success(f"✓ {count} email(s) déplacé(s) vers {target_folder}")
+                copied.append(message_set)
+                moved_count += count
+            else:
+                logger.error(f"Erreur déplacement vers {target_folder}: {res}")
+
+        if copied:
+            mailbox.pipeline([('STORE', message_set, '+FLAGS.SILENT', '(\\Deleted)') for message_set in copied])
 
         return moved_count
 
-    def _folder_exists(self, mailbox, folder):
-        return True
+    def _create_folders(self, mailbox, folders):
+        """Crée les dossiers donnés en un seul pipeline de CREATE."""
+        folders = sorted(folders)
+        for folder, (res, data) in zip(folders, mailbox.pipeline([('CREATE', f'"{folder}"') for folder in folders])):
+            if res == 'OK':
+                logger.info(f"📁 Dossier créé: {folder}")
+            else:
+                logger.warning(f"Création du dossier {folder} impossible: {res} {data}")
+
+    def _folder_unchanged(self, folder_name: str, counters: Dict[str, int]) -> bool:
+        """Vrai si un STATUS montre qu'il n'y a rien à chercher dans le dossier."""
+        if counters.get('MESSAGES') == 0:
+            return True
+        if UNSEEN_ONLY and counters.get('UNSEEN') == 0:
+            return True
+        # Compteurs incomplets: pas de signature, jamais considéré inchangé
+        signature = self._status_signature(counters)
+        return signature is not None and self._folder_status.get(folder_name) == signature
+
+    def _remember_status(self, folder_name: str, counters: Optional[Dict[str, int]]) -> None:
+        """Mémorise la signature STATUS d'un dossier sans reste à traiter."""
+        signature = self._status_signature(counters) if counters is not None else None
+        if signature is not None:
+            self._folder_status[folder_name] = signature
+
+    @staticmethod
+    def _status_signature(counters: Dict[str, int]) -> Optional[Tuple[int, int, int]]:
+        try:
+            return counters['UIDVALIDITY'], counters['UIDNEXT'], counters['MESSAGES']
+        except KeyError:
+            return None
+
+    @staticmethod
+    def _uid_state(mailbox) -> Optional[Tuple[bytes, int]]:
+        """(UIDVALIDITY, UIDNEXT) annoncés par le dernier SELECT, ou None."""
+        responses = mailbox.client.untagged_responses
+        try:
+            return responses["UIDVALIDITY"][-1], int(responses["UIDNEXT"][-1])
+        except (KeyError, IndexError, TypeError, ValueError):
+            return None
+
+    def process_folder(self, mailbox, folder_name, counters: Optional[Dict[str, int]] = None):
+        """Classe et déplace les emails d'un dossier.
 
-    def process_folder(self, mailbox, folder_name):
+        counters: réponse STATUS lue avant le SELECT; mémorisée si le passage
+        ne laisse rien à traiter, pour sauter le dossier tant qu'il ne change pas.
+        """
+        complete = True
         try:
             typ, _ = mailbox.client.select(f'"{folder_name}"')
-            if typ != 'OK': return 0
+            if typ != 'OK':
+                # Dossier supprimé ou renommé: relister au prochain cycle complet
+                self._folder_list = None
+                return 0
+            if folder_name == "INBOX":
+                self._inbox_state = self._uid_state(mailbox)
 
             criteria = 'UNSEEN' if UNSEEN_ONLY else 'ALL'
             typ, msg_ids = mailbox.client.search(None, criteria)
-            if typ != 'OK' or not msg_ids[0]: return 0
+            if typ != 'OK': return 0
+            if not msg_ids[0]:
+                self._remember_status(folder_name, counters)
+                return 0
 
             email_ids = msg_ids[0].split()
             total = len(email_ids)
             logger.info(f"📂 {folder_name}: {total} emails à traiter")
 
-            processed_total = 0
             current_batch = []
+            # Déplacements accumulés sur tout le dossier: dossier cible -> ids
+            to_move: Dict[str, List[bytes]] = {}
 
-            for i, e_id in enumerate(email_ids):
-                if not self.running: break
+            # 👇 BODY.PEEK au lieu de RFC822 : lecture SANS marquer comme lu (Seen)
+            # Un FETCH par lot de FETCH_BULK emails au lieu d'un par email
+            parts = f'(BODY.PEEK[HEADER] BODY.PEEK[TEXT]<0.{PARTIAL_BODY_BYTES}>)'
+            for message in bulk_fetch(mailbox.client, email_ids, parts, FETCH_BULK):
+                if not self.running:
+                    complete = False
+                    break
 
                 try:
-                    # 👇 CHANGEMENT MAJEUR ICI : BODY.PEEK[] au lieu de RFC822
-                    # Cela permet de lire le mail SANS le marquer comme lu (Seen)
-                    _, data = mailbox.client.fetch(e_id, '(BODY.PEEK[])')
-                    raw = data[0][1]
-                    parsed = self.parser.parse(raw)
+                    header = message.sections.get(b'BODY[HEADER]', b'')
+                    # Sujet/expéditeur lus directement dans les octets d'en-tête:
+                    # suffisent pour la mémoire, sans construire le message
+                    subject, sender = parse_two_headers(header)
 
                     current_batch.append({
-                        'uid': e_id.decode(),
-                        'subject': parsed[0],
-                        'sender': parsed[1],
-                        'body': parsed[2]
+                        'uid': message.msg_id.decode(),
+                        'subject': subject,
+                        'sender': sender,
+                        'raw': header + message.sections.get(b'BODY[TEXT]<0>', b'')
                     })
 
-                    if len(current_batch) >= BATCH_SIZE or i == total - 1:
-                        processed_total += self.process_batch(mailbox, current_batch, folder_name)
+                    if len(current_batch) >= BATCH_SIZE:
+                        complete &= self.process_batch(current_batch, folder_name, to_move)
                         current_batch = []
 
                 except Exception as e:
-                    logger.error(f"Erreur fetch {e_id}: {e}")
+                    logger.error(f"Erreur parsing {message.msg_id}: {e}")
+                    complete = False
 
+            if current_batch and self.running:
+                complete &= self.process_batch(current_batch, folder_name, to_move)
+
+            # Un seul passage COPY/STORE puis un EXPUNGE final pour tout le dossier
+            processed_total = self.move_emails(mailbox, to_move)
             if processed_total > 0 and not DRY_RUN:
                 mailbox.client.expunge()
 
+            # Après un EXPUNGE les compteurs ont changé: mémorisés au passage suivant
+            if complete and not to_move:
+                self._remember_status(folder_name, counters)
+
             return processed_total
 
+        except (imaplib.IMAP4.abort, OSError):
+            # Connexion coupée: remonte pour une reconnexion immédiate
+            raise
         except Exception as e:
             logger.error(f"Erreur dossier {folder_name}: {e}")
             return 0
 
+    def _process_folder_isolated(self, folder_name: str, counters: Optional[Dict[str, int]] = None) -> int:
+        """Traite un dossier sur une connexion du pool (imaplib n'est pas thread-safe)."""
+        mailbox = self._acquire_worker_mailbox()
+        try:
+            return self.process_folder(mailbox, folder_name, counters)
+        finally:
+            self._worker_mailboxes.put(mailbox)
+
+    def _acquire_worker_mailbox(self) -> ProtonMailBox:
+        """Emprunte une connexion encore vivante (NOOP), sinon en ouvre une."""
+        while True:
+            try:
+                mailbox = self._worker_mailboxes.get_nowait()
+            except queue.Empty:
+                return ProtonMailBox().connect()
+            try:
+                typ, _ = mailbox.client.noop()
+                if typ == "OK":
+                    return mailbox
+            except Exception as e:
+                logger.debug(f"Connexion worker inutilisable ({e}), reconnexion")
+            mailbox.close()
+
+    def _close_worker_mailboxes(self):
+        while True:
+            try:
+                self._worker_mailboxes.get_nowait().close()
+            except queue.Empty:
+                return
+
+    def process_folders(self, mailbox, folder_names: List[str],
+                        statuses: Optional[Dict[str, Optional[Dict[str, int]]]] = None) -> int:
+        """Traite les dossiers en parallèle (au plus MAX_WORKERS connexions).
+
+        Avec un seul worker, la connexion principale est réutilisée.
+        statuses: STATUS déjà lus pour ce cycle (sinon envoyés ici).
+        """
+        # STATUS de tous les dossiers en pipeline: pas de SELECT/SEARCH pour
+        # ceux dont UIDNEXT n'a pas bougé depuis le dernier passage complet
+        if statuses is None:
+            statuses = mailbox.folder_statuses(folder_names)
+        changed = [name for name in folder_names
+                   if statuses[name] is None or not self._folder_unchanged(name, statuses[name])]
+        if len(changed) < len(folder_names):
+            logger.debug(f"{len(folder_names) - len(changed)} dossiers inchangés, skip")
+        folder_names = changed
+
+        workers = min(MAX_WORKERS, len(folder_names))
+        if workers <= 1:
+            return sum(self.process_folder(mailbox, name, statuses[name]) for name in folder_names)
+
+        total = 0
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="folder") as executor:
+            futures = {executor.submit(self._process_folder_isolated, name, statuses[name]): name
+                       for name in folder_names}
+            for future in as_completed(futures):
+                try:
+                    total += future.result()
+                except Exception as e:
+                    logger.error(f"Erreur worker dossier {futures[future]}: {e}")
+        return total
+
+    def list_folders(self, mailbox) -> List[str]:
+        """Dossiers à scanner, sans LIST de toute l'arborescence à chaque cycle."""
+        now = time.monotonic()
+        if self._folder_list is not None and now - self._folder_list_time < FOLDER_LIST_TTL:
+            return self._folder_list
+
+        _, folders = mailbox.client.list()
+        listed = list(iter_list_response(folders))
+        # Dossiers cibles des catégories créés ici, une fois par LIST, plutôt
+        # qu'une vérification avant chaque déplacement
+        missing = set(self._target_folder_map.values()).difference(listed, (None,))
+        if missing and not DRY_RUN:
+            self._create_folders(mailbox, missing)
+        # Un seul passage: apprentissage d'un côté, dossiers à scanner de l'autre
+        self._folder_list, self._learning_folders = [], []
+        for name in listed:
+            if name.startswith(_LEARNING_PREFIXES):
+                self._learning_folders.append(name)
+            elif not _SKIP_FOLDERS_RE.search(name):
+                self._folder_list.append(name)
+        self._folder_list_time = now
+        return self._folder_list
+
+    def wait_for_new_mail(self, mailbox) -> bool:
+        """Attend le prochain cycle complet, en IDLE sur INBOX si le serveur le permet.
+
+        Retourne True si un nouveau message est arrivé dans INBOX avant la fin
+        de l'attente (seul INBOX est alors à traiter).
+        """
+        timeout = self._last_full_scan + POLL_INTERVAL - time.monotonic()
+        if timeout <= 0:
+            return False
+        if "IDLE" not in mailbox.client.capabilities:
+            time.sleep(timeout)
+            return False
+        status, _ = mailbox.client.select('"INBOX"', readonly=True)
+        if status != "OK":
+            time.sleep(timeout)
+            return False
+        # Arrivés pendant le traitement: IDLE ne signale que les suivants
+        state, last = self._uid_state(mailbox), self._inbox_state
+        if state and last and state[0] == last[0] and state[1] > last[1]:
+            return True
+        return idle_wait(mailbox.client, min(timeout, IDLE_MAX_SECONDS))
+
     def run(self):
+        mailbox = None
+        inbox_only = False
         while self.running:
             try:
-                # Nouvelle connexion à chaque cycle
-                with ProtonMailBox() as mailbox:
-
+                # Connexion conservée entre les cycles: STARTTLS + LOGIN
+                # seulement au démarrage et après une erreur
+                if mailbox is None:
+                    mailbox = ProtonMailBox().connect()
                     if not self.feedback_manager:
                         self.feedback_manager = FeedbackManager(self.classifier, mailbox)
                     else:
                         self.feedback_manager.mailbox = mailbox
+                else:
+                    typ, _ = mailbox.client.noop()
+                    if typ != 'OK':
+                        raise imaplib.IMAP4.abort(f"NOOP {typ}")
+
+                if inbox_only:
+                    # Réveil IDLE: apprentissage et autres dossiers au prochain cycle complet
+                    self.process_folder(mailbox, "INBOX")
+                else:
+                    # Un seul LIST et un seul pipeline STATUS par cycle,
+                    # partagés entre l'apprentissage et le scan des dossiers
+                    folder_names = self.list_folders(mailbox)
+                    statuses = mailbox.folder_statuses(self._learning_folders + folder_names)
 
                     # Apprentissage
-                    self.feedback_manager.check_for_feedback()
+                    self.feedback_manager.check_for_feedback(self._learning_folders, statuses)
 
                     # Scan des dossiers
-                    _, folders = mailbox.client.list()
-                    for f in folders:
-                        try:
-                            raw_name = f.decode()
-                        except:
-                            raw_name = f.decode('latin-1')
-
-                        # Parsing IMAP robuste
-                        parts = raw_name.split(' "')
-                        if len(parts) >= 2:
-                            name = parts[-1].strip('"')
-                        else:
-                            name = raw_name.split(' "/" ')[-1].strip('"')
-
-                        if any(skip in name for skip in SKIP_FOLDERS): continue
-                        if name.startswith("Training") or name.startswith("Feedback"): continue
-
-                        self.process_folder(mailbox, name)
-
-                time.sleep(POLL_INTERVAL)
+                    self.process_folders(mailbox, folder_names, statuses)
+                    self._last_full_scan = time.monotonic()
+
+                inbox_only = self.wait_for_new_mail(mailbox)
             except Exception as e:
                 logger.error(f"Erreur boucle principale: {e}")
+                # Reconnexion au prochain cycle
+                if mailbox is not None:
+                    mailbox.close()
+                    mailbox = None
+                self._close_worker_mailboxes()
+                inbox_only = False
                 time.sleep(10)
 
+        if mailbox is not None:
+            mailbox.close()
+        self._close_worker_mailboxes()
+        self.classifier.close()
+
 if __name__ == "__main__":
     EmailProcessor().run()
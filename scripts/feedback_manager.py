@@ -1,8 +1,13 @@
 #!/usr/bin/env python3
-import email
-from email.header import decode_header
+from typing import Dict, Iterable, Optional
+
 from loguru import logger
-from adaptive_learner import AdaptiveLearner
+try:
+    from adaptive_learner import AdaptiveLearner
+    from imap_utils import bulk_fetch, chunked, iter_list_response, parse_two_headers
+except ImportError:
+    from scripts.adaptive_learner import AdaptiveLearner
+    from scripts.imap_utils import bulk_fetch, chunked, iter_list_response, parse_two_headers
 
 class FeedbackManager:
     def __init__(self, classifier, mailbox):
@@ -10,19 +15,30 @@ class FeedbackManager:
         self.mailbox = mailbox
         self.learner = AdaptiveLearner() # Le cerveau
 
-    def check_for_feedback(self):
-        """Scanne les dossiers Training/* et Feedback/*."""
-        try:
-            _, folders = self.mailbox.client.list()
-            for f in folders:
-                name = f.decode().split(' "/" ')[-1].strip('"')
+    def check_for_feedback(self, folders: Optional[Iterable[str]] = None,
+                           statuses: Optional[Dict[str, Optional[Dict[str, int]]]] = None):
+        """Scanne les dossiers Training/* et Feedback/*.
 
+        folders: noms déjà listés par le processeur (sinon un LIST ici).
+        statuses: compteurs STATUS du cycle; un dossier vide (vidé par le
+        passage précédent) est ignoré sans SELECT ni SEARCH.
+        """
+        try:
+            if folders is None:
+                _, listed = self.mailbox.client.list()
+                folders = iter_list_response(listed)
+            statuses = statuses or {}
+            for name in folders:
                 # Détection des dossiers d'apprentissage
-                if name.startswith("Training/") or name.startswith("Feedback/"):
+                if name.startswith(("Training/", "Feedback/")):
                     category = name.split("/")[-1].upper()
                     # Vérifier si c'est une catégorie valide
-                    if category in self.classifier.categories:
-                        self._process_folder(name, category)
+                    if category not in self.classifier.categories:
+                        continue
+                    counters = statuses.get(name)
+                    if counters and counters.get("MESSAGES") == 0:
+                        continue
+                    self._process_folder(name, category)
         except Exception as e:
             logger.error(f"Erreur feedback: {e}")
 
@@ -35,12 +51,11 @@ class FeedbackManager:
             email_ids = ids[0].split()
             logger.info(f"🎓 Apprentissage ({category}): {len(email_ids)} emails")
 
-            for e_id in email_ids:
-                _, data = self.mailbox.client.fetch(e_id, '(RFC822)')
-                msg = email.message_from_bytes(data[0][1])
-
-                subject = self._decode(msg.get("Subject", ""))
-                sender = self._decode(msg.get("From", ""))
+            # Seuls Subject/From servent aux règles: pas besoin du message complet
+            learned = []
+            for fetched in bulk_fetch(self.mailbox.client, email_ids, '(BODY.PEEK[HEADER.FIELDS (SUBJECT FROM)])'):
+                e_id = fetched.msg_id
+                subject, sender = parse_two_headers(fetched.raw or b"")
                 body_preview = "" # Pas besoin du body pour les règles simples
 
                 # 1. Enregistrer la règle dans le cerveau
@@ -53,18 +68,15 @@ class FeedbackManager:
                     correct_category=category
                 )
 
-                # 2. Supprimer l'email (il a servi)
-                self.mailbox.client.store(e_id, '+FLAGS', '\\Deleted')
+                learned.append(e_id)
+
+            # 2. Supprimer les emails qui ont servi: un STORE silencieux par lot
+            # au lieu d'un aller-retour (et d'une réponse FETCH) par email
+            for chunk in chunked(learned, 100):
+                self.mailbox.client.store(b','.join(chunk), '+FLAGS.SILENT', '\\Deleted')
 
             self.mailbox.client.expunge()
             logger.success(f"✓ Cerveau mis à jour avec {len(email_ids)} règles pour {category}")
 
         except Exception as e:
             logger.error(f"Erreur dossier {folder}: {e}")
-
-    def _decode(self, header):
-        try:
-            parts = decode_header(header)
-            return ''.join([str(p[0], p[1] or 'utf-8') if isinstance(p[0], bytes) else str(p[0]) for p in parts])
-        except:
-            return str(header)
@@ -8,6 +8,8 @@
 import os
 import json
 import re
+import heapq
+from operator import itemgetter
 from pathlib import Path
 from typing import Dict, List, Set, Tuple, Optional
 from datetime import datetime
@@ -22,6 +24,20 @@ from dotenv import load_dotenv
 
 load_dotenv()
 
+# Regex compilées une seule fois: appelées pour chaque email analysé
+_WORD_RE = re.compile(r'\b[a-zàâäéèêëïîôöçù]{3,}\b')
+# Stop words français et anglais
+_STOP_WORDS = frozenset({
+    'the', 'a', 'an', 'and', 'or', 'but', 'in', 'on', 'at', 'to', 'for',
+    'le', 'la', 'les', 'un', 'une', 'et', 'ou', 'dans', 'sur', 'à', 'pour'
+})
+# Patterns courants de signature
+_SIGNATURE_RES = tuple(re.compile(pattern, re.MULTILINE) for pattern in (
+    r'(?:^|\n)[-=]{2,}.*?(?:\Z|\n)',  # Séparateur
+    r'(?:^|\n)(?:Best regards|Sincerely|Cordialement|Cdt|BR|--)[\s\S]*?(?:\Z|\n)',
+    r'(?:^|\n)[A-Z][a-z]+ [A-Z][a-z]+[\s\S]*?(?:\Z|\n)',  # Nom + infos
+))
+
 # ============================================================================
 # DATA STRUCTURES
 # ============================================================================
@@ -174,35 +190,14 @@ class FolderLearningAnalyzer:
     
     def _extract_keywords(self, subject: str, body: str, top_n: int = 20) -> Set[str]:
         """Extrait les keywords significatifs"""
-        # Stop words français et anglais
-        stop_words = {
-            'the', 'a', 'an', 'and', 'or', 'but', 'in', 'on', 'at', 'to', 'for',
-            'le', 'la', 'les', 'un', 'une', 'et', 'ou', 'dans', 'sur', 'à', 'pour'
-        }
-        
-        # Tokeniser et nettoyer
+        # Tokeniser, dédupliquer puis filtrer les stop words
         text = (subject + ' ' + body).lower()
-        words = re.findall(r'\b[a-zàâäéèêëïîôöçù]{3,}\b', text)
-        
-        # Filtrer stop words et compter
-        keywords = set()
-        for word in words:
-            if word not in stop_words and len(word) > 2:
-                keywords.add(word)
-        
-        return keywords
+        return set(_WORD_RE.findall(text)) - _STOP_WORDS
     
     def _extract_signature(self, body: str) -> str:
         """Extrait la signature de l'email"""
-        # Patterns courants de signature
-        sig_patterns = [
-            r'(?:^|\n)[-=]{2,}.*?(?:\Z|\n)',  # Séparateur
-            r'(?:^|\n)(?:Best regards|Sincerely|Cordialement|Cdt|BR|--)[\s\S]*?(?:\Z|\n)',
-            r'(?:^|\n)[A-Z][a-z]+ [A-Z][a-z]+[\s\S]*?(?:\Z|\n)',  # Nom + infos
-        ]
-        
-        for pattern in sig_patterns:
-            match = re.search(pattern, body, re.MULTILINE)
+        for pattern in _SIGNATURE_RES:
+            match = pattern.search(body)
             if match:
                 return match.group(0)[:200]  # Max 200 chars
         
@@ -326,10 +321,10 @@ class FolderLearningAnalyzer:
             category=expected_category or 'UNKNOWN',
             common_senders=dict(common_senders),
             common_domains=dict(common_domains),
-            common_keywords=dict(sorted(all_keywords.items(), key=lambda x: x[1], reverse=True)[:20]),
+            common_keywords=dict(heapq.nlargest(20, all_keywords.items(), key=itemgetter(1))),
             common_subjects_patterns=subject_patterns[:5],
             signature_patterns=list(set(signatures))[:3],
-            body_patterns=dict(sorted(body_patterns.items(), key=lambda x: x[1], reverse=True)[:10]),
+            body_patterns=dict(heapq.nlargest(10, body_patterns.items(), key=itemgetter(1))),
             email_count=email_count,
             avg_word_count=avg_word_count,
             urgency_score=urgency_score,
@@ -382,8 +377,7 @@ class FolderLearningAnalyzer:
             
             # Règle 3: Keywords
             if pattern.common_keywords:
-                top_keywords = sorted(pattern.common_keywords.items(), 
-                                    key=lambda x: x[1], reverse=True)[:3]
+                top_keywords = heapq.nlargest(3, pattern.common_keywords.items(), key=itemgetter(1))
                 for keyword, count in top_keywords:
                     if count >= 2:
                         rules[category].append(
@@ -423,13 +417,11 @@ class FolderLearningAnalyzer:
             report.append(f"   Formality score: {pattern.formality_score:.0%}")
             
             if pattern.common_senders:
-                top_senders = sorted(pattern.common_senders.items(), 
-                                   key=lambda x: x[1], reverse=True)[:2]
+                top_senders = heapq.nlargest(2, pattern.common_senders.items(), key=itemgetter(1))
                 report.append(f"   Top senders: {', '.join([f'{s[0]} ({s[1]}x)' for s in top_senders])}")
             
             if pattern.common_keywords:
-                top_kw = sorted(pattern.common_keywords.items(), 
-                              key=lambda x: x[1], reverse=True)[:5]
+                top_kw = heapq.nlargest(5, pattern.common_keywords.items(), key=itemgetter(1))
                 report.append(f"   Keywords: {', '.join([f'{k[0]} ({k[1]}x)' for k in top_kw])}")
         
         # Règles générées
@@ -0,0 +1,446 @@
+#!/usr/bin/env python3
+# ============================================================================
+# IMAP UTILS - ProtonLumoAI
+# Helpers IMAP partagés: FETCH groupé et parsing des réponses imaplib
+# ============================================================================
+
+import re
+import time
+import calendar
+import select
+import imaplib
+import email.utils
+from email.header import decode_header, make_header
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from loguru import logger
+
+# Taille max d'un lot FETCH (au-delà, certains serveurs renvoient
+# "maximum request size exceeded")
+DEFAULT_FETCH_BULK = 100
+
+# Commandes STATUS envoyées par pipeline avant de lire les réponses: borne
+# le volume en attente côté serveur
+STATUS_PIPELINE_MAX = 50
+
+# Tampon de lecture de la socket IMAP (imaplib: 8 Kio par défaut). Les
+# réponses FETCH de milliers de lignes en demandent sinon autant de recv()
+READ_BUFFER_SIZE = 256 * 1024
+
+# RFC 2177: les serveurs peuvent couper une session IDLE après 30 minutes
+IDLE_MAX_SECONDS = 29 * 60
+
+# imaplib (< 3.14) ne connaît pas IDLE: _command refuse les commandes absentes
+imaplib.Commands.setdefault('IDLE', ('AUTH', 'SELECTED'))
+
+# Début d'une réponse FETCH: b'12 (UID 345 FLAGS ...'
+_FETCH_START_RE = re.compile(rb'(\d+) \(')
+# Nom de la section qui précède un littéral: b'... BODY[] {1234}'
+_SECTION_RE = re.compile(rb'((?:BODY|BINARY)\[[^\]]*\](?:<\d+>)?|RFC822(?:\.HEADER|\.TEXT)?) \{\d+\}$')
+_UID_RE = re.compile(rb'UID (\d+)')
+_FLAGS_RE = re.compile(rb'FLAGS \(([^)]*)\)')
+_INTERNALDATE_RE = re.compile(rb'INTERNALDATE "([^"]+)"')
+# Format fixe RFC 3501: "dd-Mon-yyyy hh:mm:ss +zzzz" (jour parfois précédé d'un espace)
+_INTERNALDATE_FIELDS_RE = re.compile(
+    rb'INTERNALDATE " ?(\d{1,2})-([A-Za-z]{3})-(\d{4}) (\d{2}):(\d{2}):(\d{2}) ([-+])(\d{2})(\d{2})"'
+)
+_MONTHS = {name: i for i, name in enumerate(
+    (b'Jan', b'Feb', b'Mar', b'Apr', b'May', b'Jun', b'Jul', b'Aug', b'Sep', b'Oct', b'Nov', b'Dec'), 1)}
+# Ligne LIST: b'(\\HasNoChildren) "/" "Folders/Travail"'. Cas courant: nom
+# entre guillemets sans échappement; sinon grammaire complète (quoted string
+# avec \" et \\, ou atome comme INBOX chez Dovecot)
+_LIST_QUOTED_NAME_RE = re.compile(rb'"([^"\\]*)"$')
+_LIST_NAME_RE = re.compile(rb'\([^)]*\) (?:"[^"\\]*(?:\\.[^"\\]*)*"|NIL) (?:"([^"\\]*(?:\\.[^"\\]*)*)"|([^\s"]+))$')
+_QUOTED_ESCAPE_RE = re.compile(rb'\\(.)')
+# Compteurs d'une réponse STATUS: b'"INBOX" (MESSAGES 3 UIDNEXT 12 UNSEEN 1)'
+_STATUS_ITEM_RE = re.compile(rb'([A-Z]+) (\d+)')
+
+
+@dataclass
+class FetchedMessage:
+    """Un message extrait d'une réponse FETCH groupée"""
+    msg_id: bytes  # Identifiant tel qu'envoyé dans la commande (séquence ou UID)
+    uid: Optional[bytes] = None
+    flags: Tuple[bytes, ...] = ()
+    internaldate: Optional[datetime] = None
+    sections: Dict[bytes, bytes] = field(default_factory=dict)
+
+    @property
+    def raw(self) -> Optional[bytes]:
+        """Premier littéral reçu (BODY[] / RFC822 pour un fetch de message complet)"""
+        return next(iter(self.sections.values()), None)
+
+
+def parse_internaldate(meta: bytes) -> Optional[datetime]:
+    """Extrait INTERNALDATE d'une ligne de réponse FETCH (datetime locale naïve)
+
+    Le format RFC 3501 est décodé directement (calendar.timegm), sans passer
+    par le parser de dates générique; celui-ci ne sert que de repli.
+    """
+    match = _INTERNALDATE_FIELDS_RE.search(meta)
+    if match:
+        day, month, year, hour, minute, second, sign, tz_h, tz_m = match.groups()
+        month_num = _MONTHS.get(month.capitalize())
+        if month_num:
+            timestamp = calendar.timegm((int(year), month_num, int(day), int(hour), int(minute), int(second)))
+            offset = int(tz_h) * 3600 + int(tz_m) * 60
+            return datetime.fromtimestamp(timestamp - offset if sign == b'+' else timestamp + offset)
+
+    match = _INTERNALDATE_RE.search(meta)
+    if match:
+        date_tuple = email.utils.parsedate_tz(match.group(1).decode('ascii'))
+        if date_tuple:
+            return datetime.fromtimestamp(email.utils.mktime_tz(date_tuple))
+    return None
+
+
+def _finish(msg_id: bytes, meta: bytes, sections: Dict[bytes, bytes]) -> FetchedMessage:
+    uid = _UID_RE.search(meta)
+    flags = _FLAGS_RE.search(meta)
+    return FetchedMessage(
+        msg_id=msg_id,
+        uid=uid.group(1) if uid else None,
+        flags=tuple(flags.group(1).split()) if flags else (),
+        internaldate=parse_internaldate(meta),
+        sections=sections,
+    )
+
+
+def iter_fetch_response(msg_data: Iterable) -> Iterator[FetchedMessage]:
+    """Parcourt la liste entrelacée renvoyée par imaplib pour un FETCH multiple.
+
+    imaplib renvoie un tuple (en-tête, littéral) par littéral et des bytes
+    pour les morceaux sans littéral, par exemple:
+        [(b'1 (UID 7 BODY[] {42}', b'...'), b' FLAGS (\\Seen))',
+         b'2 (UID 8 FLAGS () INTERNALDATE "...")']
+    Les métadonnées (UID, FLAGS, INTERNALDATE) ne sont cherchées que hors
+    des littéraux.
+    """
+    msg_id = None
+    meta = b''
+    sections: Dict[bytes, bytes] = {}
+
+    for item in msg_data:
+        if isinstance(item, tuple):
+            head, literal = item
+        elif isinstance(item, bytes):
+            head, literal = item, None
+        else:
+            continue
+
+        start = _FETCH_START_RE.match(head)
+        if start:
+            if msg_id is not None:
+                yield _finish(msg_id, meta, sections)
+            msg_id, meta, sections = start.group(1), b'', {}
+        elif msg_id is None:
+            continue
+
+        meta += head
+        if literal is not None:
+            section = _SECTION_RE.search(head)
+            sections[section.group(1) if section else head] = literal
+
+    if msg_id is not None:
+        yield _finish(msg_id, meta, sections)
+
+
+def iter_list_response(folders: Iterable) -> Iterator[str]:
+    """Extrait les noms de dossiers d'une réponse LIST, sans découper la ligne.
+
+    Accepte les noms entre guillemets, les atomes et les littéraux (que
+    imaplib renvoie en tuple). Les lignes non reconnues sont journalisées
+    et ignorées.
+    """
+    for folder_bytes in folders:
+        if type(folder_bytes) is bytes:
+            match = _LIST_QUOTED_NAME_RE.search(folder_bytes)
+            # Guillemet ouvrant précédé d'un espace: pas la fin d'un \" échappé
+            if match and folder_bytes[match.start() - 1] == 0x20:
+                name = match.group(1)
+            elif not folder_bytes:
+                # Fin de ligne après un littéral
+                continue
+            else:
+                match = _LIST_NAME_RE.match(folder_bytes)
+                if not match:
+                    logger.warning(f'Format de dossier inattendu: {folder_bytes!r}')
+                    continue
+                name = match.group(2)
+                if name is None:
+                    name = _QUOTED_ESCAPE_RE.sub(rb'\1', match.group(1))
+        elif isinstance(folder_bytes, tuple):
+            # Nom en littéral: (b'(\\HasNoChildren) "/" {9}', b'Dossier "x"')
+            name = folder_bytes[1]
+        else:
+            continue
+        try:
+            yield name.decode('utf-8')
+        except UnicodeDecodeError:
+            yield name.decode('latin-1')
+
+
+def folder_status(client: imaplib.IMAP4, folder: str,
+                  items: str = '(MESSAGES UIDNEXT UIDVALIDITY UNSEEN)') -> Optional[Dict[str, int]]:
+    """STATUS d'un dossier sans le sélectionner: {'MESSAGES': 3, 'UIDNEXT': 12, ...}.
+
+    Retourne None si le serveur refuse la commande.
+    """
+    try:
+        status, data = client.status(f'"{folder}"', items)
+    except imaplib.IMAP4.error as e:
+        logger.debug(f'STATUS {folder} impossible: {e}')
+        return None
+    return _parse_status(status, data)
+
+
+def _parse_status(status: str, data: list) -> Optional[Dict[str, int]]:
+    """Compteurs d'une réponse STATUS, None si refusée."""
+    if status != 'OK' or not data:
+        return None
+    # Nom en littéral: la liste des compteurs est dans le dernier élément
+    line = data[-1]
+    if not isinstance(line, bytes):
+        return None
+    # Seule la dernière parenthèse: le nom du dossier peut contenir "MESSAGES 0"
+    counters = line[line.rfind(b'('):]
+    return {name.decode(): int(value) for name, value in _STATUS_ITEM_RE.findall(counters)}
+
+
+def _decode_header_value(value: bytes) -> str:
+    """Décode une valeur d'en-tête brute (RFC 2047 seulement si présent)"""
+    try:
+        text = value.decode('utf-8')
+    except UnicodeDecodeError:
+        text = value.decode('latin-1')
+    if '=?' not in text:
+        return text
+    try:
+        return str(make_header(decode_header(text)))
+    except Exception:
+        return text
+
+
+def parse_two_headers(raw: bytes) -> Tuple[str, str]:
+    """Extrait (Subject, From) d'un bloc BODY[HEADER.FIELDS (SUBJECT FROM)].
+
+    Découpage direct des octets: évite le parser email complet (feedparser +
+    policy) pour deux en-têtes. Les lignes repliées (espace/tabulation en
+    début de ligne) sont rattachées à l'en-tête précédent.
+    """
+    values: Dict[bytes, bytes] = {}
+    current = None
+    for line in raw.replace(b'\r\n', b'\n').split(b'\n'):
+        if not line:
+            continue
+        if line[:1] in (b' ', b'\t'):
+            if current is not None:
+                values[current] += b' ' + line.strip()
+            continue
+        name, sep, value = line.partition(b':')
+        current = name.strip().lower() if sep else None
+        if current in (b'subject', b'from') and current not in values:
+            values[current] = value.strip()
+        else:
+            current = None
+    return (_decode_header_value(values.get(b'subject', b'')),
+            _decode_header_value(values.get(b'from', b'')))
+
+
+def enlarge_read_buffer(client: imaplib.IMAP4, size: int = READ_BUFFER_SIZE):
+    """Remplace le fichier de lecture d'imaplib par un tampon de size octets.
+
+    imaplib lit chaque ligne par readline() et chaque littéral en un seul
+    read(n) sur sock.makefile('rb'): seul le tampon (8 Kio) limite le volume
+    lu par appel système. À appeler après STARTTLS (qui recrée le fichier)
+    et avant toute commande en cours: le tampon remplacé doit être vide.
+    """
+    previous = client.file
+    client.file = client.sock.makefile('rb', buffering=size)
+    previous.close()
+
+
+def refresh_capabilities(client: imaplib.IMAP4):
+    """Relit CAPABILITY après LOGIN et met à jour client.capabilities.
+
+    imaplib ne lit les capacités qu'à la connexion: celles annoncées après
+    authentification (SORT, MOVE, IDLE...) en sont absentes (RFC 3501 §6.2.3).
+    En cas de refus, l'ensemble précédent est conservé.
+    """
+    try:
+        status, data = client.capability()
+    except imaplib.IMAP4.error as e:
+        logger.debug(f'CAPABILITY impossible: {e}')
+        return
+    if status == 'OK' and data and data[-1]:
+        client.capabilities = tuple(data[-1].upper().decode('ascii', 'replace').split())
+
+
+def _wait_readable(client: imaplib.IMAP4, timeout: float) -> bool:
+    """Attend que la socket IMAP ait des données à lire (sans consommer)"""
+    sock = client.sock
+    # Données déjà déchiffrées par TLS: select() ne les voit pas
+    pending = getattr(sock, 'pending', None)
+    if pending and pending():
+        return True
+    readable, _, _ = select.select([sock], [], [], timeout)
+    return bool(readable)
+
+
+def idle_wait(client: imaplib.IMAP4, timeout: float) -> bool:
+    """IDLE (RFC 2177) jusqu'à timeout secondes ou la réception d'un EXISTS.
+
+    Le dossier doit être sélectionné. Retourne True si le serveur a signalé
+    de nouveaux messages, False à l'expiration du délai ou si IDLE est refusé.
+    """
+    client.untagged_responses.pop('EXISTS', None)
+    tag = client._command('IDLE')
+
+    # Attente de la continuation "+ idling" (ou d'un refus tagué)
+    while client._get_response() is not None:
+        if client.tagged_commands.get(tag):
+            client._command_complete('IDLE', tag)
+            return False
+
+    deadline = time.monotonic() + timeout
+    new_mail = False
+    while not new_mail:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0 or not _wait_readable(client, remaining):
+            break
+        client._get_response()
+        new_mail = 'EXISTS' in client.untagged_responses
+
+    client.send(b'DONE\r\n')
+    client._command_complete('IDLE', tag)
+    return new_mail
+
+
+def compress_ids(sorted_ids: List[int]) -> List[List[int]]:
+    """Regroupe des identifiants triés en intervalles [début, fin] inclusifs.
+
+    [1, 2, 3, 7, 9, 10] -> [[1, 3], [7, 7], [9, 10]]
+    """
+    ranges: List[List[int]] = []
+    for n in sorted_ids:
+        if ranges and n == ranges[-1][1] + 1:
+            ranges[-1][1] = n
+        else:
+            ranges.append([n, n])
+    return ranges
+
+
+def expand_ids(items: Iterable) -> Iterator[int]:
+    """Inverse de compress_ids; accepte aussi des entiers isolés"""
+    for item in items:
+        if isinstance(item, list):
+            yield from range(item[0], item[1] + 1)
+        else:
+            yield item
+
+
+def chunked(items: List, size: int) -> Iterator[List]:
+    """Découpe une liste en lots de taille max size"""
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+
+def _drain(msg_data: List) -> Iterator:
+    """Parcourt une réponse imaplib en la vidant au fur et à mesure.
+
+    Chaque élément (et donc chaque littéral) n'est plus référencé par la
+    liste une fois consommé: un lot de chunk_size corps n'est pas gardé en
+    mémoire jusqu'à la fin de son traitement.
+    """
+    msg_data.reverse()
+    while msg_data:
+        yield msg_data.pop()
+
+
+def bulk_fetch(client, email_ids: List[bytes], parts: str,
+               chunk_size: int = DEFAULT_FETCH_BULK, by_uid: bool = False) -> Iterator[FetchedMessage]:
+    """FETCH groupé: une commande par lot de chunk_size identifiants.
+
+    Remplace N allers-retours (un FETCH par email) par ceil(N / chunk_size).
+    Un lot refusé est journalisé et ignoré, les suivants sont traités; une
+    connexion perdue (IMAP4.abort, OSError) est propagée.
+    Les messages sont libérés un par un pendant le parcours du lot.
+    by_uid: identifiants UID (UID FETCH); chaque réponse porte alors son UID.
+    """
+    for chunk in chunked(email_ids, max(1, chunk_size)):
+        try:
+            if by_uid:
+                status, msg_data = client.uid('FETCH', b','.join(chunk), parts)
+            else:
+                status, msg_data = client.fetch(b','.join(chunk), parts)
+        except imaplib.IMAP4.abort:
+            # Connexion perdue: à l'appelant de reconnecter
+            raise
+        except imaplib.IMAP4.error as e:
+            logger.error(f'Erreur FETCH groupé ({len(chunk)} emails): {e}')
+            continue
+        if status != 'OK':
+            logger.error(f'Erreur FETCH groupé ({len(chunk)} emails): {status}')
+            continue
+        yield from iter_fetch_response(_drain(msg_data))
+
+
+class PipelinedIMAP:
+    """Mixin: pipeline de commandes IMAP (RFC 3501 §5.5).
+
+    Toutes les commandes sont envoyées avant de lire la première réponse,
+    ce qui remplace N allers-retours par un seul. S'applique à une classe
+    qui expose un client imaplib connecté dans self.client.
+
+    Les commandes à littéral ne sont pas supportées: imaplib attendrait la
+    réponse de continuation entre deux envois.
+    """
+
+    client: imaplib.IMAP4
+
+    def pipeline(self, commands: List[Tuple], untagged: Optional[str] = None) -> List[Tuple[str, list]]:
+        """Envoie toutes les commandes puis collecte les réponses taguées.
+
+        Args:
+            commands: liste de tuples (NOM, arg1, arg2, ...)
+            untagged: réponse non taguée à rendre à la place de la ligne
+                taguée (ex. 'STATUS'), comme les méthodes d'imaplib. Elle est
+                relevée après chaque commande: celles d'une commande suivante
+                ne sont pas encore lues.
+
+        Returns:
+            Liste de (typ, data) dans l'ordre des commandes. Une réponse BAD
+            est renvoyée telle quelle au lieu de lever une exception.
+        """
+        tags = [(name, self.client._command(name, *args)) for name, *args in commands]
+        results = []
+        for name, tag in tags:
+            try:
+                typ, data = self.client._command_complete(name, tag)
+                if untagged is not None:
+                    typ, data = self.client._untagged_response(typ, data, untagged)
+                results.append((typ, data))
+            except imaplib.IMAP4.abort:
+                raise
+            except imaplib.IMAP4.error as e:
+                results.append(('BAD', [str(e).encode()]))
+        # Les réponses FETCH non sollicitées (STORE) ne sont jamais consommées
+        self.client.untagged_responses.pop('FETCH', None)
+        return results
+
+    def folder_statuses(self, folders: List[str], items: str = '(MESSAGES UIDNEXT UIDVALIDITY UNSEEN)',
+                        chunk_size: int = STATUS_PIPELINE_MAX) -> Dict[str, Optional[Dict[str, int]]]:
+        """STATUS de plusieurs dossiers, un aller-retour par lot de chunk_size.
+
+        La ligne * STATUS d'une commande précède sa réponse taguée: elle est
+        relevée à la fin de chaque commande et rattachée à son dossier. None
+        pour un dossier refusé (voir folder_status).
+        """
+        statuses: Dict[str, Optional[Dict[str, int]]] = {}
+        for chunk in chunked(folders, chunk_size):
+            results = self.pipeline([('STATUS', f'"{folder}"', items) for folder in chunk], untagged='STATUS')
+            for folder, (status, data) in zip(chunk, results):
+                statuses[folder] = _parse_status(status, data)
+        return statuses
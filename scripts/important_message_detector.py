@@ -15,6 +15,18 @@ from loguru import logger
 import re
 
 
+URGENT_KEYWORDS = ("urgent", "important", "action required", "asap", "deadline")
+
+
+def _compile_keywords(keywords) -> "re.Pattern":
+    """Compile a keyword list into one substring-alternation regex"""
+    return re.compile("|".join(map(re.escape, keywords)))
+
+
+# One regex scan per message instead of one `in` test per keyword
+_URGENT_RE = _compile_keywords(URGENT_KEYWORDS)
+
+
 @dataclass
 class ImportantMessage:
     """Represents an important message with scoring details"""
@@ -72,11 +84,20 @@ class ImportantMessageDetector:
             os.getenv("PROTON_LUMO_DATA", "~/ProtonLumoAI/data")
         ).expanduser()
 
-        self.important_messages_file = self.data_dir / "important_messages.json"
+        # One JSON record per line: saving appends, nothing is rewritten
+        self.important_messages_file = self.data_dir / "important_messages.jsonl"
+        # Former format (single JSON array), imported once if present
+        self.legacy_messages_file = self.data_dir / "important_messages.json"
+        # Records of important_messages_file, loaded on first use
+        self._records: Optional[List[dict]] = None
+        # Last line of the file has no newline (interrupted append)
+        self._partial_line = False
         self.important_contacts = self._load_important_contacts()
         self.relocation_keywords = self._load_relocation_keywords()
         self.important_domains = self._load_important_domains()
         self.frequent_senders = self._load_frequent_senders()
+        self._contacts_re = _compile_keywords(self.important_contacts)
+        self._relocation_re = _compile_keywords(self.relocation_keywords)
 
         logger.info("ImportantMessageDetector initialized")
 
@@ -128,6 +149,7 @@ class ImportantMessageDetector:
         body: str,
         category: str,
         confidence: float,
+        min_score: Optional[int] = None,
     ) -> Tuple[int, Dict[str, int], str]:
         """
         Calculate importance score for a message
@@ -139,6 +161,9 @@ class ImportantMessageDetector:
             body: Email body
             category: Classification category (PRO, BANQUE, VENTE, etc.)
             confidence: Classification confidence (0-1)
+            min_score: If given, the subject/body keyword scan is skipped when
+                even both keyword bonuses could not reach it (the returned
+                score is then only known to be below min_score)
 
         Returns:
             Tuple of (score, criteria_breakdown, action_type)
@@ -158,7 +183,7 @@ class ImportantMessageDetector:
 
         # Important contact bonus
         from_lower = from_email.lower()
-        if any(contact in from_lower for contact in self.important_contacts):
+        if self._contacts_re.search(from_lower):
             score += self.SCORES["important_contact"]
             breakdown["important_contact"] = self.SCORES["important_contact"]
 
@@ -169,48 +194,45 @@ class ImportantMessageDetector:
             score += domain_score
             breakdown[f"domain_{domain}"] = domain_score
 
-        # Urgent keywords
-        text_to_search = f"{subject} {body}".lower()
-        urgent_keywords = [
-            "urgent",
-            "important",
-            "action required",
-            "asap",
-            "deadline",
-        ]
-        if any(kw in text_to_search for kw in urgent_keywords):
-            score += self.SCORES["urgent_keywords"]
-            breakdown["urgent_keywords"] = self.SCORES["urgent_keywords"]
-
-        # Relocation keywords
-        if any(kw in text_to_search for kw in self.relocation_keywords):
-            score += self.SCORES["relocation_keyword"]
-            breakdown["relocation_keyword"] = self.SCORES["relocation_keyword"]
-
         # Frequent sender
         sender_count = self.frequent_senders.get(from_lower, 0)
         if sender_count >= 3:
             score += self.SCORES["frequent_sender"]
             breakdown["frequent_sender"] = self.SCORES["frequent_sender"]
 
+        # Keyword criteria last: lowering and scanning the body is the costly part
+        is_urgent = False
+        max_keyword_points = self.SCORES["urgent_keywords"] + self.SCORES["relocation_keyword"]
+        if min_score is None or score + max_keyword_points >= min_score:
+            text_to_search = f"{subject} {body}".lower()
+
+            # Urgent keywords
+            is_urgent = _URGENT_RE.search(text_to_search) is not None
+            if is_urgent:
+                score += self.SCORES["urgent_keywords"]
+                breakdown["urgent_keywords"] = self.SCORES["urgent_keywords"]
+
+            # Relocation keywords
+            if self._relocation_re.search(text_to_search):
+                score += self.SCORES["relocation_keyword"]
+                breakdown["relocation_keyword"] = self.SCORES["relocation_keyword"]
+
         # Determine action type
-        action_type = self._determine_action_type(
-            category, urgent_keywords, text_to_search
-        )
+        action_type = self._determine_action_type(category, is_urgent)
 
-        logger.debug(
-            f"Scored message {message_id}: {score} pts "
-            f"(category={category}, from={from_email})"
+        logger.trace(
+            "Scored message {}: {} pts (category={}, from={})",
+            message_id, score, category, from_email,
         )
 
         return score, breakdown, action_type
 
-    def _determine_action_type(self, category: str, urgent_kw: List[str], text: str) -> str:
+    def _determine_action_type(self, category: str, is_urgent: bool) -> str:
         """
         Determine the action type for the message
         """
         if category == "PRO":
-            if any(kw in text for kw in urgent_kw):
+            if is_urgent:
                 return "respond"
             return "review"
         elif category == "BANQUE":
@@ -224,37 +246,94 @@ class ImportantMessageDetector:
         """
         Save important message to tracking file
         """
-        messages = self._load_important_messages()
-        messages.append(msg)
-        with open(self.important_messages_file, "w") as f:
-            json.dump([m.to_dict() for m in messages], f, indent=2)
+        self.save_important_messages([msg])
+
+    def save_important_messages(self, new_messages: List[ImportantMessage]) -> None:
+        """
+        Save several important messages with a single append to the tracking file
+
+        Only the new records are written (one JSON line each); the existing
+        ones are neither re-encoded nor rewritten.
+        """
+        if not new_messages:
+            return
+        records = self._message_records()
+        new_records = [m.to_dict() for m in new_messages]
+        data = "".join(json.dumps(r, separators=(",", ":")) + "\n" for r in new_records)
+        with open(self.important_messages_file, "a") as f:
+            f.write("\n" + data if self._partial_line else data)
+        self._partial_line = False
+        records.extend(new_records)
+
+    def load_important_messages(self) -> List[ImportantMessage]:
+        """
+        Load important messages from file
+        """
+        return self._load_important_messages()
 
     def _load_important_messages(self) -> List[ImportantMessage]:
         """
         Load important messages from file
         """
-        if self.important_messages_file.exists():
+        return [
+            ImportantMessage(
+                message_id=m["message_id"],
+                from_email=m["from_email"],
+                subject=m["subject"],
+                score=m["score"],
+                category=m["category"],
+                criteria_breakdown=m["criteria_breakdown"],
+                action_type=m["action_type"],
+                status=m["status"],
+                detected_at=m["detected_at"],
+                category_confidence=m["category_confidence"],
+            )
+            for m in self._message_records()
+        ]
+
+    def _message_records(self) -> List[dict]:
+        """
+        Raw records of the tracking file, read from disk only once
+        """
+        if self._records is None:
+            self._records = []
             try:
                 with open(self.important_messages_file) as f:
-                    data = json.load(f)
-                    return [
-                        ImportantMessage(
-                            message_id=m["message_id"],
-                            from_email=m["from_email"],
-                            subject=m["subject"],
-                            score=m["score"],
-                            category=m["category"],
-                            criteria_breakdown=m["criteria_breakdown"],
-                            action_type=m["action_type"],
-                            status=m["status"],
-                            detected_at=m["detected_at"],
-                            category_confidence=m["category_confidence"],
-                        )
-                        for m in data
-                    ]
+                    lines = f.readlines()
+            except FileNotFoundError:
+                self._records = self._import_legacy_messages()
+                return self._records
             except Exception as e:
                 logger.error(f"Could not load important messages: {e}")
-        return []
+                return self._records
+            self._partial_line = bool(lines) and not lines[-1].endswith("\n")
+            for line in lines:
+                try:
+                    self._records.append(json.loads(line))
+                except ValueError:
+                    # Blank line or record cut short by an interrupted append
+                    if line.strip():
+                        logger.warning("Skipping unreadable important message record")
+        return self._records
+
+    def _import_legacy_messages(self) -> List[dict]:
+        """
+        Convert the former JSON array file to the line-based format
+        """
+        if not self.legacy_messages_file.exists():
+            return []
+        try:
+            with open(self.legacy_messages_file) as f:
+                records = json.load(f)
+            tmp_file = self.important_messages_file.with_suffix(".tmp")
+            with open(tmp_file, "w") as f:
+                f.write("".join(json.dumps(r, separators=(",", ":")) + "\n" for r in records))
+            os.replace(tmp_file, self.important_messages_file)
+            logger.info(f"Imported {len(records)} important messages from {self.legacy_messages_file.name}")
+            return records
+        except Exception as e:
+            logger.error(f"Could not import important messages: {e}")
+            return []
 
     def generate_executive_summary(
         self, messages: List[ImportantMessage]
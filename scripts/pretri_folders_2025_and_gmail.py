@@ -7,7 +7,6 @@ Crée les sous-dossiers et déplace les emails par catégories intelligentes
 import os
 import sys
 import json
-import re
 from pathlib import Path
 from collections import Counter
 from dotenv import load_dotenv
@@ -15,6 +14,12 @@ import imaplib
 import email
 from email.header import decode_header
 
+try:
+    from imap_utils import bulk_fetch, iter_list_response
+except ImportError:
+    sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+    from imap_utils import bulk_fetch, iter_list_response
+
 load_dotenv()
 
 class PreTriAutomatique:
@@ -47,26 +52,6 @@ class PreTriAutomatique:
             print(f"❌ Erreur: {e}")
             return False
 
-    def parse_mailbox_name(self, mailbox_line):
-        """Parser le nom de mailbox à partir d'une ligne LIST IMAP"""
-        try:
-            line_str = (
-                mailbox_line.decode("utf-8")
-                if isinstance(mailbox_line, bytes)
-                else str(mailbox_line)
-            )
-            # Format typique: (\HasNoChildren) "/" "Folders/2025"
-            match = re.search(r'"([^\"]+)"\s*$', line_str)
-            if match:
-                return match.group(1)
-            # Fallback très défensif
-            parts = line_str.split()
-            if len(parts) >= 3:
-                return parts[-1].strip('"')
-            return None
-        except Exception:
-            return None
-
     def extraire_features_email(self, email_data):
         """Extraire features d'un email"""
         try:
@@ -200,8 +185,8 @@ class PreTriAutomatique:
             status, mailbox_list = self.mail.list()
             dossier_imap = None
 
-            for mailbox_line in mailbox_list:
-                mailbox_name = self.parse_mailbox_name(mailbox_line)
+            # Noms extraits des octets de la réponse LIST, sans décoder chaque ligne
+            for mailbox_name in iter_list_response(mailbox_list):
                 if mailbox_name and dossier_name.lower() in mailbox_name.lower():
                     dossier_imap = mailbox_name
                     break
@@ -227,11 +212,12 @@ class PreTriAutomatique:
             categories_count = Counter()
             emails_par_categorie = {}
 
-            for idx, email_id in enumerate(email_ids, 1):
-                status, email_data = self.mail.fetch(email_id, "(RFC822)")
-                if status != "OK" or not email_data:
+            # Un FETCH pour les 100 emails; BODY.PEEK[] ne les marque pas lus
+            for idx, message in enumerate(bulk_fetch(self.mail, email_ids, "(BODY.PEEK[])"), 1):
+                if message.raw is None:
                     continue
-                features = self.extraire_features_email(email_data[0][1])
+                email_id = message.msg_id
+                features = self.extraire_features_email(message.raw)
                 categorie, score = self.detecter_categorie(features)
 
                 categories_count[categorie] += 1
@@ -11,7 +11,10 @@ from pathlib import Path
 from typing import Dict, List, Optional
 from loguru import logger
 
-from important_message_detector import ImportantMessage
+try:
+    from important_message_detector import ImportantMessage
+except ImportError:
+    from scripts.important_message_detector import ImportantMessage
 
 
 class SummaryEmailReporter:
@@ -8,9 +8,9 @@
 # ============================================================================
 
 import os
+import re
 import sys
 import imaplib
-import email
 from pathlib import Path
 from typing import List, Dict, Optional
 import ssl
@@ -20,9 +20,13 @@ from dotenv import load_dotenv
 
 try:
     from folder_learning_analyzer import FolderLearningAnalyzer, EmailFeatures
+    from email_parser import EmailParser
+    from imap_utils import bulk_fetch, iter_list_response
 except ImportError:
     sys.path.append(os.path.dirname(os.path.abspath(__file__)))
     from folder_learning_analyzer import FolderLearningAnalyzer, EmailFeatures
+    from email_parser import EmailParser
+    from imap_utils import bulk_fetch, iter_list_response
 
 load_dotenv()
 
@@ -36,6 +40,12 @@ PROTON_PASSWORD = os.getenv("PROTON_PASSWORD")
 LEARNING_ENABLED = os.getenv("PROTON_LUMO_LEARNING_ENABLED", "true").lower() == "true"
 LEARNING_EMAILS_PER_FOLDER = int(os.getenv("PROTON_LUMO_LEARNING_EMAILS_PER_FOLDER", 10))
 LEARNING_MIN_CONFIDENCE = float(os.getenv("PROTON_LUMO_LEARNING_MIN_CONFIDENCE", 0.7))
+# L'analyse ne lit que 500 caractères du corps (FolderLearningAnalyzer):
+# en-têtes + début du TEXT suffisent, les pièces jointes ne transitent pas
+LEARNING_BODY_BYTES = int(os.getenv("PROTON_LUMO_PARTIAL_BODY_BYTES", 16384))
+LEARNING_BODY_CHARS = 500
+# Partie marquée "Content-Disposition: attachment" (sans paramètre)
+_ATTACHMENT_RE = re.compile(rb'^Content-Disposition:[ \t]*attachment[ \t]*\r?$', re.IGNORECASE | re.MULTILINE)
 
 # IMAP folders to skip (special system folders that cause SEARCH errors)
 SKIP_FOLDERS = [
@@ -45,6 +55,8 @@ SKIP_FOLDERS = [
     'Drafts',
     'Sent',
 ]
+# Compilé une fois: même règle (sous-chaîne) que la boucle précédente
+_SKIP_FOLDERS_RE = re.compile('|'.join(map(re.escape, SKIP_FOLDERS)))
 
 
 def should_skip_folder(folder_name: str) -> bool:
@@ -53,10 +65,9 @@ def should_skip_folder(folder_name: str) -> bool:
         return True
     
     # Skip special IMAP folders
-    for skip_pattern in SKIP_FOLDERS:
-        if skip_pattern in folder_name:
-            logger.debug(f"Skipping special folder: {folder_name}")
-            return True
+    if _SKIP_FOLDERS_RE.search(folder_name):
+        logger.debug(f"Skipping special folder: {folder_name}")
+        return True
     
     # Skip folders with double backslashes (malformed IMAP)
     if '\\\\' in folder_name:
@@ -74,6 +85,7 @@ class SyncAndLearn:
     def __init__(self):
         self.mailbox: Optional[imaplib.IMAP4] = None
         self.analyzer = FolderLearningAnalyzer()
+        self.parser = EmailParser()
         self.learning_enabled = LEARNING_ENABLED
         
         logger.info(
@@ -154,47 +166,24 @@ class SyncAndLearn:
             
             logger.info(f"Fetching {len(email_ids)} emails from {folder_name}")
             
-            for email_id in email_ids:
+            # Un FETCH par lot au lieu d'un par email; PEEK ne marque pas lu
+            parts = f'(BODY.PEEK[HEADER] BODY.PEEK[TEXT]<0.{LEARNING_BODY_BYTES}>)'
+            for fetched in bulk_fetch(self.mailbox, email_ids, parts):
                 try:
-                    status, msg_data = self.mailbox.fetch(email_id, '(RFC822)')
-                    if status != 'OK':
+                    header = fetched.sections.get(b'BODY[HEADER]')
+                    if header is None:
                         continue
+                    raw_email = header + fetched.sections.get(b'BODY[TEXT]<0>', b'')
                     
-                    raw_email = msg_data[0][1]
-                    msg = email.message_from_bytes(raw_email)
-                    
-                    # Extraire subject
-                    subject = msg.get('Subject', 'Unknown')
-                    if isinstance(subject, bytes):
-                        subject = subject.decode('utf-8', errors='ignore')
-                    elif isinstance(subject, email.header.Header):
-                        decoded = email.header.decode_header(subject)
-                        subject = decoded[0][0]
-                        if isinstance(subject, bytes):
-                            subject = subject.decode(decoded[0][1] or 'utf-8', errors='ignore')
-                    
-                    # Extraire sender
-                    sender = msg.get('From', 'Unknown')
+                    # Sujet/expéditeur décodés, seule la partie texte retenue est décodée
+                    subject, sender, body = self.parser.parse(raw_email, max_chars=LEARNING_BODY_CHARS)
+                    subject = subject or 'Unknown'
+                    sender = sender or 'Unknown'
                     if '<' in sender:
                         sender = sender.split('<')[1].split('>')[0]
                     
-                    # Extraire body
-                    body = ""
-                    if msg.is_multipart():
-                        for part in msg.walk():
-                            if part.get_content_type() == "text/plain":
-                                body = part.get_payload(decode=True).decode('utf-8', errors='ignore')
-                                break
-                    else:
-                        body = msg.get_payload(decode=True).decode('utf-8', errors='ignore')
-                    
-                    # Vérifier attachments
-                    has_attachment = False
-                    if msg.is_multipart():
-                        for part in msg.walk():
-                            if part.get("Content-Disposition") == "attachment":
-                                has_attachment = True
-                                break
+                    # Vérifier attachments (dans la partie lue du message)
+                    has_attachment = _ATTACHMENT_RE.search(raw_email) is not None
                     
                     emails_data.append({
                         'subject': subject,
@@ -238,22 +227,13 @@ class SyncAndLearn:
             folder_names = []
             skipped_folders = []
             
-            for folder_bytes in folders:
-                try:
-                    folder_raw = folder_bytes.decode('utf-8', errors='ignore')
-                    parts = folder_raw.split('"')
-                    if len(parts) >= 3:
-                        folder_name = parts[-2]
-                        
-                        # CRITICAL FIX: Skip special IMAP folders
-                        if should_skip_folder(folder_name):
-                            skipped_folders.append(folder_name)
-                            continue
-                        
-                        folder_names.append(folder_name)
-                except Exception as e:
-                    logger.debug(f"Error parsing folder: {e}")
+            for folder_name in iter_list_response(folders):
+                # CRITICAL FIX: Skip special IMAP folders
+                if should_skip_folder(folder_name):
+                    skipped_folders.append(folder_name)
                     continue
+                
+                folder_names.append(folder_name)
             
             logger.info(f"Found {len(folder_names)} folders to analyze")
             if skipped_folders:
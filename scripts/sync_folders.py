@@ -13,15 +13,17 @@ from dotenv import load_dotenv
 
 try:
     from email_processor import ProtonMailBox
+    from imap_utils import iter_list_response
 except ImportError:
     sys.path.append(os.path.dirname(os.path.abspath(__file__)))
     from email_processor import ProtonMailBox
+    from imap_utils import iter_list_response
 
 load_dotenv()
 
 CONFIG_PATH = Path(os.path.dirname(os.path.abspath(__file__))) / "../config/categories.json"
 
-EXCLUDED_FOLDERS = [
+EXCLUDED_FOLDERS = frozenset([
     "Trash", "Corbeille", "Bin",
     "Spam", "Junk", "Pourriel",
     "Archive", "Archives",
@@ -29,7 +31,9 @@ EXCLUDED_FOLDERS = [
     "Drafts", "Brouillons",
     "All Mail", "Tous les messages",
     "INBOX"
-]
+])
+# Dossiers d'apprentissage, jamais transformés en catégories
+_EXCLUDED_PREFIXES = ("Training", "Feedback", "Corrections")
 
 def load_config():
     if CONFIG_PATH.exists():
@@ -61,14 +65,8 @@ def sync():
 
             new_folders_count = 0
 
-            for folder_bytes in folders:
-                folder_raw = folder_bytes.decode()
-                folder_name = folder_raw.split(' "/" ')[-1].strip('"')
-
-                if (folder_name in EXCLUDED_FOLDERS or
-                    folder_name.startswith("Training") or
-                    folder_name.startswith("Feedback") or
-                    folder_name.startswith("Corrections")):
+            for folder_name in iter_list_response(folders):
+                if folder_name in EXCLUDED_FOLDERS or folder_name.startswith(_EXCLUDED_PREFIXES):
                     continue
 
                 if folder_name in existing_paths:
@@ -132,7 +132,10 @@ class TrainingManager:
                 
                 try:
                     mailbox.folder.set(folder_name)
-                    emails = list(mailbox.fetch())
+                    # bulk=True: un seul FETCH pour tout le dossier au lieu d'un par email
+                    emails = list(mailbox.fetch(bulk=True))
+                    # Déplacés ensemble à la fin: un seul MOVE pour le dossier
+                    learned_uids = []
                     
                     for email in emails:
                         try:
@@ -152,14 +155,17 @@ class TrainingManager:
                             if self.classifier.use_lumo:
                                 self.classifier.train_lumo(category, [f"{email.subject} {email.text or ''}"])
                             
-                            # Déplacer vers le dossier final
-                            target_folder = self.classifier.categories[category].folder
-                            mailbox.move(email.uid, target_folder)
-                            logger.debug(f"Email déplacé vers {target_folder}")
+                            learned_uids.append(email.uid)
                         
                         except Exception as e:
                             logger.error(f"Erreur traitement email: {e}")
                             stats["errors"] += 1
+                    
+                    # Déplacer vers le dossier final
+                    if learned_uids:
+                        target_folder = self.classifier.categories[category].folder
+                        mailbox.move(learned_uids, target_folder)
+                        logger.debug(f"{len(learned_uids)} emails déplacés vers {target_folder}")
                 
                 except Exception as e:
                     logger.error(f"Erreur accès dossier {folder_name}: {e}")
@@ -193,7 +199,8 @@ class TrainingManager:
         
         try:
             mailbox.folder.set(CORRECTION_FOLDER)
-            corrections = list(mailbox.fetch())
+            corrections = list(mailbox.fetch(bulk=True))
+            archived_uids = []
             
             for email in corrections:
                 try:
@@ -222,8 +229,7 @@ class TrainingManager:
                             if self.classifier.use_lumo:
                                 self.classifier.train_lumo(category, [f"{subject} {email.text or ''}"])
                             
-                            # Archiver la correction
-                            mailbox.move(email.uid, "Archive")
+                            archived_uids.append(email.uid)
                         else:
                             logger.warning(f"Catégorie inconnue dans correction: {category}")
                     else:
@@ -232,6 +238,10 @@ class TrainingManager:
                 except Exception as e:
                     logger.error(f"Erreur traitement correction: {e}")
                     stats["errors"] += 1
+            
+            # Archiver les corrections traitées en un seul MOVE
+            if archived_uids:
+                mailbox.move(archived_uids, "Archive")
         
         except Exception as e:
             logger.error(f"Erreur accès corrections: {e}")
@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""Clients IMAP de test partagés par les modules de tests."""
+import imaplib
+import socket
+import threading
+
+
+class FakeClient:
+    """Client IMAP minimal qui enregistre les FETCH et renvoie des réponses préparées.
+
+    Une exception parmi les réponses est levée à la place.
+    """
+
+    def __init__(self, responses):
+        self.responses = list(responses)
+        self.calls = []
+        self.untagged_responses = {}
+
+    def fetch(self, message_set, parts):
+        self.calls.append((message_set, parts))
+        response = self.responses.pop(0)
+        if isinstance(response, Exception):
+            raise response
+        return response
+
+    def uid(self, command, *args):
+        self.calls.append((command,) + args)
+        response = self.responses.pop(0)
+        if isinstance(response, Exception):
+            raise response
+        return response
+
+    def status(self, folder, items):
+        self.calls.append((folder, items))
+        return self.responses.pop(0)
+
+
+class ScriptedIMAP(imaplib.IMAP4):
+    """imaplib réel relié par une socketpair à un serveur minimal (thread).
+
+    statuses: nom du dossier -> compteurs de la ligne * STATUS, ou None
+    pour un refus (NO). Les commandes reçues sont gardées dans received.
+    """
+
+    capability_line = b'IMAP4rev1'
+
+    def __init__(self, statuses=None):
+        self.statuses = statuses or {}
+        self.received = []
+        super().__init__()
+
+    def open(self, host='', port=imaplib.IMAP4_PORT, timeout=None):
+        self.host, self.port = host, port
+        self.sock, server = socket.socketpair()
+        self.file = self.sock.makefile('rb')
+        threading.Thread(target=self._serve, args=(server,), daemon=True).start()
+
+    def _serve(self, server):
+        with server, server.makefile('rb') as lines:
+            server.sendall(b'* PREAUTH ready\r\n')
+            for line in lines:
+                tag, command, *args = line.rstrip(b'\r\n').split(b' ', 2)
+                self.received.append(command)
+                if command == b'CAPABILITY':
+                    server.sendall(b'* CAPABILITY %s\r\n%s OK done\r\n' % (self.capability_line, tag))
+                elif command == b'STATUS':
+                    folder = args[0].split(b'" ')[0].strip(b'"')
+                    counters = self.statuses.get(folder.decode())
+                    if counters is None:
+                        server.sendall(tag + b' NO Mailbox does not exist\r\n')
+                    else:
+                        server.sendall(b'* STATUS "%s" %s\r\n%s OK STATUS completed\r\n' % (folder, counters, tag))
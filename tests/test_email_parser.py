@@ -48,5 +48,40 @@ class TestEmailParser(unittest.TestCase):
         _, _, body = self.parser.parse(msg.as_bytes())
         self.assertEqual(body, body_str)
 
+    def test_declared_charset(self):
+        body_str = "Facture de 12 € réglée"
+        msg = MIMEText(body_str, "plain", "cp1252")
+        _, _, body = self.parser.parse(msg.as_bytes())
+        self.assertEqual(body, body_str)
+
+    def test_max_chars(self):
+        body_str = "é" * 3000
+        msg = MIMEText(body_str, "plain", "utf-8")
+        _, _, body = self.parser.parse(msg.as_bytes(), max_chars=500)
+        self.assertEqual(body, body_str[:500])
+
+    def test_nested_multipart(self):
+        inner = MIMEMultipart("alternative")
+        inner.attach(MIMEText("<p>HTML</p>", "html"))
+        inner.attach(MIMEText("Texte imbriqué", "plain", "utf-8"))
+        attachment = MIMEText("pièce jointe", "plain", "utf-8")
+        attachment.add_header("Content-Disposition", "attachment", filename="a.txt")
+        msg = MIMEMultipart()
+        msg.attach(attachment)
+        msg.attach(inner)
+        raw = msg.as_bytes()
+        self.assertEqual(self.parser.parse(raw)[2], "Texte imbriqué")
+        # Sans délimiteurs finaux (FETCH partiel)
+        truncated = raw[:raw.index(f"--{inner.get_boundary()}--".encode())]
+        self.assertEqual(self.parser.parse(truncated)[2], "Texte imbriqué")
+
+    def test_truncated_base64(self):
+        # Corps coupé par un FETCH partiel (BODY.PEEK[TEXT]<0.n>)
+        msg = MIMEText("Bonjour é " * 300, "plain", "utf-8")
+        raw = msg.as_bytes()
+        start = raw.index(b"\n\n") + 2
+        _, _, body = self.parser.parse(raw[:start + 803], max_chars=50)
+        self.assertEqual(body, "Bonjour é " * 5)
+
 if __name__ == '__main__':
     unittest.main()
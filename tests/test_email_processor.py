@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+import importlib.util
+import threading
+import time
+import unittest
+from pathlib import Path
+from unittest import mock
+
+# Processeur de la racine (scripts/email_processor.py est la v2.2)
+_spec = importlib.util.spec_from_file_location(
+    'root_email_processor', Path(__file__).resolve().parent.parent / 'email_processor.py')
+email_processor = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(email_processor)
+EmailProcessor = email_processor.EmailProcessor
+
+
+class InboxClient:
+    """INBOX inchangé depuis le dernier passage: UIDVALIDITY 7, UIDNEXT 12, 3 messages."""
+
+    capabilities = ('IMAP4REV1', 'IDLE')
+
+    def __init__(self):
+        self.untagged_responses = {}
+
+    def select(self, mailbox, readonly=False):
+        self.untagged_responses = {'UIDVALIDITY': [b'7'], 'UIDNEXT': [b'12'], 'EXISTS': [b'3']}
+        return 'OK', [b'3']
+
+
+class Mailbox:
+
+    def __init__(self, client):
+        self.client = client
+
+
+class FolderClient:
+    """INBOX (UIDVALIDITY 7, UIDNEXT 7) où UID SEARCH trouve 5 et 6, mais dont le FETCH est refusé."""
+
+    capabilities = ('IMAP4REV1',)
+
+    def __init__(self):
+        self.untagged_responses = {}
+        self.commands = []
+
+    def select(self, mailbox, readonly=False):
+        self.untagged_responses = {'UIDVALIDITY': [b'7'], 'UIDNEXT': [b'7'], 'EXISTS': [b'6']}
+        return 'OK', [b'6']
+
+    def uid(self, command, *args):
+        self.commands.append((command,) + args)
+        if command == 'SEARCH':
+            return 'OK', [b'5 6']
+        return 'NO', [b'FETCH failed']
+
+
+def make_processor():
+    """Processeur sans connexion ni classifier, après le scan initial."""
+    processor = EmailProcessor.__new__(EmailProcessor)
+    processor.initial_scan_done = True
+    processor.running = True
+    processor.classifier = mock.Mock(use_lumo=False)
+    processor._classify_pool = None
+    processor._state_lock = threading.RLock()
+    processor.last_check = {}
+    processor.processed_emails = {}
+    processor._dirty_folders = set()
+    processor._checkpoint_dirty = False
+    processor._folder_status = {}
+    processor._uid_floor = {}
+    processor._uid_validity = {}
+    processor._date_cache = {}
+    processor._folder_list = None
+    processor._inbox_state = None
+    return processor
+
+
+class TestProcessFolder(unittest.TestCase):
+
+    def test_failed_fetch_keeps_floor(self):
+        processor = make_processor()
+        processor._uid_floor = {'INBOX': (7, 5)}
+        processor._uid_validity = {'INBOX': 7}
+        client = FolderClient()
+        counters = {'MESSAGES': 6, 'UIDNEXT': 7, 'UIDVALIDITY': 7, 'UNSEEN': 2}
+
+        self.assertEqual(processor.process_folder(Mailbox(client), 'INBOX', counters), 0)
+        self.assertEqual([command[0] for command in client.commands], ['SEARCH', 'FETCH'])
+        self.assertTrue(client.commands[0][1].endswith('UID 5:*'))
+        # Les emails 5 et 6 n'ont pas été lus: ils restent au-dessus du plancher
+        self.assertEqual(processor._uid_floor, {'INBOX': (7, 5)})
+        self.assertNotIn('INBOX', processor._folder_status)
+        self.assertEqual(processor.processed_emails['INBOX'], set())
+
+
+class TestUidFloor(unittest.TestCase):
+
+    def test_drop_below_floor(self):
+        # 'UID 12:*' sans UID >= 12: le serveur renvoie le dernier message (UID 11)
+        self.assertEqual(EmailProcessor._drop_below_floor([b'11'], 12), [])
+        self.assertEqual(EmailProcessor._drop_below_floor([b'12', b'14'], 12), [b'12', b'14'])
+
+
+class TestInboxState(unittest.TestCase):
+
+    def test_status_skip_refreshes_inbox_state(self):
+        processor = make_processor()
+        processor._folder_status = {'INBOX': (7, 12, 3)}
+        # État d'un traitement plus ancien, avant l'arrivée de deux messages
+        processor._inbox_state = (b'7', 10, 1)
+        processor._last_full_scan = time.monotonic()
+        mailbox = Mailbox(InboxClient())
+
+        counters = {'MESSAGES': 3, 'UIDNEXT': 12, 'UIDVALIDITY': 7, 'UNSEEN': 1}
+        self.assertEqual(processor.process_folder(mailbox, 'INBOX', counters), 0)
+        self.assertEqual(processor._inbox_state, (b'7', 12, 3))
+
+        # Rien de nouveau depuis le STATUS: attente en IDLE, pas de réveil immédiat
+        with mock.patch.object(email_processor, 'idle_wait', return_value=False) as idle:
+            self.assertFalse(processor.wait_for_new_mail(mailbox))
+        idle.assert_called_once()
+
+
+if __name__ == '__main__':
+    unittest.main()
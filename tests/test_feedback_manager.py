@@ -0,0 +1,35 @@
+#!/usr/bin/env python3
+import unittest
+
+from scripts.feedback_manager import FeedbackManager
+from scripts.imap_utils import PipelinedIMAP
+from tests.imap_fakes import ScriptedIMAP
+
+
+class FakeClassifier:
+    categories = {'SPAM': [], 'WORK': []}
+
+
+class TestCheckForFeedback(unittest.TestCase):
+
+    def test_empty_learning_folder_skipped(self):
+        client = ScriptedIMAP({'Training/SPAM': b'(MESSAGES 0 UIDNEXT 9)',
+                               'Feedback/WORK': b'(MESSAGES 2 UIDNEXT 4)'})
+        self.addCleanup(client.shutdown)
+        mailbox = PipelinedIMAP()
+        mailbox.client = client
+        folders = ['Training/SPAM', 'Feedback/WORK']
+        statuses = mailbox.folder_statuses(folders)
+
+        manager = FeedbackManager.__new__(FeedbackManager)
+        manager.classifier, manager.mailbox = FakeClassifier(), mailbox
+        processed = []
+        manager._process_folder = lambda folder, category: processed.append((folder, category))
+        manager.check_for_feedback(folders, statuses)
+
+        self.assertEqual(statuses['Training/SPAM']['MESSAGES'], 0)
+        self.assertEqual(processed, [('Feedback/WORK', 'WORK')])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,205 @@
+#!/usr/bin/env python3
+import imaplib
+import socket
+import unittest
+
+from scripts.imap_utils import (PipelinedIMAP, bulk_fetch, compress_ids, enlarge_read_buffer, expand_ids,
+                                folder_status, iter_fetch_response, iter_list_response, parse_two_headers,
+                                refresh_capabilities)
+from tests.imap_fakes import FakeClient, ScriptedIMAP
+
+
+class TestIterFetchResponse(unittest.TestCase):
+
+    def test_literals_with_trailing_flags(self):
+        data = [
+            (b'1 (UID 11 BODY[] {5}', b'hello'),
+            b' FLAGS (\\Seen))',
+            (b'2 (UID 12 FLAGS () BODY[] {5}', b'world'),
+            b')',
+        ]
+        messages = list(iter_fetch_response(data))
+        self.assertEqual([m.msg_id for m in messages], [b'1', b'2'])
+        self.assertEqual([m.uid for m in messages], [b'11', b'12'])
+        self.assertEqual(messages[0].flags, (b'\\Seen',))
+        self.assertEqual(messages[1].flags, ())
+        self.assertEqual(messages[0].raw, b'hello')
+        self.assertEqual(messages[1].sections, {b'BODY[]': b'world'})
+
+    def test_metadata_only(self):
+        data = [
+            b'3 (INTERNALDATE "17-Jul-1996 02:44:25 -0700")',
+            b'4 (INTERNALDATE "18-Jul-1996 02:44:25 -0700")',
+        ]
+        messages = list(iter_fetch_response(data))
+        self.assertEqual([m.msg_id for m in messages], [b'3', b'4'])
+        self.assertLess(messages[0].internaldate, messages[1].internaldate)
+        self.assertIsNone(messages[0].raw)
+
+    def test_internaldate_timezones(self):
+        data = [
+            b'1 (INTERNALDATE " 7-Jul-1996 09:44:25 +0000")',
+            b'2 (INTERNALDATE "07-Jul-1996 02:44:25 -0700")',
+        ]
+        first, second = iter_fetch_response(data)
+        self.assertEqual(first.internaldate, second.internaldate)
+
+    def test_literal_content_not_parsed_as_metadata(self):
+        data = [(b'5 (BODY[] {22}', b'FLAGS (\\Flagged) UID 9'), b')']
+        message = next(iter_fetch_response(data))
+        self.assertIsNone(message.uid)
+        self.assertEqual(message.flags, ())
+
+    def test_multiple_sections(self):
+        data = [
+            (b'6 (BODY[HEADER.FIELDS (SUBJECT FROM)] {7}', b'Subject'),
+            (b' BODY[TEXT]<0> {4}', b'Body'),
+            b')',
+        ]
+        message = next(iter_fetch_response(data))
+        self.assertEqual(message.sections, {
+            b'BODY[HEADER.FIELDS (SUBJECT FROM)]': b'Subject',
+            b'BODY[TEXT]<0>': b'Body',
+        })
+
+
+class TestIterListResponse(unittest.TestCase):
+
+    def test_folder_names(self):
+        data = [
+            b'(\\HasNoChildren) "/" "INBOX"',
+            b'(\\HasChildren) "/" "Folders/Caf\xc3\xa9"',
+            b'(\\HasNoChildren) "/" "Folders/Vide"',
+            b'(\\Noselect) "/" Unquoted',
+        ]
+        self.assertEqual(list(iter_list_response(data)), ['INBOX', 'Folders/Café', 'Folders/Vide', 'Unquoted'])
+
+    def test_escaped_literal_and_nil_delimiter(self):
+        data = [
+            b'(\\HasNoChildren) "/" "Dossier \\"cit\xc3\xa9\\""',
+            (b'(\\HasNoChildren) "/" {9}', b'Litt\xc3\xa9ral'),
+            b'',
+            b'(\\Noinferiors) NIL INBOX',
+            b'garbage',
+        ]
+        self.assertEqual(list(iter_list_response(data)), ['Dossier "cité"', 'Littéral', 'INBOX'])
+
+
+class TestParseTwoHeaders(unittest.TestCase):
+
+    def test_folded_and_encoded(self):
+        raw = (b'From: =?utf-8?q?Ren=C3=A9?= <rene@example.com>\r\n'
+               b'Subject: Rapport\r\n\tmensuel\r\n\r\n')
+        self.assertEqual(parse_two_headers(raw), ('Rapport mensuel', 'René <rene@example.com>'))
+
+    def test_missing_headers(self):
+        self.assertEqual(parse_two_headers(b'\r\n'), ('', ''))
+
+
+class TestIdRanges(unittest.TestCase):
+
+    def test_round_trip(self):
+        ids = [1, 2, 3, 7, 9, 10]
+        self.assertEqual(compress_ids(ids), [[1, 3], [7, 7], [9, 10]])
+        self.assertEqual(list(expand_ids(compress_ids(ids))), ids)
+
+    def test_expand_plain_ints(self):
+        self.assertEqual(list(expand_ids([4, [6, 7]])), [4, 6, 7])
+
+
+class TestBulkFetch(unittest.TestCase):
+
+    def test_chunks_requests(self):
+        client = FakeClient([
+            ('OK', [b'1 (FLAGS ())', b'2 (FLAGS ())']),
+            ('OK', [b'3 (FLAGS ())']),
+        ])
+        ids = [b'1', b'2', b'3']
+        messages = list(bulk_fetch(client, ids, '(FLAGS)', chunk_size=2))
+        self.assertEqual([m.msg_id for m in messages], ids)
+        self.assertEqual(client.calls, [(b'1,2', '(FLAGS)'), (b'3', '(FLAGS)')])
+
+    def test_by_uid(self):
+        client = FakeClient([('OK', [b'1 (UID 11 FLAGS ())', b'3 (UID 14 FLAGS ())'])])
+        messages = list(bulk_fetch(client, [b'11', b'14'], '(FLAGS)', by_uid=True))
+        self.assertEqual([m.uid for m in messages], [b'11', b'14'])
+        self.assertEqual(client.calls, [('FETCH', b'11,14', '(FLAGS)')])
+
+    def test_response_released_while_iterating(self):
+        data = [(b'1 (BODY[] {3}', b'one'), b')', (b'2 (BODY[] {3}', b'two'), b')']
+        client = FakeClient([('OK', data)])
+        messages = bulk_fetch(client, [b'1', b'2'], '(BODY.PEEK[])')
+        self.assertEqual(next(messages).raw, b'one')
+        self.assertNotIn((b'1 (BODY[] {3}', b'one'), data)
+        self.assertEqual(next(messages).raw, b'two')
+        self.assertEqual(data, [])
+
+    def test_failed_chunk_is_skipped(self):
+        client = FakeClient([('NO', [None]), ('OK', [b'3 (FLAGS ())'])])
+        messages = list(bulk_fetch(client, [b'1', b'2', b'3'], '(FLAGS)', chunk_size=2))
+        self.assertEqual([m.msg_id for m in messages], [b'3'])
+
+    def test_refused_chunk_is_skipped(self):
+        client = FakeClient([imaplib.IMAP4.error('FETCH command error: BAD'), ('OK', [b'3 (FLAGS ())'])])
+        messages = list(bulk_fetch(client, [b'1', b'2', b'3'], '(FLAGS)', chunk_size=2))
+        self.assertEqual([m.msg_id for m in messages], [b'3'])
+
+    def test_connection_drop_propagates(self):
+        for error in (imaplib.IMAP4.abort('socket error: EOF'), ConnectionResetError()):
+            client = FakeClient([error])
+            with self.assertRaises(type(error)):
+                list(bulk_fetch(client, [b'1'], '(FLAGS)'))
+
+
+class TestFolderStatus(unittest.TestCase):
+
+    def test_counters_after_folder_name(self):
+        client = FakeClient([('OK', [b'"Dossier (MESSAGES 0)" (MESSAGES 4 UIDNEXT 12 UIDVALIDITY 7 UNSEEN 1)'])])
+        self.assertEqual(folder_status(client, 'Dossier (MESSAGES 0)'),
+                         {'MESSAGES': 4, 'UIDNEXT': 12, 'UIDVALIDITY': 7, 'UNSEEN': 1})
+
+    def test_refused(self):
+        client = FakeClient([('NO', [b'Mailbox does not exist'])])
+        self.assertIsNone(folder_status(client, 'Absent'))
+
+    def test_pipelined_statuses(self):
+        client = ScriptedIMAP({'A': b'(MESSAGES 1 UIDNEXT 5)', 'B': None, 'C': b'(MESSAGES 0 UIDNEXT 1)'})
+        self.addCleanup(client.shutdown)
+        mailbox = PipelinedIMAP()
+        mailbox.client = client
+        statuses = mailbox.folder_statuses(['A', 'B', 'C'], '(MESSAGES UIDNEXT)', chunk_size=2)
+        self.assertEqual(statuses, {'A': {'MESSAGES': 1, 'UIDNEXT': 5}, 'B': None,
+                                    'C': {'MESSAGES': 0, 'UIDNEXT': 1}})
+        self.assertEqual(client.received, [b'CAPABILITY', b'STATUS', b'STATUS', b'STATUS'])
+        self.assertNotIn('STATUS', client.untagged_responses)
+
+class TestReadBuffer(unittest.TestCase):
+
+    def test_reads_through_larger_buffer(self):
+        ours, server = socket.socketpair()
+        self.addCleanup(ours.close)
+        self.addCleanup(server.close)
+        client = FakeClient([])
+        client.sock = ours
+        client.file = ours.makefile('rb')
+        enlarge_read_buffer(client, size=65536)
+        server.sendall(b'* 1 FETCH (BODY[] {3}\r\nabc)\r\n')
+        self.assertEqual(client.file.readline(), b'* 1 FETCH (BODY[] {3}\r\n')
+        self.assertEqual(client.file.read(3), b'abc')
+        self.assertEqual(client.file.raw.fileno(), ours.fileno())
+
+
+class TestRefreshCapabilities(unittest.TestCase):
+
+    def test_capabilities_read_again(self):
+        client = ScriptedIMAP()
+        self.addCleanup(client.shutdown)
+        self.assertEqual(client.capabilities, ('IMAP4REV1',))
+        # Capacités annoncées une fois authentifié
+        client.capability_line = b'IMAP4rev1 SORT MOVE IDLE'
+        refresh_capabilities(client)
+        self.assertEqual(client.capabilities, ('IMAP4REV1', 'SORT', 'MOVE', 'IDLE'))
+
+
+if __name__ == '__main__':
+    unittest.main()